@@ -0,0 +1,144 @@
+"""Dataset aggregates behind the frontend's Feature Relations page.
+
+A single JSON file per model, model/aggregates.json, tagged with the hash
+of the dataset and the model version it describes:
+
+    correlations     Pearson correlation of every feature with the outcome
+    age_risk         per 5-year age band: patients, disease rate, mean model risk
+    lifestyle        per smoke / alco / active value: the same three numbers
+    blood_pressure   ap_hi / ap_lo quantiles for patients with and without disease
+
+Every aggregate is a handful of vectorized passes over the cleaned model
+matrix, so serving them is a file read at model load and the frontend can
+cache the figures per (dataset_hash, model_version).
+
+    python aggregates.py model/ --data cardio_train.csv
+"""
+import hashlib
+import json
+import os
+import tempfile
+import time
+
+import numpy as np
+
+from artifact import ArtifactError, builder_cli, load_header
+from features import EXPECTED_COLS
+
+FORMAT = 'cardio-aggregates'
+FORMAT_VERSION = 1
+FILENAME = 'aggregates.json'
+
+# Age bands in years: <35, 35-39, ..., 55-59, 60+
+AGE_EDGES = [35, 40, 45, 50, 55, 60]
+AGE_BANDS = ['<35', '35-39', '40-44', '45-49', '50-54', '55-59', '60+']
+LIFESTYLE = ['smoke', 'alco', 'active']
+BP_QUANTILES = [0.05, 0.25, 0.5, 0.75, 0.95]
+
+
+def dataset_hash(path):
+    # Content hash of a data file, read in blocks
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()[:16]
+
+
+def _rates(groups, n_groups, y, risk):
+    # Patients, disease rate and mean risk per group id (None where empty)
+    patients = np.bincount(groups, minlength=n_groups)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        disease = np.bincount(groups, weights=y, minlength=n_groups) / patients
+        mean_risk = np.bincount(groups, weights=risk, minlength=n_groups) / patients
+    clean = lambda a: [None if v != v else round(v, 4) for v in a.tolist()]
+    return {'patients': patients.tolist(), 'disease_rate': clean(disease), 'mean_risk': clean(mean_risk)}
+
+
+def compute(X, y, risk):
+    # Aggregates of a cleaned (n, 12) model matrix, its outcomes and the
+    # model's risk for every row
+    X = np.asarray(X, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    risk = np.asarray(risk, dtype=np.float64)
+
+    centered = X - X.mean(axis=0)
+    y_centered = y - y.mean()
+    with np.errstate(invalid='ignore', divide='ignore'):
+        r = centered.T @ y_centered / (np.sqrt((centered ** 2).sum(axis=0)) * np.sqrt((y_centered ** 2).sum()))
+
+    age = X[:, EXPECTED_COLS.index('age')]
+    lifestyle = {}
+    for name in LIFESTYLE:
+        values = np.rint(X[:, EXPECTED_COLS.index(name)]).astype(np.intp).clip(0, 1)
+        lifestyle[name] = dict(values=[0, 1], **_rates(values, 2, y, risk))
+
+    blood_pressure = {'quantiles': BP_QUANTILES}
+    for name in ('ap_hi', 'ap_lo'):
+        column = X[:, EXPECTED_COLS.index(name)]
+        blood_pressure[name] = {
+            str(outcome): np.round(np.quantile(column[y == outcome], BP_QUANTILES), 1).tolist()
+            if np.any(y == outcome) else None
+            for outcome in (0, 1)
+        }
+
+    return {
+        'rows': len(y),
+        'positive_rate': round(float(y.mean()), 4),
+        'correlations': {name: None if v != v else round(v, 4) for name, v in zip(EXPECTED_COLS, r.tolist())},
+        'age_risk': dict(bands=AGE_BANDS, **_rates(np.digitize(age, AGE_EDGES), len(AGE_BANDS), y, risk)),
+        'lifestyle': lifestyle,
+        'blood_pressure': blood_pressure
+    }
+
+
+def export_aggregates(X, y, risk, model_dir, model_version=None, data_hash=None, extra=None):
+    # Write model_dir/aggregates.json
+    aggregates = {
+        'format': FORMAT,
+        'format_version': FORMAT_VERSION,
+        'model_version': model_version,
+        'dataset_hash': data_hash,
+        'created_at': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime())
+    }
+    aggregates.update(extra or {})
+    aggregates.update(compute(X, y, risk))
+
+    # Write next to the target and swap it in
+    os.makedirs(model_dir, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(prefix='.aggregates-', dir=model_dir)
+    try:
+        with os.fdopen(fd, 'w') as f:
+            json.dump(aggregates, f, indent=2)
+        os.chmod(tmp, 0o644)
+        os.replace(tmp, os.path.join(model_dir, FILENAME))
+    except Exception:
+        os.unlink(tmp)
+        raise
+    return aggregates
+
+
+def load_aggregates(model_dir, model_version=None):
+    # The model's aggregates, or None if it has none (or they were computed
+    # for a different model version)
+    path = os.path.join(model_dir, FILENAME)
+    if not os.path.exists(path):
+        return None
+    try:
+        aggregates = load_header(path, FORMAT, FORMAT_VERSION, model_version)
+    except ArtifactError as e:
+        print(f"Warning: aggregates in {path} not used ({e}), dataset statistics disabled.")
+        return None
+    return aggregates
+
+
+def main():
+    args, scorer, version, (X, y, _) = builder_cli(__doc__)
+    aggregates = export_aggregates(X, y, scorer.risk(X), args.model_dir, version, dataset_hash(args.data),
+                                   extra={'data': os.path.abspath(args.data)})
+    print(f"Success! Aggregates of {aggregates['rows']} patients written for model {version} "
+          f"(dataset {aggregates['dataset_hash']}).")
+
+
+if __name__ == '__main__':
+    main()
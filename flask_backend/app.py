@@ -1,20 +1,172 @@
-import pandas as pd
-import pickle
-from flask import Flask, request, jsonify
+import numpy as np
+from flask import Flask, Response, g, request, jsonify, stream_with_context
 import os
 
+from features import EXPECTED_COLS, extract_features, compute_bmi, engineer, raw_to_matrix, records_to_matrix
+from registry import HotModel, ModelRegistry, RegistryError
+from cache import PredictionCache, cache_key
+from microbatch import MicroBatcher
+from metrics import Metrics
+from scoring import top_features
+import streaming
+from insights import engine as insight_engine
+import neighbors
+import sweep
+import uncertainty
+import wire
+
 app = Flask(__name__)
 
-# 1. Load the trained Pipeline
-# This pipeline already contains the scaler and the model
-try:
-    model_path = os.path.join(os.path.dirname(__file__), 'model/model.pkl')
-    with open(model_path, 'rb') as f:
-        model = pickle.load(f)
-    print("Success: Model pipeline loaded!")
-except FileNotFoundError:
+# Upper bound on records accepted by /predict/batch in a single call
+MAX_BATCH_SIZE = int(os.environ.get("MAX_BATCH_SIZE", 10000))
+
+# Read size for /predict/stream uploads, bounds memory per request
+STREAM_CHUNK_BYTES = int(os.environ.get("STREAM_CHUNK_BYTES", streaming.CHUNK_BYTES))
+
+def prediction_result(result, probability, model_version):
+    # Response body shared by /predict and /predict/batch
+    return {
+        'prediction': result,
+        'probability': float(probability),
+        'message': 'High risk of cardiovascular disease' if result == 1 else 'Low risk',
+        'model_version': model_version,
+        'status': 'success'
+    }
+
+# Optional per-feature explanation: ?contributions=1[&top_k=N] on the
+# prediction endpoints (linear models only)
+DEFAULT_TOP_K = 3
+
+def requested_top_k():
+    # None unless contributions were asked for; raises ValueError for a bad top_k
+    if request.args.get('contributions', '').lower() not in ('1', 'true', 'yes'):
+        return None
+    return max(0, min(int(request.args.get('top_k', DEFAULT_TOP_K)), len(EXPECTED_COLS)))
+
+def explanation(contributions, top, intercept):
+    # Contributions are in log-odds; together with the intercept they add up
+    # to the model's decision value for this patient
+    return {
+        'contributions': dict(zip(EXPECTED_COLS, contributions)),
+        'intercept': intercept,
+        'top_drivers': [{'feature': EXPECTED_COLS[j], 'contribution': contributions[j]} for j in top]
+    }
+
+def explain_unsupported(scorer):
+    if hasattr(scorer, 'contributions'):
+        return None
+    return jsonify({'error': f'Feature contributions need a linear model (serving {scorer.kind})'}), 501
+
+# Sampling state for /predict/uncertainty (per-thread RNG and buffers)
+monte_carlo = uncertainty.MonteCarlo()
+
+# 1. Load the trained model
+# The compact artifact (model/linear) is memory-mapped and needs no sklearn;
+# model/model.pkl is only unpickled when there is no artifact (non-linear
+# models). Linear pipelines are compiled into a plain NumPy kernel either way.
+#
+# SERVING_MODE=lean (default) keeps the import path to Flask + NumPy: pandas
+# and sklearn are only imported if a pickle has to be loaded. SERVING_MODE=full
+# loads the pickled pipeline up front like earlier releases did.
+#
+# When MODEL_REGISTRY_DIR holds versions, the one its CURRENT pointer names is
+# served instead, and every worker reloads in the background when the pointer
+# moves (checked every MODEL_POLL_SECONDS, 0 disables watching).
+MODEL_DIR = os.path.join(os.path.dirname(__file__), 'model')
+MODEL_REGISTRY_DIR = os.environ.get("MODEL_REGISTRY_DIR", os.path.join(MODEL_DIR, 'registry'))
+MODEL_POLL_SECONDS = float(os.environ.get("MODEL_POLL_SECONDS", 5))
+SERVING_MODE = os.environ.get("SERVING_MODE", "lean")
+
+# Predictions run on every newly loaded model before it serves traffic, so
+# the first real request doesn't pay for lazy initialisation
+WARMUP_PREDICTIONS = int(os.environ.get("WARMUP_PREDICTIONS", 3))
+WARMUP_PATIENT = {'age': 50, 'gender': 1, 'height': 165, 'weight': 70, 'ap_hi': 120, 'ap_lo': 80,
+                  'cholesterol': 1, 'gluc': 1, 'smoke': 0, 'alco': 0, 'active': 1}
+
+def warmup(served):
+    for _ in range(WARMUP_PREDICTIONS):
+        features = extract_features(WARMUP_PATIENT)
+        features['bmi'] = compute_bmi(features['height'], features['weight'])
+        prediction, probability = served.scorer.score_one(features)
+        X, _ = records_to_matrix([WARMUP_PATIENT] * 8)
+        served.scorer.labels(served.scorer.risk(X))
+        with app.test_request_context():
+            jsonify(prediction_result(int(prediction), probability, served.version))
+
+registry = ModelRegistry(MODEL_REGISTRY_DIR)
+hot_model = HotModel(registry, MODEL_DIR, MODEL_POLL_SECONDS, SERVING_MODE, warmup)
+hot_model.refresh()
+if hot_model.current:
+    served = hot_model.current
+    print(f"Success: Model {served.version} loaded in {served.load_seconds * 1000:.1f} ms "
+          f"(scoring path: {served.scorer.kind}, mode: {SERVING_MODE})")
+else:
     print("Error: model/model.pkl not found. Make sure you moved it to the 'model' folder.")
-    model = None
+
+# Admin endpoints (/admin/models) require this bearer token; unset disables them
+ADMIN_TOKEN = os.environ.get("ADMIN_TOKEN")
+
+# In-process cache for /predict, keyed on the canonical 11-feature tuple.
+# PREDICT_CACHE_SIZE=0 turns it off.
+PREDICT_CACHE_SIZE = int(os.environ.get("PREDICT_CACHE_SIZE", 4096))
+PREDICT_CACHE_TTL = float(os.environ.get("PREDICT_CACHE_TTL", 300))
+prediction_cache = PredictionCache(PREDICT_CACHE_SIZE, PREDICT_CACHE_TTL) if PREDICT_CACHE_SIZE > 0 else None
+
+# Optional micro-batching: concurrent /predict calls in one worker are queued
+# for up to MICROBATCH_MAX_WAIT_MS (or MICROBATCH_MAX_BATCH rows) and scored
+# together. Useful with threaded workers, e.g. gunicorn --threads 8.
+MICROBATCH_ENABLED = os.environ.get("MICROBATCH_ENABLED", "0") == "1"
+MICROBATCH_MAX_WAIT_MS = float(os.environ.get("MICROBATCH_MAX_WAIT_MS", 2))
+MICROBATCH_MAX_BATCH = int(os.environ.get("MICROBATCH_MAX_BATCH", 64))
+batcher = MicroBatcher(MICROBATCH_MAX_WAIT_MS / 1000, MICROBATCH_MAX_BATCH) \
+    if MICROBATCH_ENABLED else None
+
+# Per-stage latency histograms and request counters, served on /metrics.
+# With several gunicorn workers set METRICS_DIR to a shared directory so
+# every scrape sees the totals of all workers.
+METRICS_ENABLED = os.environ.get("METRICS_ENABLED", "1") == "1"
+metrics = Metrics(METRICS_ENABLED, os.environ.get("METRICS_DIR"))
+
+def collect_metrics(m):
+    # Copy model, cache and micro-batching state into the metrics snapshot
+    served = hot_model.current
+    if served:
+        m.set_gauge('cardio_model_load_seconds', (('version', served.version),), served.load_seconds,
+                    'Time it took to load the served model')
+        m.set_gauge('cardio_model_info', (('version', served.version), ('kind', served.scorer.kind)), 1,
+                    'Model served by this worker')
+    if prediction_cache:
+        stats = prediction_cache.stats()
+        for key in ('hits', 'misses', 'coalesced', 'evictions', 'expirations'):
+            m.set_counter(f'cardio_cache_{key}_total', (), stats[key], f'Prediction cache {key}')
+        m.set_gauge('cardio_cache_size', (), stats['size'], 'Entries in the prediction cache')
+    if batcher:
+        m.set_counter('cardio_microbatch_batches_total', (), batcher.batches, 'Micro-batches scored')
+        m.set_counter('cardio_microbatch_rows_total', (), batcher.rows, 'Rows scored through micro-batches')
+
+metrics.collectors.append(collect_metrics)
+
+@app.before_request
+def start_request():
+    # Runs in every worker after fork, a no-op once the watcher is running
+    hot_model.ensure_watching()
+    metrics.ensure_flushing()
+    g.timer = metrics.timer(request.url_rule.rule if request.url_rule else 'unmatched')
+
+@app.after_request
+def finish_request(response):
+    served = hot_model.current
+    if served:
+        response.headers.setdefault('X-Model-Version', served.version)
+    if metrics.enabled and 'timer' in g:
+        g.timer.finish(response.status_code)
+    return response
+
+@app.route('/metrics')
+def metrics_endpoint():
+    if not metrics.enabled:
+        return jsonify({'error': 'Metrics are disabled'}), 404
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
 
 @app.route('/')
 def home():
@@ -22,63 +174,477 @@ def home():
 
 @app.route('/predict', methods=['POST'])
 def predict():
-    if not model:
+    # Pin the model for the whole request, a reload swaps it for later ones
+    served = hot_model.current
+    if not served:
         return jsonify({'error': 'Model is not loaded'}), 500
     
+    timer = g.timer
     data = request.get_json()
+    try:
+        top_k = requested_top_k()
+    except ValueError:
+        return jsonify({'error': 'top_k must be an integer'}), 400
+    if top_k is not None and explain_unsupported(served.scorer):
+        return explain_unsupported(served.scorer)
+    timer.mark('parse')
     
     # 2. Extract features from the JSON request
     # We expect the frontend to send these raw values
     try:
-        features = {
-            'age': data['age'],          # In years
-            'gender': data['gender'],    # 1 or 0 (as processed in your notebook)
-            'height': data['height'],    # In cm
-            'weight': data['weight'],    # In kg
-            'ap_hi': data['ap_hi'],      # Systolic BP
-            'ap_lo': data['ap_lo'],      # Diastolic BP
-            'cholesterol': data['cholesterol'], # 1, 2, or 3
-            'gluc': data['gluc'],        # 1, 2, or 3
-            'smoke': data['smoke'],      # 0 or 1
-            'alco': data['alco'],        # 0 or 1
-            'active': data['active']     # 0 or 1
-        }
+        features = extract_features(data)
+        timer.mark('extract')
         
         # 3. Calculate BMI (Feature Engineering)
         # Your model expects 'bmi' as a feature, so we calculate it here
-        # BMI = weight(kg) / (height(m))^2
-        height_m = features['height'] / 100
-        features['bmi'] = features['weight'] / (height_m ** 2)
+        features['bmi'] = compute_bmi(features['height'], features['weight'])
+        timer.mark('bmi')
 
-        # 4. Create a DataFrame
-        # The pipeline REQUIRES a DataFrame with specific column names
-        df = pd.DataFrame([features])
+        # 4. Make Prediction
+        # The scorer reads the features in EXPECTED_COLS order and returns
+        # the label together with its probability (confidence score)
+        # Identical payloads are served from the cache, concurrent ones
+        # can be micro-batched
+        scorer = served.scorer
+        if batcher:
+            score = lambda: batcher.submit(scorer, features)
+        else:
+            score = lambda: scorer.score_one(features)
+        if prediction_cache:
+            prediction, probability = prediction_cache.get_or_compute(
+                cache_key(features), score, served.version)
+        else:
+            prediction, probability = score()
+        timer.mark('score')
         
-        # Ensure columns are in the exact order the pipeline expects (optional but safe)
-        # Based on your notebook:
-        expected_cols = ['height', 'weight', 'age', 'ap_hi', 'ap_lo', 'bmi', 
-                         'cholesterol', 'gluc', 'gender', 'smoke', 'alco', 'active']
-        df = df[expected_cols]
-
-        # 5. Make Prediction
-        prediction = model.predict(df)
-        probability = model.predict_proba(df).max() # Get confidence score
+        # 5. Return Result
+        result = int(prediction) # 0 = No Disease, 1 = Disease present
         
-        # 6. Return Result
-        result = int(prediction[0]) # 0 = No Disease, 1 = Disease present
-        
-        return jsonify({
-            'prediction': result,
-            'probability': float(probability),
-            'message': 'High risk of cardiovascular disease' if result == 1 else 'Low risk',
-            'status': 'success'
-        })
+        body = prediction_result(result, probability, served.version)
+        row = np.array([[features[name] for name in EXPECTED_COLS]], dtype=np.float64)
+
+        # Clinical insight codes from the rule table (see insights.py)
+        body['insights'] = insight_engine.to_codes(insight_engine.evaluate(row))[0]
+        timer.mark('insights')
+
+        # Where the patient's risk falls in the reference population
+        # (a binary search in the model's precomputed sorted scores)
+        if served.population:
+            risk = probability if result == 1 else 1.0 - probability
+            percentiles = served.population.percentiles([risk], [features['age']], [features['gender']])
+            body['population'] = served.population.describe(percentiles)[0]
+            timer.mark('percentile')
+
+        # 6. Optionally explain it: exact per-feature contributions of the
+        # linear model, computed from the same feature row
+        if top_k is not None:
+            contributions = scorer.contributions(row)
+            body.update(explanation(contributions[0].tolist(), top_features(contributions, top_k)[0].tolist(),
+                                    scorer.intercept))
+            timer.mark('explain')
+
+        response = jsonify(body)
+        timer.mark('serialize')
+        return response
 
     except KeyError as e:
         return jsonify({'error': f'Missing required feature: {str(e)}'}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@app.route('/model/coefficients')
+def model_coefficients():
+    # Coefficients of the served linear model, for the analytics page
+    served = hot_model.current
+    if not served:
+        return jsonify({'error': 'Model is not loaded'}), 500
+    scorer = served.scorer
+    if explain_unsupported(scorer):
+        return explain_unsupported(scorer)
+    return jsonify({
+        'model_version': served.version,
+        'intercept': scorer.intercept,
+        # coefficient: log-odds per standard deviation (per unit for
+        # passthrough columns); weight: log-odds per raw unit
+        'features': [{
+            'feature': name,
+            'coefficient': float(scorer.coef[j]),
+            'weight': float(scorer.weights[j]),
+            'mean': float(scorer.mean[j]),
+            'scale': float(scorer.scale[j]),
+            'odds_ratio': float(np.exp(scorer.coef[j]))
+        } for j, name in enumerate(EXPECTED_COLS)],
+        'status': 'success'
+    })
+
+@app.route('/model/aggregates')
+def model_aggregates():
+    # Dataset statistics behind the Feature Relations page, computed at
+    # training time. Clients cache them per (dataset_hash, model_version).
+    served = hot_model.current
+    if not served:
+        return jsonify({'error': 'Model is not loaded'}), 500
+    if not served.aggregates:
+        return jsonify({'error': 'No dataset aggregates for this model (see aggregates.py)'}), 404
+    return jsonify(dict(served.aggregates, status='success'))
+
+@app.route('/microbatch/stats')
+def microbatch_stats():
+    if not batcher:
+        return jsonify({'enabled': False})
+    return jsonify(dict(batcher.stats(), enabled=True))
+
+@app.route('/cache/stats')
+def cache_stats():
+    if not prediction_cache:
+        return jsonify({'enabled': False})
+    return jsonify(dict(prediction_cache.stats(), enabled=True))
+
+@app.route('/predict/batch', methods=['POST'])
+def predict_batch():
+    served = hot_model.current
+    if not served:
+        return jsonify({'error': 'Model is not loaded'}), 500
+    scorer = served.scorer
+    timer = g.timer
+
+    # 1. Accept either a JSON array of patients or {"patients": [...]}, or
+    # one column per feature as Arrow IPC / msgpack (see wire.py)
+    fmt = wire.FORMATS.get(request.mimetype, 'json')
+    try:
+        top_k = requested_top_k()
+    except ValueError:
+        return jsonify({'error': 'top_k must be an integer'}), 400
+    if top_k is not None and explain_unsupported(scorer):
+        return explain_unsupported(scorer)
+    if fmt == 'json':
+        data = request.get_json(silent=True)
+        records = data.get('patients') if isinstance(data, dict) else data
+        if not isinstance(records, list):
+            return jsonify({'error': 'Expected a JSON array of patient records'}), 400
+        n = len(records)
+    else:
+        try:
+            raw = wire.decode(fmt, request.get_data())
+        except wire.UnsupportedFormat as e:
+            return jsonify({'error': str(e)}), 415
+        except KeyError as e:
+            return jsonify({'error': f'Missing required feature: {str(e)}'}), 400
+        except wire.WireError as e:
+            return jsonify({'error': str(e)}), 400
+        n = len(raw)
+    timer.mark('parse')
+    if n > MAX_BATCH_SIZE:
+        return jsonify({'error': f'Batch too large (max {MAX_BATCH_SIZE} records)'}), 413
+
+    try:
+        # 2. Feature extraction + BMI + column ordering for all rows at once.
+        # Bad records are reported per row instead of failing the batch.
+        X, errors = records_to_matrix(records) if fmt == 'json' else raw_to_matrix(raw)
+        valid = np.ones(n, dtype=bool)
+        valid[list(errors)] = False
+        timer.mark('extract')
+
+        # 3. One predict_proba call for the whole batch, labels derived from it
+        labels = np.full(n, -1, dtype=np.int64)
+        probabilities = np.full(n, np.nan)
+        if valid.any():
+            risk = scorer.risk(X[valid])
+            labels[valid] = scorer.labels(risk)
+            probabilities[valid] = np.maximum(risk, 1.0 - risk)
+        timer.mark('score')
+
+        # Population percentiles of all valid rows in one vectorized search
+        population = None
+        if served.population and valid.any():
+            found = served.population.percentiles(risk, X[valid, EXPECTED_COLS.index('age')],
+                                                  X[valid, EXPECTED_COLS.index('gender')])
+            population = {name: np.full(n, np.nan) for name in found}
+            for name, values in found.items():
+                population[name][valid] = values
+            timer.mark('percentile')
+
+        # Clinical insights of every row from one pass over the rule table
+        insight_mask = insight_engine.evaluate(X)
+        timer.mark('insights')
+
+        # Optional explanation for every row at once (rows with errors are NaN)
+        contributions = top = None
+        if top_k is not None:
+            contributions = scorer.contributions(X)
+            top = top_features(contributions, top_k)
+            timer.mark('explain')
+
+        # 4. Return results in request order, in the format the client accepts
+        out = wire.response_format(request.accept_mimetypes, fmt)
+        if out != 'json':
+            try:
+                body = wire.encode(out, labels, probabilities, errors, served.version,
+                                   contributions, top, population,
+                                   (insight_engine.bits(insight_mask), insight_engine.codes))
+            except wire.UnsupportedFormat as e:
+                return jsonify({'error': str(e)}), 406
+            response = Response(body, mimetype=wire.MIMETYPES[out])
+            timer.mark('serialize')
+            return response
+
+        results = [None] * n
+        label_list, probability_list = labels.tolist(), probabilities.tolist()
+        for i in np.flatnonzero(valid).tolist():
+            results[i] = prediction_result(label_list[i], probability_list[i], served.version)
+        if top_k is not None:
+            contribution_list, top_list = contributions.tolist(), top.tolist()
+            for i in np.flatnonzero(valid).tolist():
+                results[i].update(explanation(contribution_list[i], top_list[i], scorer.intercept))
+        for i, codes in zip(np.flatnonzero(valid).tolist(), insight_engine.to_codes(insight_mask[valid])):
+            results[i]['insights'] = codes
+        if population:
+            for i, block in zip(np.flatnonzero(valid).tolist(), served.population.describe(found)):
+                results[i]['population'] = block
+        for i, message in errors.items():
+            results[i] = {'error': message, 'status': 'error'}
+
+        response = jsonify({
+            'results': results,
+            'count': n,
+            'errors': len(errors),
+            'model_version': served.version,
+            'status': 'success'
+        })
+        timer.mark('serialize')
+        return response
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/predict/stream', methods=['POST'])
+def predict_stream():
+    served = hot_model.current
+    if not served:
+        return jsonify({'error': 'Model is not loaded'}), 500
+
+    # 1. Pick the input format from the Content-Type.
+    # CSV follows cardio_train.csv (';'-separated, age in days),
+    # NDJSON has one /predict-style JSON object per line (age in years).
+    fmt = 'csv' if request.mimetype == 'text/csv' else \
+          'ndjson' if request.mimetype in ('application/x-ndjson', 'application/jsonl') else None
+    if fmt is None:
+        return jsonify({'error': 'Content-Type must be text/csv or application/x-ndjson'}), 415
+    sep = request.args.get('sep', ';')
+    try:
+        top_k = requested_top_k()
+    except ValueError:
+        return jsonify({'error': 'top_k must be an integer'}), 400
+    if top_k is not None and explain_unsupported(served.scorer):
+        return explain_unsupported(served.scorer)
+    age_in_days = request.args.get('age_unit', 'days' if fmt == 'csv' else 'years') == 'days'
+
+    # 2. Read the upload in fixed-size chunks instead of buffering it
+    blocks = streaming.iter_blocks(request.stream, STREAM_CHUNK_BYTES)
+    try:
+        if fmt == 'csv':
+            header, blocks = streaming.read_csv_header(blocks, sep)
+            chunks = streaming.parse_csv_blocks(blocks, header, sep, age_in_days)
+        else:
+            chunks = streaming.parse_ndjson_blocks(blocks, age_in_days)
+    except KeyError as e:
+        return jsonify({'error': f'Missing required column(s): {e.args[0]}'}), 400
+
+    # 3. Parse the next chunk in the background while the current one is
+    # scored, and stream results back as they are ready
+    scored = streaming.score_chunks(served.scorer, streaming.prefetch(chunks), top_k)
+    if request.accept_mimetypes.best_match(['application/x-ndjson', 'text/csv']) == 'text/csv':
+        return Response(stream_with_context(streaming.format_csv(scored, sep, top_k)), mimetype='text/csv')
+    return Response(stream_with_context(streaming.format_ndjson(scored)), mimetype='application/x-ndjson')
+
+@app.route('/predict/sweep', methods=['POST'])
+def predict_sweep():
+    # What-if curves: vary one or more vitals of a patient and score every
+    # point in one vectorized call (see sweep.py for the request body)
+    served = hot_model.current
+    if not served:
+        return jsonify({'error': 'Model is not loaded'}), 500
+    timer = g.timer
+
+    # 1. Validate the base patient and the sweep ranges
+    try:
+        base, axes, grid = sweep.parse(request.get_json(silent=True))
+    except sweep.SweepError as e:
+        return jsonify({'error': str(e)}), 400
+    timer.mark('parse')
+
+    # 2. Lay out all points in one matrix and score it at once.
+    # risk is the probability of disease, not the confidence /predict reports
+    X, slices = sweep.build(base, axes, grid)
+    risk = served.scorer.risk(X)
+    timer.mark('score')
+
+    # 3. One curve per swept feature, plus the 2-D grid if asked for
+    body = {
+        'curves': [{'feature': name, 'values': values.tolist(), 'risk': risk[slices[name]].tolist()}
+                   for name, values in axes.items()],
+        'base_risk': float(risk[0]),
+        'points': len(X) - 1,
+        'model_version': served.version,
+        'status': 'success'
+    }
+    if grid:
+        x, y = axes[grid[0]], axes[grid[1]]
+        body['grid'] = {'x_feature': grid[0], 'y_feature': grid[1], 'x': x.tolist(), 'y': y.tolist(),
+                        'risk': risk[slices['grid']].reshape(len(y), len(x)).tolist()}
+    response = jsonify(body)
+    timer.mark('serialize')
+    return response
+
+@app.route('/predict/uncertainty', methods=['POST'])
+def predict_uncertainty():
+    # Risk under measurement noise: score many noisy copies of the patient
+    # in one pass (see uncertainty.py for the request body)
+    served = hot_model.current
+    if not served:
+        return jsonify({'error': 'Model is not loaded'}), 500
+    timer = g.timer
+
+    # 1. Validate the patient, noise model and sample count
+    try:
+        base, noise, samples, interval, seed = uncertainty.parse(request.get_json(silent=True))
+    except uncertainty.UncertaintyError as e:
+        return jsonify({'error': str(e)}), 400
+    timer.mark('parse')
+
+    # 2. Draw and score all samples into the thread's reusable buffers.
+    # Risk is the probability of disease (not the confidence /predict reports)
+    point_risk = float(served.scorer.risk(engineer(base[None, :]))[0])
+    risk = monte_carlo.sample(served.scorer, base, noise, samples, seed)
+    timer.mark('score')
+
+    # 3. Summarize the distribution
+    body = uncertainty.summarize(risk, point_risk, interval)
+    body.update(noise={name: {'dist': dist, 'sd' if dist == 'normal' else 'half_width': width}
+                       for name, (dist, width) in noise.items()},
+                model_version=served.version, status='success')
+    response = jsonify(body)
+    timer.mark('serialize')
+    return response
+
+@app.route('/similar', methods=['POST'])
+def similar_patients():
+    # The k reference patients closest to each query patient, with their
+    # outcomes. Body: a patient object, a list of them or {"patients": [...], "k": 10}
+    served = hot_model.current
+    if not served:
+        return jsonify({'error': 'Model is not loaded'}), 500
+    if not served.neighbors:
+        return jsonify({'error': 'No similar-patient index for this model (see neighbors.py)'}), 404
+    timer = g.timer
+
+    # 1. Parse the query patients
+    data = request.get_json(silent=True)
+    records = data.get('patients', data) if isinstance(data, dict) else data
+    single = isinstance(records, dict)
+    if single:
+        records = [records]
+    if not isinstance(records, list) or not records:
+        return jsonify({'error': 'Expected a patient object or a list of them'}), 400
+    if len(records) > neighbors.MAX_QUERIES:
+        return jsonify({'error': f'At most {neighbors.MAX_QUERIES} patients per request'}), 413
+    try:
+        k = int(data.get('k', 10)) if isinstance(data, dict) else int(request.args.get('k', 10))
+    except (TypeError, ValueError):
+        return jsonify({'error': 'k must be an integer'}), 400
+    if not 1 <= k <= neighbors.MAX_K:
+        return jsonify({'error': f'k must be between 1 and {neighbors.MAX_K}'}), 400
+    X, errors = records_to_matrix(records)
+    if single and errors:
+        # A lone patient is the whole request, like /predict
+        return jsonify({'error': errors[0]}), 400
+    valid = np.flatnonzero(np.isfinite(X).all(axis=1))
+    timer.mark('parse')
+
+    # 2. One tree query for all valid patients (the index loads on first use)
+    index = served.neighbors.get()
+    timer.mark('load_index')
+    distances, indices = index.query(X[valid], k)
+    timer.mark('query')
+
+    # 3. Neighbour features and outcomes, gathered for the whole batch
+    found = index.features[indices]
+    outcomes = index.outcomes[indices]
+    results = [None] * len(records)
+    for row, i in enumerate(valid.tolist()):
+        results[i] = {
+            'neighbors': [{'distance': d, 'outcome': o, 'features': dict(zip(EXPECTED_COLS, f))}
+                          for d, o, f in zip(distances[row].tolist(), outcomes[row].tolist(), found[row].tolist())],
+            'outcome_rate': float(outcomes[row].mean()),
+            'status': 'success'
+        }
+    for i, message in errors.items():
+        results[i] = {'error': message, 'status': 'error'}
+    body = dict(results[0], model_version=served.version) if single else {
+        'results': results,
+        'count': len(records),
+        'errors': len(errors),
+        'model_version': served.version,
+        'status': 'success'
+    }
+    response = jsonify(body)
+    timer.mark('serialize')
+    return response
+
+@app.route('/similar/index')
+def similar_index():
+    # Size and memory of the served model's similar-patient index
+    served = hot_model.current
+    if not served or not served.neighbors:
+        return jsonify({'error': 'No similar-patient index loaded'}), 404
+    return jsonify(dict(served.neighbors.get().stats(), status='success'))
+
+def admin_authorized():
+    return ADMIN_TOKEN and request.headers.get('Authorization') == f'Bearer {ADMIN_TOKEN}'
+
+@app.route('/admin/models')
+def list_models():
+    if not admin_authorized():
+        return jsonify({'error': 'Forbidden'}), 403
+    served = hot_model.current
+    return jsonify({
+        'active': registry.current(),
+        'serving': served.version if served else None,
+        'serving_source': served.source if served else None,
+        'last_error': hot_model.last_error,
+        'history': registry.history(),
+        'versions': registry.versions()
+    })
+
+@app.route('/admin/models/<version>/activate', methods=['POST'])
+def activate_model(version):
+    if not admin_authorized():
+        return jsonify({'error': 'Forbidden'}), 403
+    try:
+        # Make sure the version actually loads before pointing workers at it
+        path = registry.path(version)
+        if not os.path.isdir(path):
+            raise RegistryError(f'Unknown model version: {version}')
+        hot_model.load(path, version)
+        registry.activate(version)
+    except RegistryError as e:
+        return jsonify({'error': str(e)}), 404
+    except Exception as e:
+        return jsonify({'error': f'Model {version} failed to load: {e}'}), 400
+    hot_model.poke()
+    return jsonify({'active': version, 'status': 'success'})
+
+@app.route('/admin/models/rollback', methods=['POST'])
+def rollback_model():
+    if not admin_authorized():
+        return jsonify({'error': 'Forbidden'}), 403
+    try:
+        version = registry.rollback()
+    except RegistryError as e:
+        return jsonify({'error': str(e)}), 409
+    hot_model.poke()
+    return jsonify({'active': version, 'status': 'success'})
+
 if __name__ == '__main__':
     port = int(os.environ.get("PORT", 5000))
     app.run(host="0.0.0.0", port=port)
\ No newline at end of file
@@ -0,0 +1,185 @@
+"""Compact, memory-mappable model artifact.
+
+A linear pipeline is stored as a directory holding a small JSON header
+and one uncompressed .npy file per array:
+
+    model/linear/
+        header.json   format version, feature order, classes, intercept
+        mean.npy      scaler mean per feature (EXPECTED_COLS order)
+        scale.npy     scaler scale per feature
+        coef.npy      logistic regression coefficients (standardized space)
+
+Arrays are opened with mmap_mode='r', so gunicorn workers share the pages
+and loading takes well under a millisecond. Nothing is unpickled.
+
+    python artifact.py model/model.pkl model/linear
+"""
+import hashlib
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from features import EXPECTED_COLS
+from scoring import LinearScorer, compile_model
+
+FORMAT = 'cardio-linear'
+FORMAT_VERSION = 1
+ARRAYS = ('mean', 'scale', 'coef')
+
+
+class ArtifactError(Exception):
+    pass
+
+
+def export_artifact(scorer, out_dir, model_version=None, extra=None):
+    # Write a LinearScorer to out_dir, replacing any previous artifact
+    if not isinstance(scorer, LinearScorer):
+        raise ArtifactError(f'Only linear models can be exported (got {scorer.kind})')
+    header = {
+        'format': FORMAT,
+        'format_version': FORMAT_VERSION,
+        'model_version': model_version,
+        'feature_order': EXPECTED_COLS,
+        'classes': scorer.classes.tolist(),
+        'intercept': scorer.intercept,
+        'arrays': {name: f'{name}.npy' for name in ARRAYS},
+        'created_at': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime())
+    }
+    header.update(extra or {})
+
+    def write(tmp):
+        for name in ARRAYS:
+            np.save(os.path.join(tmp, f'{name}.npy'), getattr(scorer, name))
+        with open(os.path.join(tmp, 'header.json'), 'w') as f:
+            json.dump(header, f, indent=2)
+
+    swap_dir(out_dir, write, prefix='.artifact-')
+    return header
+
+
+def swap_dir(out_dir, write, prefix='.build-'):
+    # Build a directory next to out_dir with write(tmp), then swap it in so
+    # readers never see a half-written one. The previous directory is
+    # renamed aside first (rename is atomic, deleting a tree in place is
+    # not), restored if the swap fails and only deleted afterwards; readers
+    # that already mapped its files keep them.
+    parent = os.path.dirname(os.path.abspath(out_dir))
+    os.makedirs(parent, exist_ok=True)
+    tmp = tempfile.mkdtemp(prefix=prefix, dir=parent)
+    try:
+        write(tmp)
+        os.chmod(tmp, 0o755)
+    except Exception:
+        shutil.rmtree(tmp, ignore_errors=True)
+        raise
+    old = tmp + '.old' if os.path.exists(out_dir) else None
+    if old:
+        os.replace(out_dir, old)
+    try:
+        os.replace(tmp, out_dir)
+    except Exception:
+        if old:
+            os.replace(old, out_dir)
+        shutil.rmtree(tmp, ignore_errors=True)
+        raise
+    if old:
+        shutil.rmtree(old, ignore_errors=True)
+
+
+def load_header(path, fmt, version, model_version=None, **expected):
+    # Read a JSON header and check it: format fmt up to version, every
+    # expected field equal (e.g. feature_order=EXPECTED_COLS) and, given a
+    # model_version, built for that model. Raises ArtifactError otherwise.
+    with open(path) as f:
+        header = json.load(f)
+    if header.get('format') != fmt or header.get('format_version', 0) > version:
+        raise ArtifactError(f"Unsupported format {header.get('format')} v{header.get('format_version')} "
+                            f"(expected {fmt} up to v{version})")
+    for key, value in expected.items():
+        if header.get(key) != value:
+            raise ArtifactError(f"{key} does not match this version of the code")
+    if model_version and header.get('model_version') not in (None, model_version):
+        raise ArtifactError(f"Built for model {header['model_version']}, not {model_version}")
+    return header
+
+
+def read_header(path):
+    return load_header(os.path.join(path, 'header.json'), FORMAT, FORMAT_VERSION, feature_order=EXPECTED_COLS)
+
+
+def builder_cli(description):
+    # Command line shared by the per-model builders (population.py,
+    # neighbors.py, aggregates.py): parses model_dir and --data, then loads
+    # the model and cleans the data exactly as training does. Returns
+    # (args, scorer, version, (X, y, summary)).
+    import argparse
+    parser = argparse.ArgumentParser(description=description, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('model_dir', help='model directory (linear/ artifact and/or model.pkl)')
+    parser.add_argument('--data', default=os.environ.get('CARDIO_DATA'), help='cardio_train.csv')
+    args = parser.parse_args()
+    if not args.data:
+        print("Error: pass --data or set CARDIO_DATA")
+        sys.exit(1)
+
+    import pandas as pd
+    from train_model import clean_frame
+
+    scorer, version = load_model(args.model_dir)
+    return args, scorer, version, clean_frame(pd.read_csv(args.data, sep=';'))
+
+
+def load_artifact(path):
+    # Returns (scorer, header); arrays stay memory-mapped
+    header = read_header(path)
+    arrays = {name: np.load(os.path.join(path, header['arrays'][name]), mmap_mode='r')
+              for name in ARRAYS}
+    scorer = LinearScorer(arrays['mean'], arrays['scale'], arrays['coef'],
+                          header['intercept'], header['classes'])
+    return scorer, header
+
+
+def load_pickle(pickle_path):
+    # Unpickle a fitted pipeline; returns (model, version)
+    import pickle
+    with open(pickle_path, 'rb') as f:
+        model_bytes = f.read()
+    return pickle.loads(model_bytes), hashlib.sha256(model_bytes).hexdigest()[:12]
+
+
+def load_model(model_dir, mode='lean'):
+    # Load the model stored in model_dir, returns (scorer, version).
+    # 'lean' prefers the compact artifact in model_dir/linear (NumPy only) and
+    # falls back to unpickling model_dir/model.pkl, which pulls in sklearn
+    # (needed for non-linear models). 'full' always starts from the pickle.
+    artifact_path = os.path.join(model_dir, 'linear')
+    pickle_path = os.path.join(model_dir, 'model.pkl')
+    if mode == 'full' and os.path.exists(pickle_path):
+        model, version = load_pickle(pickle_path)
+        return compile_model(model), version
+    if os.path.exists(os.path.join(artifact_path, 'header.json')):
+        try:
+            scorer, header = load_artifact(artifact_path)
+            return scorer, header['model_version']
+        except (ArtifactError, OSError, ValueError, KeyError) as e:
+            print(f"Warning: could not load {artifact_path} ({e}), falling back to pickle.")
+    model, version = load_pickle(pickle_path)
+    return compile_model(model), version
+
+
+def export_pickle(pickle_path, out_dir):
+    # Convert a pickled sklearn pipeline into an artifact
+    model, version = load_pickle(pickle_path)
+    return export_artifact(compile_model(model), out_dir, model_version=version)
+
+
+if __name__ == '__main__':
+    if len(sys.argv) != 3:
+        print(__doc__)
+        sys.exit(1)
+    header = export_pickle(sys.argv[1], sys.argv[2])
+    print(f"Success! Artifact {header['model_version']} written to {sys.argv[2]}")
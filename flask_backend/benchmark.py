@@ -0,0 +1,555 @@
+"""Benchmarks for the prediction API.
+
+Every scenario prints a JSON document (with the git commit, Python and CPU
+count) so results can be diffed across commits:
+
+    python benchmark.py predict --threads 4        # /predict, cached vs uncached
+    python benchmark.py batch --sizes 1 100 10000  # /predict/batch by batch size
+    python benchmark.py gunicorn --workers 2       # the same against a real server
+    python benchmark.py microbatch --threads 16 --requests 4000
+    python benchmark.py microbatch --scorer sklearn
+    python benchmark.py startup --runs 5
+    python benchmark.py wire --rows 10000          # JSON vs msgpack vs Arrow
+    python benchmark.py client --clicks 50         # frontend click-to-result, sequential vs pooled vs concurrent
+    python benchmark.py all --output bench.json
+
+predict/batch/microbatch use Flask's test client in this process; gunicorn
+client and startup spawn fresh processes. RSS is read from /proc (Linux).
+"""
+import argparse
+import contextlib
+import http.client
+import importlib
+import json
+import os
+import platform
+import random
+import socket
+import subprocess
+import sys
+import threading
+import time
+
+import numpy as np
+
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+def _normal(rng, mean, sd, low, high):
+    return int(round(min(max(rng.gauss(mean, sd), low), high)))
+
+
+def random_patient(rng):
+    # One /predict payload: roughly the distributions of the cardio training
+    # data, clipped to the risk form's input bounds
+    gender = 1 if rng.random() < 0.65 else 2
+    height = _normal(rng, 161 if gender == 1 else 170, 7, 140, 200)
+    ap_hi = _normal(rng, 127, 17, 80, 220)
+    return {
+        'age': _normal(rng, 53, 7, 18, 100),
+        'gender': gender,
+        'height': height,
+        'weight': _normal(rng, 74 + (height - 165) * 0.5, 14, 40, 160),
+        'ap_hi': ap_hi,
+        'ap_lo': _normal(rng, 40 + ap_hi * 0.33, 8, 40, 140),
+        'cholesterol': rng.choices([1, 2, 3], [0.75, 0.14, 0.11])[0],
+        'gluc': rng.choices([1, 2, 3], [0.85, 0.07, 0.08])[0],
+        'smoke': int(rng.random() < 0.09),
+        'alco': int(rng.random() < 0.05),
+        'active': int(rng.random() < 0.80)
+    }
+
+
+def rss_mb(pid='self'):
+    # Resident set size of a process in MiB, None where /proc is not available
+    try:
+        with open(f'/proc/{pid}/status') as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return None
+
+
+def child_pids(pid):
+    try:
+        with open(f'/proc/{pid}/task/{pid}/children') as f:
+            return [int(p) for p in f.read().split()]
+    except OSError:
+        return []
+
+
+def environment():
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=HERE,
+                                capture_output=True, text=True).stdout.strip() or None
+    except OSError:
+        commit = None
+    return {
+        'commit': commit,
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'platform': platform.platform(),
+        'cpus': os.cpu_count()
+    }
+
+
+def load_backend():
+    # Import app.py with its startup messages sent to stderr, so stdout
+    # only carries the JSON report
+    with contextlib.redirect_stdout(sys.stderr):
+        return importlib.import_module('app')
+
+
+def latency_summary(latencies, elapsed):
+    ms = np.asarray(latencies) * 1000
+    return {
+        'requests': len(ms),
+        'throughput_rps': len(ms) / elapsed,
+        'p50_ms': float(np.percentile(ms, 50)),
+        'p95_ms': float(np.percentile(ms, 95)),
+        'p99_ms': float(np.percentile(ms, 99))
+    }
+
+
+_dumps = json.dumps  # post() takes a `json` argument like the test client
+
+
+class HttpClient:
+    # Minimal keep-alive JSON client with the test client's post() signature
+    def __init__(self, host, port):
+        self.conn = http.client.HTTPConnection(host, port, timeout=60)
+
+    def post(self, path, json=None):
+        self.conn.request('POST', path, body=_dumps(json), headers={'Content-Type': 'application/json'})
+        response = self.conn.getresponse()
+        response.read()
+        if response.status >= 400:
+            raise RuntimeError(f'{path} returned {response.status}')
+        return response
+
+
+def run_concurrent(app, path, payloads, threads, make_client=None):
+    # Fire payloads at the app from `threads` concurrent clients
+    latencies = [[] for _ in range(threads)]
+    make_client = make_client or app.test_client
+
+    def client(k):
+        c = make_client()
+        for payload in payloads[k::threads]:
+            t = time.perf_counter()
+            c.post(path, json=payload)
+            latencies[k].append(time.perf_counter() - t)
+
+    workers = [threading.Thread(target=client, args=(k,)) for k in range(threads)]
+    start = time.perf_counter()
+    for w in workers:
+        w.start()
+    for w in workers:
+        w.join()
+    elapsed = time.perf_counter() - start
+    return latency_summary([x for per in latencies for x in per], elapsed)
+
+
+def predict_runs(target, make_client, rng, args):
+    # /predict with unique payloads (every request is scored) and with a small
+    # pool of repeating patients (served from the prediction cache once warm)
+    results = []
+    unique = [random_patient(rng) for _ in range(args.requests)]
+    pool = [random_patient(rng) for _ in range(args.distinct)]
+    for mode, payloads in (('uncached', unique), ('cached', [pool[i % len(pool)] for i in range(args.requests)])):
+        warm = pool if mode == 'cached' else [random_patient(rng) for _ in range(100)]
+        run_concurrent(target, '/predict', warm, args.threads, make_client)
+        summary = run_concurrent(target, '/predict', payloads, args.threads, make_client)
+        summary.update(mode=mode, threads=args.threads)
+        results.append(summary)
+        print(json.dumps(summary), file=sys.stderr)
+    return results
+
+
+def batch_runs(target, make_client, rng, args):
+    # /predict/batch per batch size; each size scores about args.rows rows
+    results = []
+    for size in args.sizes:
+        calls = max(args.min_calls, args.rows // size)
+        batches = [[random_patient(rng) for _ in range(size)] for _ in range(min(calls, 8))]
+        payloads = [batches[i % len(batches)] for i in range(calls)]
+        run_concurrent(target, '/predict/batch', payloads[:2], 1, make_client)
+        summary = run_concurrent(target, '/predict/batch', payloads, args.threads, make_client)
+        summary.update(batch_size=size, rows_per_second=summary['throughput_rps'] * size)
+        results.append(summary)
+        print(json.dumps(summary), file=sys.stderr)
+    return results
+
+
+def bench_predict(args):
+    # Single /predict through the test client; unique payloads miss the
+    # prediction cache, repeating ones hit it
+    backend = load_backend()
+    results = predict_runs(backend.app, None, random.Random(args.seed), args)
+    return {'scenario': 'predict', 'client': 'test_client', 'results': results,
+            'cache': backend.prediction_cache.stats() if backend.prediction_cache else None,
+            'rss_mb': rss_mb()}
+
+
+def bench_batch(args):
+    backend = load_backend()
+    results = batch_runs(backend.app, None, random.Random(args.seed), args)
+    return {'scenario': 'batch', 'client': 'test_client', 'results': results, 'rss_mb': rss_mb()}
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def wait_ready(port, proc, timeout=60.0):
+    # Poll / until a worker answers
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError(f'gunicorn exited with status {proc.returncode}')
+        try:
+            conn = http.client.HTTPConnection('127.0.0.1', port, timeout=1)
+            conn.request('GET', '/')
+            if conn.getresponse().status == 200:
+                return
+        except OSError:
+            time.sleep(0.01)
+    raise RuntimeError('gunicorn did not become ready in time')
+
+
+def bench_gunicorn(args):
+    # The same scenarios over HTTP against `gunicorn app:app`, plus cold
+    # start and memory of the master and every worker
+    port = free_port()
+    env = dict(os.environ, MODEL_POLL_SECONDS='0')
+    cmd = [sys.executable, '-m', 'gunicorn', '-w', str(args.workers), '--threads', str(args.worker_threads),
+           '-b', f'127.0.0.1:{port}', '--log-level', 'warning', 'app:app']
+    start = time.perf_counter()
+    proc = subprocess.Popen(cmd, cwd=HERE, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        wait_ready(port, proc)
+        ready = time.perf_counter() - start
+        idle = {'master': rss_mb(proc.pid), 'workers': [rss_mb(p) for p in child_pids(proc.pid)]}
+        print(json.dumps({'ready_seconds': ready, 'rss_idle_mb': idle}), file=sys.stderr)
+
+        make_client = lambda: HttpClient('127.0.0.1', port)
+        rng = random.Random(args.seed)
+        predict = predict_runs(None, make_client, rng, args)
+        batch = batch_runs(None, make_client, rng, args)
+        workers = [rss_mb(p) for p in child_pids(proc.pid)]
+    finally:
+        proc.terminate()
+        proc.wait(timeout=30)
+    return {
+        'scenario': 'gunicorn', 'workers': args.workers, 'worker_threads': args.worker_threads,
+        'ready_seconds': ready, 'predict': predict, 'batch': batch,
+        'rss_mb': {'master': idle['master'], 'workers_idle': idle['workers'], 'workers_after': workers}
+    }
+
+
+def bench_microbatch(args):
+    # Throughput / tail latency of /predict with and without micro-batching
+    os.environ['PREDICT_CACHE_SIZE'] = '0'  # measure scoring, not cache hits
+    backend = load_backend()
+    from microbatch import MicroBatcher
+    from artifact import load_pickle
+    from scoring import SklearnScorer
+
+    if args.scorer == 'sklearn':
+        model, _ = load_pickle(os.path.join(backend.MODEL_DIR, 'model.pkl'))
+        backend.hot_model.swap(backend.hot_model.current._replace(scorer=SklearnScorer(model)))
+    scorer = backend.hot_model.current.scorer
+    rng = random.Random(args.seed)
+    payloads = [random_patient(rng) for _ in range(args.requests)]
+
+    configs = [None] + [(wait, size) for wait in args.max_wait_ms for size in args.max_batch]
+    results = []
+    for config in configs:
+        backend.batcher = MicroBatcher(config[0] / 1000, config[1]) if config else None
+        run_concurrent(backend.app, '/predict', payloads[:200], args.threads)  # warm up
+        summary = run_concurrent(backend.app, '/predict', payloads, args.threads)
+        summary['mode'] = 'microbatch' if config else 'off'
+        if config:
+            summary.update(max_wait_ms=config[0], max_batch=config[1],
+                           mean_batch_size=backend.batcher.stats()['mean_batch_size'])
+        results.append(summary)
+        print(json.dumps(summary), file=sys.stderr)
+    return {'scenario': 'microbatch', 'scorer': scorer.kind,
+            'threads': args.threads, 'results': results}
+
+
+# Runs in a fresh interpreter per measurement (see bench_startup)
+_STARTUP_CHILD = '''
+import contextlib, json, sys, time
+t0 = time.perf_counter()
+with contextlib.redirect_stdout(sys.stderr):
+    import app
+t1 = time.perf_counter()
+app.app.test_client().post('/predict', json=app.WARMUP_PATIENT)
+t2 = time.perf_counter()
+served = app.hot_model.current
+print(json.dumps({
+    'import_and_load_seconds': t1 - t0,
+    'model_load_seconds': served.load_seconds,
+    'first_request_seconds': t2 - t1,
+    'done_at': time.time(),
+    'scoring_path': served.scorer.kind,
+    'heavy_modules': [m for m in ('pandas', 'sklearn', 'scipy') if m in sys.modules]
+}))
+'''
+
+
+def bench_startup(args):
+    # Cold start per serving mode: imports, model load, time to first prediction
+    here = os.path.dirname(os.path.abspath(__file__))
+    results = []
+    for mode in args.modes:
+        runs = []
+        for _ in range(args.runs):
+            env = dict(os.environ, SERVING_MODE=mode, MODEL_POLL_SECONDS='0')
+            spawned_at = time.time()
+            out = subprocess.run([sys.executable, '-c', _STARTUP_CHILD], cwd=here, env=env,
+                                 capture_output=True, text=True, check=True).stdout
+            run = json.loads(out.strip().splitlines()[-1])
+            run['time_to_first_prediction_seconds'] = run.pop('done_at') - spawned_at
+            runs.append(run)
+        summary = {'mode': mode, 'runs': args.runs,
+                   'scoring_path': runs[0]['scoring_path'], 'heavy_modules': runs[0]['heavy_modules']}
+        for key in ('import_and_load_seconds', 'model_load_seconds', 'first_request_seconds',
+                    'time_to_first_prediction_seconds'):
+            summary[key] = float(np.median([r[key] for r in runs]))
+        summary['import_seconds'] = summary['import_and_load_seconds'] - summary['model_load_seconds']
+        results.append(summary)
+        print(json.dumps(summary), file=sys.stderr)
+    return {'scenario': 'startup', 'results': results}
+
+
+def bench_wire(args):
+    # Bytes on the wire and CPU per /predict/batch call for every format.
+    # Bodies are encoded up front, so cpu_ms is the server side (plus the
+    # test client's fixed overhead); client encode/decode is reported apart.
+    import wire
+    from features import INPUT_FEATURES
+    backend = load_backend()
+    client = backend.app.test_client()
+    rng = random.Random(args.seed)
+    records = [random_patient(rng) for _ in range(args.rows)]
+    raw = np.array([[r[name] for name in INPUT_FEATURES] for r in records], dtype=np.float64)
+
+    results = []
+    for fmt in args.formats:
+        mimetype = wire.MIMETYPES[fmt]
+        try:
+            if fmt != 'json':
+                wire.encode_request(fmt, raw[:1])  # import the library outside the timing
+            t = time.perf_counter()
+            body = json.dumps(records).encode() if fmt == 'json' else wire.encode_request(fmt, raw)
+            encode_ms = (time.perf_counter() - t) * 1000
+        except wire.UnsupportedFormat as e:
+            print(f'Skipping {fmt}: {e}', file=sys.stderr)
+            continue
+        post = lambda: client.post('/predict/batch', data=body, content_type=mimetype,
+                                   headers={'Accept': mimetype})
+        post()  # warm up
+        cpu, wall = [], []
+        for _ in range(args.repeats):
+            c, w = time.process_time(), time.perf_counter()
+            response = post()
+            cpu.append(time.process_time() - c)
+            wall.append(time.perf_counter() - w)
+        if response.status_code != 200:
+            raise RuntimeError(f'{fmt}: /predict/batch returned {response.status_code}')
+        t = time.perf_counter()
+        if fmt == 'json':
+            json.loads(response.data)
+        else:
+            wire.decode_response(fmt, response.data)
+        decode_ms = (time.perf_counter() - t) * 1000
+
+        per_10k = 10000 / args.rows
+        summary = {
+            'format': fmt,
+            'rows': args.rows,
+            'request_bytes': len(body),
+            'response_bytes': len(response.data),
+            'server_cpu_ms_per_10k_rows': float(np.median(cpu)) * 1000 * per_10k,
+            'server_wall_ms_per_10k_rows': float(np.median(wall)) * 1000 * per_10k,
+            'client_encode_ms': encode_ms,
+            'client_decode_ms': decode_ms
+        }
+        results.append(summary)
+        print(json.dumps(summary), file=sys.stderr)
+    return {'scenario': 'wire', 'results': results}
+
+
+def bench_client(args):
+    # Click-to-result latency of the frontend risk page against gunicorn,
+    # always over the same four calls (/predict, /predict/uncertainty,
+    # /similar, /predict/sweep): one after another on fresh connections (the
+    # old page), one after another on the pooled ApiClient, and in parallel
+    # on it. The old page also slept --sleep seconds before calling; that
+    # saving is reported on its own, not folded into the comparison.
+    import requests
+    sys.path.insert(0, os.path.join(HERE, '..', 'streamlit_frontend'))
+    from api_client import ApiClient
+
+    port = free_port()
+    env = dict(os.environ, MODEL_POLL_SECONDS='0')
+    cmd = [sys.executable, '-m', 'gunicorn', '-w', str(args.workers), '--threads', str(args.worker_threads),
+           '-b', f'127.0.0.1:{port}', '--log-level', 'warning', 'app:app']
+    proc = subprocess.Popen(cmd, cwd=HERE, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    base = f'http://127.0.0.1:{port}'
+    rng = random.Random(args.seed)
+
+    def calls(patient):
+        sweep = {'patient': patient, 'grid': ['ap_hi', 'weight'],
+                 'sweep': [{'feature': 'ap_hi', 'start': 80, 'stop': 220, 'steps': 71},
+                           {'feature': 'weight', 'start': 40, 'stop': 160, 'steps': 61},
+                           {'feature': 'age', 'start': 18, 'stop': 100, 'steps': 83},
+                           {'feature': 'cholesterol'}]}
+        return [('POST', '/predict', {'params': {'contributions': 1, 'top_k': 3}, 'json': patient}),
+                ('POST', '/predict/uncertainty', {'json': {'patient': patient, 'samples': args.samples}}),
+                ('POST', '/similar', {'json': {'patients': [patient], 'k': 10}}),
+                ('POST', '/predict/sweep', {'json': sweep})]
+
+    def sequential(patient):
+        for method, path, kwargs in calls(patient):
+            requests.request(method, base + path, timeout=10, **kwargs)
+
+    def pooled(patient, client):
+        for method, path, kwargs in calls(patient):
+            client.request(method, path, **kwargs)
+
+    def concurrent(patient, client):
+        for response in client.gather(*calls(patient)):
+            if isinstance(response, Exception):
+                raise response
+
+    client = ApiClient(base)
+    variants = (('sequential', sequential), ('pooled', lambda p: pooled(p, client)),
+                ('concurrent', lambda p: concurrent(p, client)))
+    try:
+        wait_ready(port, proc)
+        results = {}
+        for name, click in variants:
+            click(random_patient(rng))  # warm up
+            latencies = []
+            start = time.perf_counter()
+            for _ in range(args.clicks):
+                t = time.perf_counter()
+                click(random_patient(rng))
+                latencies.append(time.perf_counter() - t)
+            results[name] = latency_summary(latencies, time.perf_counter() - start)
+            print(json.dumps({name: results[name]}), file=sys.stderr)
+    finally:
+        client.close()  # keep-alive connections would hold up the shutdown
+        proc.terminate()
+        proc.wait(timeout=30)
+    return {'scenario': 'client', 'workers': args.workers, 'worker_threads': args.worker_threads,
+            'samples': args.samples, 'results': results,
+            'speedup_p50': results['sequential']['p50_ms'] / results['concurrent']['p50_ms'],
+            # Removed from the old page separately: it slept before every click
+            'removed_sleep_ms': args.sleep * 1000}
+
+
+def bench_all(args):
+    # predict + batch in this process, then cold start and a real server
+    return {'scenario': 'all', 'predict': bench_predict(args), 'batch': bench_batch(args),
+            'startup': bench_startup(args), 'gunicorn': bench_gunicorn(args)}
+
+
+def add_predict_args(p):
+    p.add_argument('--threads', type=int, default=4)
+    p.add_argument('--requests', type=int, default=2000)
+    p.add_argument('--distinct', type=int, default=50, help='patients repeated in the cached run')
+
+
+def add_batch_args(p):
+    p.add_argument('--sizes', type=int, nargs='+', default=[1, 10, 100, 1000, 10000])
+    p.add_argument('--rows', type=int, default=50000, help='rows scored per batch size')
+    p.add_argument('--min-calls', type=int, default=5)
+
+
+def add_gunicorn_args(p):
+    p.add_argument('--workers', type=int, default=2)
+    p.add_argument('--worker-threads', type=int, default=4)
+
+
+def add_startup_args(p):
+    p.add_argument('--runs', type=int, default=5)
+    p.add_argument('--modes', nargs='+', default=['lean', 'full'])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help='also write the JSON report to this file')
+    sub = parser.add_subparsers(dest='scenario', required=True)
+
+    p = sub.add_parser('predict', help='single /predict, cached vs uncached')
+    add_predict_args(p)
+    p.set_defaults(func=bench_predict)
+
+    p = sub.add_parser('batch', help='/predict/batch for several batch sizes')
+    add_batch_args(p)
+    p.add_argument('--threads', type=int, default=1)
+    p.set_defaults(func=bench_batch)
+
+    p = sub.add_parser('gunicorn', help='predict + batch over HTTP against gunicorn, with RSS per worker')
+    add_predict_args(p)
+    add_batch_args(p)
+    add_gunicorn_args(p)
+    p.set_defaults(func=bench_gunicorn)
+
+    p = sub.add_parser('microbatch', help='/predict with and without micro-batching')
+    p.add_argument('--threads', type=int, default=16)
+    p.add_argument('--requests', type=int, default=4000)
+    p.add_argument('--scorer', choices=['compiled', 'sklearn'], default='compiled')
+    p.add_argument('--max-wait-ms', type=float, nargs='+', default=[1, 2, 5])
+    p.add_argument('--max-batch', type=int, nargs='+', default=[64])
+    p.set_defaults(func=bench_microbatch)
+
+    p = sub.add_parser('startup', help='cold start of lean vs full serving mode')
+    add_startup_args(p)
+    p.set_defaults(func=bench_startup)
+
+    p = sub.add_parser('wire', help='/predict/batch payload size and CPU: JSON vs msgpack vs Arrow')
+    p.add_argument('--rows', type=int, default=10000)
+    p.add_argument('--repeats', type=int, default=20)
+    p.add_argument('--formats', nargs='+', default=['json', 'msgpack', 'arrow'])
+    p.set_defaults(func=bench_wire)
+
+    p = sub.add_parser('client', help='frontend risk page click-to-result: sequential vs pooled vs concurrent calls')
+    # Sync workers: threaded workers can hold a request on a busy keep-alive
+    # connection until --keep-alive expires, which swamps the comparison
+    p.add_argument('--workers', type=int, default=4)
+    p.add_argument('--worker-threads', type=int, default=1)
+    p.add_argument('--clicks', type=int, default=50)
+    p.add_argument('--sleep', type=float, default=1.0, help='spinner delay the old page added to every click (reported only)')
+    p.add_argument('--samples', type=int, default=100000, help='Monte Carlo samples per click')
+    p.set_defaults(func=bench_client)
+
+    p = sub.add_parser('all', help='predict, batch, startup and gunicorn')
+    add_predict_args(p)
+    add_batch_args(p)
+    add_gunicorn_args(p)
+    add_startup_args(p)
+    p.set_defaults(func=bench_all)
+
+    args = parser.parse_args()
+    report = dict(args.func(args), environment=environment())
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(text + '\n')
+
+
+if __name__ == '__main__':
+    main()
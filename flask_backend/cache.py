@@ -0,0 +1,105 @@
+import threading
+import time
+from collections import OrderedDict
+
+from features import INPUT_FEATURES
+
+
+def cache_key(features):
+    # Canonical 11-feature tuple: 50, 50.0 and "50" all map to the same key
+    return tuple(float(features[name]) for name in INPUT_FEATURES)
+
+
+class _Pending:
+    # A computation other requests with the same key can wait on
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error = None
+
+
+class PredictionCache:
+    # Thread-safe LRU cache with TTL expiry for prediction results.
+    #
+    # The model version is part of the key, so a hot swap never serves a stale
+    # result and the old version's entries simply age out through LRU/TTL.
+    # Concurrent misses on the same key are coalesced so the value is
+    # computed once and shared with every waiting request.
+
+    def __init__(self, max_size=4096, ttl=300.0, clock=time.monotonic):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._pending = {}
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get_or_compute(self, key, compute, version=None):
+        key = (version, key)
+        with self._lock:
+            # 1. Fresh hit
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires_at, value = entry
+                if expires_at > self._clock():
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._entries[key]
+                self.expirations += 1
+
+            # 2. Someone is already computing this key: wait for them
+            pending = self._pending.get(key)
+            leader = pending is None
+            if leader:
+                pending = self._pending[key] = _Pending()
+                self.misses += 1
+            else:
+                self.coalesced += 1
+        if not leader:
+            pending.done.wait()
+            if pending.error is not None:
+                raise pending.error
+            return pending.value
+
+        # 3. Compute outside the lock, then publish to waiters and the cache
+        try:
+            pending.value = compute()
+        except Exception as e:
+            pending.error = e
+            raise
+        finally:
+            with self._lock:
+                self._pending.pop(key, None)
+                if pending.error is None:
+                    self._entries[key] = (self._clock() + self.ttl, pending.value)
+                    self._entries.move_to_end(key)
+                    while len(self._entries) > self.max_size:
+                        self._entries.popitem(last=False)
+                        self.evictions += 1
+            pending.done.set()
+        return pending.value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses + self.coalesced
+            return {
+                'size': len(self._entries),
+                'max_size': self.max_size,
+                'ttl_seconds': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'coalesced': self.coalesced,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'hit_ratio': (self.hits + self.coalesced) / lookups if lookups else 0.0
+            }
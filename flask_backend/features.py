@@ -0,0 +1,108 @@
+import numpy as np
+
+# Raw fields the frontend sends for every patient
+# (age in years, gender 1/2, height in cm, weight in kg, BP in mmHg,
+#  cholesterol/gluc 1-3, smoke/alco/active 0/1)
+INPUT_FEATURES = ['age', 'gender', 'height', 'weight', 'ap_hi', 'ap_lo',
+                  'cholesterol', 'gluc', 'smoke', 'alco', 'active']
+
+# Column order the pipeline was trained on (see the notebook)
+EXPECTED_COLS = ['height', 'weight', 'age', 'ap_hi', 'ap_lo', 'bmi',
+                 'cholesterol', 'gluc', 'gender', 'smoke', 'alco', 'active']
+
+# cardio_train.csv stores age in days, the API works in years
+DAYS_PER_YEAR = 365.25
+
+# Position of every expected column inside INPUT_FEATURES (bmi is derived)
+_INPUT_INDEX = [INPUT_FEATURES.index(c) if c != 'bmi' else -1 for c in EXPECTED_COLS]
+_BMI_COL = EXPECTED_COLS.index('bmi')
+
+
+def extract_features(data):
+    # Pull the raw inputs out of a request body, raises KeyError if one is missing
+    return {name: data[name] for name in INPUT_FEATURES}
+
+
+def compute_bmi(height_cm, weight_kg):
+    # BMI = weight(kg) / (height(m))^2, works on scalars and arrays alike
+    height_m = height_cm / 100
+    return weight_kg / (height_m ** 2)
+
+
+def age_days_to_years(days):
+    # Completed years of age, matching what the risk form asks for
+    return np.floor(np.asarray(days, dtype=np.float64) / DAYS_PER_YEAR)
+
+
+def engineer(raw, out=None):
+    # Turn an (n, 11) array in INPUT_FEATURES order into the (n, 12) model
+    # matrix in EXPECTED_COLS order, deriving BMI for every row at once.
+    # `out` lets hot loops reuse a preallocated matrix.
+    raw = np.asarray(raw, dtype=np.float64)
+    X = np.empty((raw.shape[0], len(EXPECTED_COLS)), dtype=np.float64) if out is None else out
+    for j, src in enumerate(_INPUT_INDEX):
+        if src >= 0:
+            X[:, j] = raw[:, src]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        X[:, _BMI_COL] = compute_bmi(raw[:, INPUT_FEATURES.index('height')],
+                                     raw[:, INPUT_FEATURES.index('weight')])
+    return X
+
+
+def raw_to_matrix(raw):
+    # Like records_to_matrix for input that is already numeric (CSV, Arrow,
+    # msgpack columns). Returns (X, errors); NaN/inf rows are per-row errors.
+    X = engineer(raw)
+    errors = {int(i): 'Invalid or missing feature values'
+              for i in np.flatnonzero(~np.isfinite(X).all(axis=1))}
+    return X, errors
+
+
+def _record_error(record):
+    # Explain why a single record could not be converted
+    if not isinstance(record, dict):
+        return 'Patient record must be a JSON object'
+    for name in INPUT_FEATURES:
+        if name not in record:
+            return f"Missing required feature: '{name}'"
+    for name in INPUT_FEATURES:
+        value = record[name]
+        try:
+            if not np.isfinite(float(value)):
+                raise ValueError
+        except (TypeError, ValueError):
+            return f"Invalid value for feature '{name}': {value!r}"
+    if float(record['height']) <= 0:
+        return f"Invalid value for feature 'height': {record['height']!r}"
+    return 'Invalid feature values'
+
+
+def records_to_matrix(records):
+    # Convert a list of patient dicts into the model matrix.
+    # Returns (X, errors) where errors maps row index -> message; rows with
+    # an error are left as NaN in X and must not be scored.
+    n = len(records)
+    raw = np.full((n, len(INPUT_FEATURES)), np.nan)
+    errors = {}
+
+    # Fast path: every record is well formed, convert in one go
+    try:
+        raw[:] = [[rec[name] for name in INPUT_FEATURES] for rec in records]
+    except (KeyError, TypeError, ValueError):
+        # Slow path: find the offending rows one by one
+        raw[:] = np.nan
+        for i, rec in enumerate(records):
+            try:
+                raw[i] = [rec[name] for name in INPUT_FEATURES]
+            except (KeyError, TypeError, ValueError):
+                errors[i] = _record_error(rec)
+
+    X = engineer(raw)
+
+    # NaN/inf inputs (e.g. null values, height of 0) are per-row errors too
+    bad = ~np.isfinite(X).all(axis=1)
+    for i in np.flatnonzero(bad):
+        if i not in errors:
+            errors[int(i)] = _record_error(records[i])
+            X[i] = np.nan
+    return X, errors
@@ -0,0 +1,81 @@
+"""Clinical insight rules, evaluated for a whole batch at once.
+
+Every rule is a row of RULES: an insight code, whether all or any of its
+conditions must hold, and the conditions as (feature, operator, value) on
+the model matrix (EXPECTED_COLS, age in years, BMI derived). The engine
+compares every condition column against its threshold in one array
+operation per operator and combines the resulting boolean masks per rule,
+so the cost barely depends on the number of rows.
+
+Responses carry the codes; wording is left to the client.
+"""
+import numpy as np
+
+from features import EXPECTED_COLS
+
+RULES = [
+    # code                 combine  conditions
+    ('BMI_OBESE',          'all',   [('bmi', '>=', 30)]),
+    ('BMI_OVERWEIGHT',     'all',   [('bmi', '>=', 25), ('bmi', '<', 30)]),
+    ('BP_ABOVE_TARGET',    'any',   [('ap_hi', '>', 120), ('ap_lo', '>', 80)]),
+    ('CHOLESTEROL_HIGH',   'all',   [('cholesterol', '>', 1)]),
+    ('GLUCOSE_HIGH',       'all',   [('gluc', '>', 1)]),
+    ('SMOKER',             'all',   [('smoke', '==', 1)]),
+    ('ALCOHOL',            'all',   [('alco', '==', 1)]),
+    ('INACTIVE',           'all',   [('active', '==', 0)])
+]
+
+_OPS = {'>': np.greater, '>=': np.greater_equal, '<': np.less, '<=': np.less_equal, '==': np.equal}
+
+
+class RuleEngine:
+    # Compiles a rule table into column indices and thresholds per operator
+
+    def __init__(self, rules):
+        self.codes = [code for code, _, _ in rules]
+        conditions = [cond for _, _, conds in rules for cond in conds]
+        for name, op, _ in conditions:
+            if name not in EXPECTED_COLS or op not in _OPS:
+                raise ValueError(f'Invalid rule condition: {name} {op}')
+        # Conditions grouped by operator: (ufunc, columns, thresholds, positions)
+        self._groups = []
+        for op, ufunc in _OPS.items():
+            positions = [i for i, (_, o, _) in enumerate(conditions) if o == op]
+            if positions:
+                self._groups.append((ufunc, [EXPECTED_COLS.index(conditions[i][0]) for i in positions],
+                                     np.array([conditions[i][2] for i in positions], dtype=np.float64),
+                                     positions))
+        self._n_conditions = len(conditions)
+        # Rule -> slice of its conditions, and how they combine
+        self._rules, start = [], 0
+        for _, combine, conds in rules:
+            self._rules.append((np.logical_and if combine == 'all' else np.logical_or,
+                                slice(start, start + len(conds))))
+            start += len(conds)
+
+    def evaluate(self, X):
+        # (n, n_rules) boolean mask; rows with NaN features match nothing
+        X = np.atleast_2d(X)
+        held = np.empty((len(X), self._n_conditions), dtype=bool)
+        for ufunc, columns, thresholds, positions in self._groups:
+            held[:, positions] = ufunc(X[:, columns], thresholds)
+        mask = np.empty((len(X), len(self._rules)), dtype=bool)
+        for j, (combine, conditions) in enumerate(self._rules):
+            mask[:, j] = combine.reduce(held[:, conditions], axis=1)
+        return mask
+
+    def bits(self, mask):
+        # One integer per row, bit j set if rule j matched
+        return mask @ (1 << np.arange(len(self.codes), dtype=np.uint32))
+
+    def to_codes(self, mask):
+        # List of matching codes for every row
+        rows, rules = np.nonzero(mask)
+        out = [[] for _ in range(len(mask))]
+        codes = self.codes
+        for i, j in zip(rows.tolist(), rules.tolist()):
+            out[i].append(codes[j])
+        return out
+
+
+engine = RuleEngine(RULES)
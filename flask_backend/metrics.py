@@ -0,0 +1,362 @@
+"""Low-overhead request metrics in the Prometheus text format.
+
+Every worker keeps its histograms, counters and gauges in memory. With
+METRICS_DIR set, a background thread in every worker also writes a
+snapshot there once per flush interval, and /metrics sums the snapshots
+of all workers, so it
+reports the same totals whichever gunicorn worker answers the scrape.
+When a worker has exited, its counters and histograms are folded into
+retired.json (so totals never go backwards) and its snapshot and gauges
+are dropped; clear the directory when the service is (re)deployed.
+"""
+import bisect
+import fcntl
+import glob
+import json
+import os
+import tempfile
+import threading
+import time
+from threading import get_ident
+
+# Seconds; request stages range from a few microseconds to whole batches
+DEFAULT_BUCKETS = (0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005,
+                   0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+
+class _Histogram:
+    # Lock-free on the hot path: every thread counts into its own list and
+    # the lists are summed when a snapshot is taken
+    __slots__ = ('buckets', 'per_thread')
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.per_thread = {}
+
+    def observe(self, seconds):
+        values = self.per_thread.get(get_ident())
+        if values is None:
+            # One count per bucket plus +Inf, then the running sum
+            values = self.per_thread[get_ident()] = [0] * (len(self.buckets) + 1) + [0.0]
+        values[bisect.bisect_left(self.buckets, seconds)] += 1
+        values[-1] += seconds
+
+    @property
+    def values(self):
+        total = [0] * (len(self.buckets) + 1) + [0.0]
+        for values in list(self.per_thread.values()):
+            for i, v in enumerate(values):
+                total[i] += v
+        return total
+
+
+class _Counter:
+    # Per-thread like _Histogram
+    __slots__ = ('per_thread',)
+
+    def __init__(self):
+        self.per_thread = {}
+
+    def inc(self, value=1):
+        ident = get_ident()
+        self.per_thread[ident] = self.per_thread.get(ident, 0) + value
+
+    @property
+    def value(self):
+        return sum(list(self.per_thread.values()))
+
+
+class StageTimer:
+    # Records the time since the previous mark() under a stage name;
+    # finish() records the total and counts the request by status
+    __slots__ = ('metrics', 'endpoint', 'stages', 'start', 'last')
+
+    def __init__(self, metrics, endpoint, stages):
+        self.metrics = metrics
+        self.endpoint = endpoint
+        self.stages = stages
+        self.start = self.last = time.perf_counter()
+
+    def mark(self, stage):
+        now = time.perf_counter()
+        h = self.stages.get(stage)
+        if h is None:
+            h = self.stages[stage] = self.metrics.histogram(
+                'cardio_stage_seconds', (('endpoint', self.endpoint), ('stage', stage)))
+        h.observe(now - self.last)
+        self.last = now
+
+    def total(self):
+        return time.perf_counter() - self.start
+
+    def finish(self, status):
+        stages = self.stages
+        h = stages.get('__total__')
+        if h is None:
+            h = stages['__total__'] = self.metrics.histogram(
+                'cardio_request_duration_seconds', (('endpoint', self.endpoint),))
+        h.observe(self.total())
+        c = stages.get(status)
+        if c is None:
+            labels = (('endpoint', self.endpoint), ('status', str(status)))
+            c = stages[status] = (self.metrics.counter('cardio_requests_total', labels),
+                                  self.metrics.counter('cardio_request_errors_total', labels)
+                                  if status >= 400 else None)
+        c[0].inc()
+        if c[1] is not None:
+            c[1].inc()
+
+
+class _NullTimer:
+    __slots__ = ()
+
+    def mark(self, stage):
+        pass
+
+    def total(self):
+        return 0.0
+
+    def finish(self, status):
+        pass
+
+
+NULL_TIMER = _NullTimer()
+
+
+class Metrics:
+
+    HELP = {
+        'cardio_stage_seconds': ('histogram', 'Time spent in each stage of a prediction request'),
+        'cardio_request_duration_seconds': ('histogram', 'Total request handling time'),
+        'cardio_requests_total': ('counter', 'Requests handled, by endpoint and HTTP status'),
+        'cardio_request_errors_total': ('counter', 'Failed requests (400 missing/invalid feature, 500 other errors)'),
+    }
+
+    def __init__(self, enabled=True, directory=None, flush_seconds=1.0, buckets=DEFAULT_BUCKETS):
+        self.HELP = dict(self.HELP)
+        self.enabled = enabled
+        self.directory = directory
+        self.flush_seconds = flush_seconds
+        self.buckets = tuple(buckets)
+        self.collectors = []
+        self._lock = threading.Lock()
+        self._histograms = {}
+        self._stage_histograms = {}
+        self._counters = {}
+        self._totals = {}
+        self._gauges = {}
+        self._pid = None
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    # Recording ---------------------------------------------------------------
+
+    def timer(self, endpoint):
+        if not self.enabled:
+            return NULL_TIMER
+        stages = self._stage_histograms.get(endpoint)
+        if stages is None:
+            stages = self._stage_histograms[endpoint] = {}
+        return StageTimer(self, endpoint, stages)
+
+    def histogram(self, name, labels):
+        # Look the series up once and keep the object, observe() is then cheap
+        h = self._histograms.get((name, labels))
+        if h is None:
+            with self._lock:
+                h = self._histograms.setdefault((name, labels), _Histogram(self.buckets))
+        return h
+
+    def counter(self, name, labels):
+        c = self._counters.get((name, labels))
+        if c is None:
+            with self._lock:
+                c = self._counters.setdefault((name, labels), _Counter())
+        return c
+
+    def observe(self, name, labels, seconds):
+        self.histogram(name, labels).observe(seconds)
+
+    def inc(self, name, labels, value=1):
+        self.counter(name, labels).inc(value)
+
+    def set_counter(self, name, labels, value, help_text=None):
+        # For totals tracked elsewhere (e.g. cache hits), copied in on collect
+        self._totals[(name, labels)] = value
+        if help_text:
+            self.HELP.setdefault(name, ('counter', help_text))
+
+    def set_gauge(self, name, labels, value, help_text=None):
+        self._gauges[(name, labels)] = value
+        if help_text:
+            self.HELP.setdefault(name, ('gauge', help_text))
+
+    # Multi-worker snapshots ------------------------------------------------------
+
+    def snapshot(self):
+        # Gauges describe the present (e.g. which model is served), rebuild them
+        self._gauges = {}
+        for collect in self.collectors:
+            collect(self)
+        with self._lock:
+            return {
+                'pid': os.getpid(),
+                'buckets': list(self.buckets),
+                'histograms': [[n, list(l), list(h.values)] for (n, l), h in self._histograms.items()],
+                'counters': [[n, list(l), c.value] for (n, l), c in self._counters.items()] +
+                            [[n, list(l), v] for (n, l), v in self._totals.items()],
+                'gauges': [[n, list(l), v] for (n, l), v in self._gauges.items()],
+                'help': {n: list(v) for n, v in self.HELP.items()}
+            }
+
+    def ensure_flushing(self):
+        # Start the snapshot writer lazily, and again in every forked worker
+        if not self.directory or not self.enabled or self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid != os.getpid():
+                threading.Thread(target=self._flush_loop, daemon=True).start()
+                self._pid = os.getpid()
+
+    def _flush_loop(self):
+        while True:
+            time.sleep(self.flush_seconds)
+            try:
+                self.flush()
+            except OSError as e:
+                print(f"Warning: could not write metrics snapshot ({e})")
+
+    def flush(self):
+        path = os.path.join(self.directory, f'worker-{os.getpid()}.json')
+        fd, tmp = tempfile.mkstemp(prefix='.tmp-', dir=self.directory)
+        with os.fdopen(fd, 'w') as f:
+            json.dump(self.snapshot(), f)
+        os.replace(tmp, path)
+
+    def _snapshots(self):
+        # Snapshots of the live workers, plus the totals of the exited ones
+        if not self.directory:
+            return [self.snapshot()]
+        self.flush()
+        snapshots, dead = [], []
+        for path in glob.glob(os.path.join(self.directory, 'worker-*.json')):
+            snap = _read_json(path)
+            if snap is None:
+                continue
+            if _alive(snap['pid']):
+                snapshots.append(snap)
+            else:
+                dead.append(path)
+        if dead:
+            self._retire(dead)
+        retired = _read_json(os.path.join(self.directory, 'retired.json'))
+        return snapshots + ([retired] if retired else [])
+
+    def _retire(self, paths):
+        # Fold the snapshots of exited workers into retired.json and remove
+        # them. Locked, so concurrent scrapes in other workers count every
+        # snapshot exactly once.
+        with open(os.path.join(self.directory, '.retire.lock'), 'a') as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            dead = [(path, snap) for path, snap in ((p, _read_json(p)) for p in paths) if snap is not None]
+            if not dead:
+                return
+            retired_path = os.path.join(self.directory, 'retired.json')
+            snaps = [_read_json(retired_path) or {}] + [snap for _, snap in dead]
+            histograms, counters, _, help_ = self._merge(snaps)
+            retired = {
+                'pid': 'retired',
+                'buckets': list(self.buckets),
+                'histograms': [[n, [list(l) for l in labels], v] for (n, labels), v in histograms.items()],
+                'counters': [[n, [list(l) for l in labels], v] for (n, labels), v in counters.items()],
+                'gauges': [],
+                'help': {n: list(v) for n, v in help_.items()}
+            }
+            fd, tmp = tempfile.mkstemp(prefix='.tmp-', dir=self.directory)
+            with os.fdopen(fd, 'w') as f:
+                json.dump(retired, f)
+            os.replace(tmp, retired_path)
+            for path, _ in dead:
+                try:
+                    os.unlink(path)
+                except OSError:
+                    pass
+
+    def _merge(self, snapshots):
+        # Sum histograms and counters over snapshots; gauges stay per worker
+        histograms, counters, gauges, help_ = {}, {}, {}, dict(self.HELP)
+        for snap in snapshots:
+            help_.update({n: tuple(v) for n, v in snap.get('help', {}).items()})
+            if snap.get('buckets') != list(self.buckets):
+                continue
+            for name, labels, values in snap['histograms']:
+                key = (name, tuple(map(tuple, labels)))
+                acc = histograms.setdefault(key, [0] * len(values))
+                for i, v in enumerate(values):
+                    acc[i] += v
+            for name, labels, value in snap['counters']:
+                key = (name, tuple(map(tuple, labels)))
+                counters[key] = counters.get(key, 0) + value
+            for name, labels, value in snap['gauges']:
+                gauges[(name, tuple(map(tuple, labels)) + (('pid', str(snap['pid'])),))] = value
+        return histograms, counters, gauges, help_
+
+    # Exposition ----------------------------------------------------------------
+
+    def render(self):
+        histograms, counters, gauges, help_ = self._merge(self._snapshots())
+
+        lines = []
+        for name in sorted({n for n, _ in histograms}):
+            lines += _header(name, help_, 'histogram')
+            for (n, labels), values in sorted(histograms.items()):
+                if n != name:
+                    continue
+                cumulative = 0
+                for le, count in zip(self.buckets + (float('inf'),), values[:-1]):
+                    cumulative += count
+                    lines.append(f'{name}_bucket{_labels(labels + (("le", _le(le)),))} {cumulative}')
+                lines.append(f'{name}_sum{_labels(labels)} {values[-1]:.9g}')
+                lines.append(f'{name}_count{_labels(labels)} {cumulative}')
+        for kind, series in (('counter', counters), ('gauge', gauges)):
+            for name in sorted({n for n, _ in series}):
+                lines += _header(name, help_, kind)
+                for (n, labels), value in sorted(series.items()):
+                    if n == name:
+                        lines.append(f'{name}{_labels(labels)} {value:.9g}')
+        return '\n'.join(lines) + '\n'
+
+
+def _read_json(path):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _alive(pid):
+    # Whether a worker process still exists (on this host)
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except OSError:  # e.g. owned by another user
+        pass
+    return True
+
+
+def _header(name, help_, kind):
+    _, text = help_.get(name, (kind, name))
+    return [f'# HELP {name} {text}', f'# TYPE {name} {kind}']
+
+
+def _labels(labels):
+    if not labels:
+        return ''
+    inner = ','.join('{}="{}"'.format(k, str(v).replace('\\', '\\\\').replace('"', '\\"')) for k, v in labels)
+    return '{' + inner + '}'
+
+
+def _le(bound):
+    return '+Inf' if bound == float('inf') else f'{bound:g}'
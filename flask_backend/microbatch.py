@@ -0,0 +1,109 @@
+import os
+import queue
+import threading
+import time
+
+import numpy as np
+
+from features import EXPECTED_COLS
+
+
+class _Request:
+    __slots__ = ('scorer', 'row', 'done', 'result', 'error')
+
+    def __init__(self, scorer, row):
+        self.scorer = scorer
+        self.row = row
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class MicroBatcher:
+    # Coalesces concurrent single-row predictions into one vectorized call.
+    #
+    # Requests are queued; a background thread takes the first one, waits up
+    # to max_wait seconds (or until max_batch rows are queued), scores them
+    # together with scorer.risk() and hands every caller its own result.
+    # Each request carries the scorer it started with, so a model swap never
+    # changes the model an in-flight request is scored by.
+    # Meant for threaded workers (e.g. gunicorn --threads), where several
+    # requests are in flight in the same process at once.
+
+    def __init__(self, max_wait=0.002, max_batch=64):
+        self.max_wait = max_wait
+        self.max_batch = max_batch
+        self.batches = 0
+        self.rows = 0
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._pid = None
+
+    def _ensure_worker(self):
+        # Start the worker lazily and again after a fork (gunicorn preload)
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid != os.getpid():
+                self._queue = queue.Queue()
+                threading.Thread(target=self._run, daemon=True).start()
+                self._pid = os.getpid()
+
+    def submit(self, scorer, features):
+        # Score one feature dict, blocking until its batch has been scored
+        self._ensure_worker()
+        # Convert in the caller so a bad value only fails its own request
+        req = _Request(scorer, np.array([features[name] for name in EXPECTED_COLS], dtype=np.float64))
+        self._queue.put(req)
+        req.done.wait()
+        if req.error is not None:
+            raise req.error
+        return req.result
+
+    def _collect(self, q):
+        batch = [q.get()]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            try:
+                batch.append(q.get(timeout=remaining) if remaining > 0 else q.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        q = self._queue
+        X = np.empty((self.max_batch, len(EXPECTED_COLS)))
+        out = np.empty(self.max_batch)
+        while True:
+            batch = self._collect(q)
+            n = len(batch)
+            # Normally one group; two only while a model swap is in progress
+            groups = {}
+            for req in batch:
+                groups.setdefault(id(req.scorer), []).append(req)
+            for group in groups.values():
+                scorer, m = group[0].scorer, len(group)
+                try:
+                    for i, req in enumerate(group):
+                        X[i] = req.row
+                    risk = scorer.risk(X[:m], out=out[:m])
+                    labels = scorer.labels(risk)
+                    for req, label, p in zip(group, labels, risk.tolist()):
+                        req.result = (label, max(p, 1.0 - p))
+                except Exception as e:
+                    for req in group:
+                        req.error = e
+            self.batches += 1
+            self.rows += n
+            for req in batch:
+                req.done.set()
+
+    def stats(self):
+        return {
+            'max_wait_ms': self.max_wait * 1000,
+            'max_batch': self.max_batch,
+            'batches': self.batches,
+            'rows': self.rows,
+            'mean_batch_size': self.rows / self.batches if self.batches else 0.0
+        }
@@ -0,0 +1,161 @@
+"""Similar-patient lookup: a KD-tree over the reference patients.
+
+One index per model, next to its population reference:
+
+    model/neighbors/
+        header.json    standardization, sizes, index memory, model version
+        tree.joblib    sklearn KDTree over the standardized 12 features
+        features.npy   the reference patients (EXPECTED_COLS order, age in years)
+        outcomes.npy   their cardio outcome (0/1)
+
+Distances are Euclidean in the standardized space of the pipeline
+(EXPECTED_COLS including BMI, scaled with the model's scaler mean/scale;
+passthrough columns stay as they are), so a step of one standard deviation
+in any measurement counts the same. Models without a linear artifact
+standardize with the reference data's own statistics.
+
+The tree's arrays are memory-mapped when loaded, so gunicorn workers share
+them. Loading needs sklearn and happens on the first lookup, not at startup.
+
+    python neighbors.py model/ --data cardio_train.csv
+"""
+import json
+import os
+import threading
+import time
+
+import numpy as np
+
+from artifact import ArtifactError, builder_cli, load_header, swap_dir
+from features import EXPECTED_COLS
+
+FORMAT = 'cardio-neighbors'
+FORMAT_VERSION = 1
+LEAF_SIZE = 40
+
+# Upper bounds for a single request
+MAX_K = int(os.environ.get("SIMILAR_MAX_K", 50))
+MAX_QUERIES = int(os.environ.get("SIMILAR_MAX_QUERIES", 1000))
+
+
+def standardization(scorer, X):
+    # (mean, scale) of the pipeline's scaler, or of X for non-linear models
+    if hasattr(scorer, 'mean') and hasattr(scorer, 'scale'):
+        return np.asarray(scorer.mean, dtype=np.float64), np.asarray(scorer.scale, dtype=np.float64)
+    scale = X.std(axis=0)
+    scale[scale == 0] = 1.0
+    return X.mean(axis=0), scale
+
+
+def export_index(scorer, X, y, out_dir, model_version=None, extra=None):
+    # Build the KD-tree over the reference patients and write it to out_dir
+    import joblib
+    from sklearn.neighbors import KDTree
+
+    X = np.ascontiguousarray(X, dtype=np.float64)
+    mean, scale = standardization(scorer, X)
+    start = time.perf_counter()
+    tree = KDTree((X - mean) / scale, leaf_size=LEAF_SIZE)
+    build_seconds = time.perf_counter() - start
+    outcomes = np.asarray(y, dtype=np.int8)
+    header = {
+        'format': FORMAT,
+        'format_version': FORMAT_VERSION,
+        'model_version': model_version,
+        'feature_order': EXPECTED_COLS,
+        'mean': mean.tolist(),
+        'scale': scale.tolist(),
+        'rows': len(X),
+        'leaf_size': LEAF_SIZE,
+        'build_seconds': build_seconds,
+        'memory_bytes': {
+            'tree': int(sum(a.nbytes for a in tree.get_arrays())),
+            'features': int(X.nbytes),
+            'outcomes': int(outcomes.nbytes)
+        },
+        'created_at': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime())
+    }
+    header.update(extra or {})
+
+    def write(tmp):
+        joblib.dump(tree, os.path.join(tmp, 'tree.joblib'))
+        np.save(os.path.join(tmp, 'features.npy'), X)
+        np.save(os.path.join(tmp, 'outcomes.npy'), outcomes)
+        with open(os.path.join(tmp, 'header.json'), 'w') as f:
+            json.dump(header, f, indent=2)
+
+    swap_dir(out_dir, write, prefix='.neighbors-')
+    return header
+
+
+class NeighborIndex:
+    # A loaded index: query() takes an (n, 12) model matrix
+
+    def __init__(self, path):
+        import joblib
+        with open(os.path.join(path, 'header.json')) as f:
+            self.header = json.load(f)
+        self.mean = np.asarray(self.header['mean'])
+        self.scale = np.asarray(self.header['scale'])
+        self.tree = joblib.load(os.path.join(path, 'tree.joblib'), mmap_mode='r')
+        self.features = np.load(os.path.join(path, 'features.npy'), mmap_mode='r')
+        self.outcomes = np.load(os.path.join(path, 'outcomes.npy'), mmap_mode='r')
+
+    def query(self, X, k):
+        # Returns (distances, indices), both (n, k), nearest first
+        k = min(k, len(self.outcomes))
+        if not len(X):
+            # KDTree.query rejects an empty batch (e.g. every patient invalid)
+            return np.empty((0, k)), np.empty((0, k), dtype=np.intp)
+        return self.tree.query((X - self.mean) / self.scale, k=k)
+
+    def stats(self):
+        memory = self.header['memory_bytes']
+        return {'rows': self.header['rows'], 'leaf_size': self.header['leaf_size'],
+                'memory_bytes': dict(memory, total=sum(memory.values())),
+                'model_version': self.header['model_version']}
+
+
+class LazyIndex:
+    # Loads the index of a model directory on first use (sklearn is only
+    # imported then), once per process
+
+    def __init__(self, path):
+        self.path = path
+        self._index = None
+        self._lock = threading.Lock()
+
+    def get(self):
+        if self._index is None:
+            with self._lock:
+                if self._index is None:
+                    self._index = NeighborIndex(self.path)
+        return self._index
+
+
+def find_index(model_dir, model_version=None):
+    # LazyIndex for the model's neighbour index, or None if it has none (or
+    # it was built for a different model version)
+    path = os.path.join(model_dir, 'neighbors')
+    if not os.path.exists(os.path.join(path, 'header.json')):
+        return None
+    try:
+        load_header(os.path.join(path, 'header.json'), FORMAT, FORMAT_VERSION, model_version,
+                    feature_order=EXPECTED_COLS)
+    except ArtifactError as e:
+        print(f"Warning: neighbour index in {path} not used ({e}), similar-patient lookup disabled.")
+        return None
+    return LazyIndex(path)
+
+
+def main():
+    args, scorer, version, (X, y, _) = builder_cli(__doc__)
+    header = export_index(scorer, X, y, os.path.join(args.model_dir, 'neighbors'), version,
+                          extra={'data': os.path.abspath(args.data)})
+    memory = sum(header['memory_bytes'].values()) / (1 << 20)
+    print(f"Success! Neighbour index of {header['rows']} patients written for model {version} "
+          f"(built in {header['build_seconds']:.2f}s, {memory:.1f} MiB).")
+
+
+if __name__ == '__main__':
+    main()
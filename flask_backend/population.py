@@ -0,0 +1,150 @@
+"""Population percentiles: where a patient's risk falls in the reference data.
+
+train_model.py writes it into the model directory (this script rebuilds it
+for an existing model):
+
+    model/population/
+        header.json   age bands, stratum names and sizes, model version
+        keys.npy      sorted risk scores of every stratum, stratum i shifted by +i
+        offsets.npy   start of every stratum in keys.npy (plus the total)
+
+Strata are the whole population, every age band and every age band x
+gender. Each stratum's scores are sorted and shifted by its index, so all
+of them live in one ascending array: the percentile of any number of
+patients, each in its own strata, is a single np.searchsorted call and no
+dataset scan. Arrays are memory-mapped like the linear artifact.
+
+    python population.py model/ --data cardio_train.csv
+"""
+import json
+import os
+import time
+
+import numpy as np
+
+from artifact import ArtifactError, builder_cli, load_header, swap_dir
+from features import EXPECTED_COLS
+
+FORMAT = 'cardio-population'
+FORMAT_VERSION = 1
+
+# Age band edges in years: <40, 40-49, 50-59, 60+
+AGE_EDGES = [40, 50, 60]
+AGE_BANDS = ['<40', '40-49', '50-59', '60+']
+GENDERS = [1, 2]
+
+_AGE = EXPECTED_COLS.index('age')
+_GENDER = EXPECTED_COLS.index('gender')
+
+
+def strata(age, gender):
+    # Stratum ids (overall, age band, age band x gender) for every patient
+    band = np.digitize(age, AGE_EDGES)
+    sex = np.clip(np.rint(gender).astype(np.intp) - GENDERS[0], 0, len(GENDERS) - 1)
+    overall = np.zeros_like(band)
+    return overall, 1 + band, 1 + len(AGE_BANDS) + band * len(GENDERS) + sex
+
+
+def stratum_names():
+    return (['all'] + [f'age {b}' for b in AGE_BANDS] +
+            [f'age {b}, gender {g}' for b in AGE_BANDS for g in GENDERS])
+
+
+def build(risk, age, gender):
+    # Returns (keys, offsets) for the reference patients
+    risk = np.asarray(risk, dtype=np.float64)
+    ids = np.concatenate(strata(np.asarray(age), np.asarray(gender)))
+    keys = np.tile(risk, 3) + ids
+    keys.sort()
+    counts = np.bincount(ids, minlength=len(stratum_names()))
+    offsets = np.concatenate([[0], np.cumsum(counts)])
+    return keys, offsets
+
+
+class PopulationReference:
+
+    def __init__(self, keys, offsets, header):
+        self.keys = keys
+        self.offsets = np.asarray(offsets)
+        self.counts = np.diff(self.offsets)
+        self.header = header
+
+    def percentiles(self, risk, age, gender):
+        # Share (0-100) of the reference patients with a lower risk, per
+        # stratum: {'percentile', 'age_percentile', 'age_gender_percentile'}
+        # arrays (NaN where a stratum is empty), plus every patient's age band.
+        risk = np.asarray(risk, dtype=np.float64)
+        ids = np.stack(strata(np.asarray(age), np.asarray(gender)))
+        # One search for all three levels of every patient
+        below = np.searchsorted(self.keys, (risk + ids).ravel(), side='left').reshape(ids.shape) - self.offsets[ids]
+        count = self.counts[ids]
+        with np.errstate(invalid='ignore', divide='ignore'):
+            found = np.where(count > 0, 100.0 * np.clip(below, 0, count) / count, np.nan)
+        out = dict(zip(('percentile', 'age_percentile', 'age_gender_percentile'), found))
+        out['age_band'] = ids[1] - 1
+        return out
+
+    def describe(self, percentiles):
+        # JSON-ready population blocks, one per row of percentiles()
+        names = ('percentile', 'age_percentile', 'age_gender_percentile')
+        columns = [[None if v != v else v for v in np.round(percentiles[name], 1).tolist()] for name in names]
+        bands = [AGE_BANDS[b] for b in percentiles['age_band'].tolist()]
+        return [dict(zip(names, values), age_band=band) for *values, band in zip(*columns, bands)]
+
+
+def export_reference(risk, age, gender, out_dir, model_version=None, extra=None):
+    # Write the reference of a model to out_dir (usually <model_dir>/population)
+    keys, offsets = build(risk, age, gender)
+    header = {
+        'format': FORMAT,
+        'format_version': FORMAT_VERSION,
+        'model_version': model_version,
+        'age_edges': AGE_EDGES,
+        'age_bands': AGE_BANDS,
+        'genders': GENDERS,
+        'strata': dict(zip(stratum_names(), np.diff(offsets).tolist())),
+        'created_at': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime())
+    }
+    header.update(extra or {})
+
+    def write(tmp):
+        np.save(os.path.join(tmp, 'keys.npy'), keys)
+        np.save(os.path.join(tmp, 'offsets.npy'), offsets)
+        with open(os.path.join(tmp, 'header.json'), 'w') as f:
+            json.dump(header, f, indent=2)
+
+    swap_dir(out_dir, write, prefix='.population-')
+    return header
+
+
+def export_for_model(scorer, X, out_dir, model_version=None, extra=None):
+    # Score a cleaned (n, 12) model matrix and write it as the reference
+    return export_reference(scorer.risk(X), X[:, _AGE], X[:, _GENDER], out_dir, model_version, extra)
+
+
+def load_reference(model_dir, model_version=None):
+    # The model's population reference, or None if it has none (or it was
+    # built for a different model version)
+    path = os.path.join(model_dir, 'population')
+    if not os.path.exists(os.path.join(path, 'header.json')):
+        return None
+    try:
+        header = load_header(os.path.join(path, 'header.json'), FORMAT, FORMAT_VERSION, model_version,
+                             age_edges=AGE_EDGES, genders=GENDERS)
+    except ArtifactError as e:
+        print(f"Warning: population reference in {path} not used ({e}), percentiles disabled.")
+        return None
+    return PopulationReference(np.load(os.path.join(path, 'keys.npy'), mmap_mode='r'),
+                               np.load(os.path.join(path, 'offsets.npy')), header)
+
+
+def main():
+    args, scorer, version, (X, _, summary) = builder_cli(__doc__)
+    header = export_for_model(scorer, X, os.path.join(args.model_dir, 'population'), version,
+                              extra={'data': os.path.abspath(args.data)})
+    print(f"Success! Population reference of {summary['rows_used']} patients written for model {version}.")
+    print(', '.join(f'{name}: {n}' for name, n in header['strata'].items()))
+
+
+if __name__ == '__main__':
+    main()
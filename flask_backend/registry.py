@@ -0,0 +1,276 @@
+"""Versioned model registry with hot reload.
+
+Layout of the registry directory (MODEL_REGISTRY_DIR):
+
+    registry/
+        versions/<version>/   a model directory (linear/ artifact and/or model.pkl,
+                              optional population/ reference, neighbors/ index
+                              and aggregates.json)
+        CURRENT               name of the active version
+        HISTORY               activation log, one version per line (for rollback)
+
+CURRENT and HISTORY are replaced atomically, so a worker never reads a
+half-written pointer. Every worker runs a HotModel that watches CURRENT,
+loads a new version in the background and swaps it in with a single
+reference assignment; requests already running keep the model they started
+with.
+
+    python registry.py publish model/ --activate
+    python registry.py list
+    python registry.py activate <version>
+    python registry.py rollback
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from collections import namedtuple
+from contextlib import contextmanager
+
+from aggregates import load_aggregates
+from artifact import load_model
+from neighbors import find_index
+from population import load_reference
+
+try:
+    import fcntl
+except ImportError:  # Windows dev machines: single process, no locking needed
+    fcntl = None
+
+# What a worker is serving: the scorer plus where it came from, the model's
+# population reference for percentiles, its similar-patient index (a
+# LazyIndex) and its dataset aggregates (a dict), each None if the model has none
+ServedModel = namedtuple('ServedModel',
+                         'scorer version source load_seconds loaded_at population neighbors aggregates',
+                         defaults=(None, None, None))
+
+
+class RegistryError(Exception):
+    pass
+
+
+class ModelRegistry:
+
+    def __init__(self, root):
+        self.root = root
+        self.versions_dir = os.path.join(root, 'versions')
+
+    def path(self, version):
+        if not version or os.sep in version or version.startswith('.'):
+            raise RegistryError(f'Invalid version name: {version!r}')
+        return os.path.join(self.versions_dir, version)
+
+    def exists(self):
+        return os.path.isdir(self.versions_dir)
+
+    def current(self):
+        lines = _read_lines(os.path.join(self.root, 'CURRENT'))
+        return lines[-1] if lines else None
+
+    def history(self):
+        return _read_lines(os.path.join(self.root, 'HISTORY'))
+
+    def versions(self):
+        if not self.exists():
+            return []
+        current = self.current()
+        out = []
+        for name in sorted(os.listdir(self.versions_dir)):
+            path = os.path.join(self.versions_dir, name)
+            if name.startswith('.') or not os.path.isdir(path):
+                continue
+            out.append({
+                'version': name,
+                'format': 'artifact' if os.path.exists(os.path.join(path, 'linear', 'header.json')) else 'pickle',
+                'created_at': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime(os.path.getmtime(path))),
+                'active': name == current
+            })
+        return out
+
+    def publish(self, model_dir, activate=False):
+        # Copy a model directory into the registry under its content version
+        _, version = load_model(model_dir)
+        target = self.path(version)
+        if not os.path.exists(target):
+            os.makedirs(self.versions_dir, exist_ok=True)
+            tmp = tempfile.mkdtemp(prefix='.publish-', dir=self.versions_dir)
+            for name in ('linear', 'model.pkl', 'population', 'neighbors', 'aggregates.json'):
+                src = os.path.join(model_dir, name)
+                if os.path.isdir(src):
+                    shutil.copytree(src, os.path.join(tmp, name))
+                elif os.path.exists(src):
+                    shutil.copy2(src, os.path.join(tmp, name))
+            os.chmod(tmp, 0o755)
+            os.replace(tmp, target)
+        if activate:
+            self.activate(version)
+        return version
+
+    def activate(self, version):
+        # Point CURRENT at an existing version and record it for rollback
+        if not os.path.isdir(self.path(version)):
+            raise RegistryError(f'Unknown model version: {version}')
+        with self._locked():
+            history = self.history()
+            if not history or history[-1] != version:
+                history.append(version)
+            _write_atomic(os.path.join(self.root, 'HISTORY'), history)
+            _write_atomic(os.path.join(self.root, 'CURRENT'), [version])
+        return version
+
+    def rollback(self):
+        # Re-activate the version that was active before the current one
+        with self._locked():
+            history = self.history()
+            if len(history) < 2:
+                raise RegistryError('No previous version to roll back to')
+            history.pop()
+            _write_atomic(os.path.join(self.root, 'HISTORY'), history)
+            _write_atomic(os.path.join(self.root, 'CURRENT'), [history[-1]])
+        return history[-1]
+
+    @contextmanager
+    def _locked(self):
+        # Serialize pointer updates between workers / admin calls
+        os.makedirs(self.root, exist_ok=True)
+        with open(os.path.join(self.root, '.lock'), 'w') as f:
+            if fcntl:
+                fcntl.flock(f, fcntl.LOCK_EX)
+            yield
+
+
+class HotModel:
+    # The model a worker serves, reloaded in the background when the
+    # registry's CURRENT pointer changes. Falls back to fallback_dir (the
+    # bundled model/) when the registry is empty. A new model is passed to
+    # warm() before it is swapped in.
+
+    def __init__(self, registry, fallback_dir, poll_seconds=5.0, mode='lean', warm=None):
+        self.registry = registry
+        self.fallback_dir = fallback_dir
+        self.poll_seconds = poll_seconds
+        self.mode = mode
+        self.warm = warm
+        self.current = None
+        self.last_error = None
+        self._failed_source = None
+        self._wake = threading.Event()
+        self._lock = threading.Lock()
+        self._pid = None
+
+    def _target(self):
+        version = self.registry.current() if self.registry.exists() else None
+        if version:
+            return version, self.registry.path(version)
+        return None, self.fallback_dir
+
+    def load(self, path, version=None):
+        # Registry versions are reported by name, the bundled model by its content hash
+        start = time.perf_counter()
+        scorer, content_version = load_model(path, self.mode)
+        population = load_reference(path, content_version)
+        neighbors = find_index(path, content_version)
+        aggregates = load_aggregates(path, content_version)
+        served = ServedModel(scorer, version or content_version, path,
+                             time.perf_counter() - start, time.time(), population, neighbors, aggregates)
+        if self.warm:
+            self.warm(served)
+        return served
+
+    def swap(self, served):
+        # A single reference assignment: readers see the old or the new model
+        self.current = served
+
+    def refresh(self):
+        # Load and swap in the pointed-to version if it is not served yet
+        try:
+            version, path = self._target()
+        except RegistryError as e:
+            self.last_error = str(e)
+            return False
+        served = self.current
+        if (served is not None and served.source == path) or path == self._failed_source:
+            return False
+        try:
+            self.swap(self.load(path, version))
+            self.last_error = self._failed_source = None
+            return True
+        except Exception as e:
+            # Keep serving the previous model, don't retry until the pointer moves
+            self.last_error = f'{type(e).__name__}: {e}'
+            self._failed_source = path
+            print(f"Error: could not load model from {path} ({self.last_error})")
+            return False
+
+    def ensure_watching(self):
+        # Start the watcher lazily, and again in every forked worker
+        if self._pid == os.getpid() or self.poll_seconds <= 0:
+            return
+        with self._lock:
+            if self._pid != os.getpid():
+                self._wake = threading.Event()
+                threading.Thread(target=self._watch, daemon=True).start()
+                self._pid = os.getpid()
+
+    def poke(self):
+        # Ask the watcher to check the pointer now instead of at the next poll
+        self._wake.set()
+
+    def _watch(self):
+        while True:
+            self._wake.wait(self.poll_seconds)
+            self._wake.clear()
+            self.refresh()
+
+
+def _read_lines(path):
+    try:
+        with open(path) as f:
+            return [line.strip() for line in f if line.strip()]
+    except FileNotFoundError:
+        return []
+
+
+def _write_atomic(path, lines):
+    fd, tmp = tempfile.mkstemp(prefix='.tmp-', dir=os.path.dirname(path))
+    with os.fdopen(fd, 'w') as f:
+        f.write('\n'.join(lines) + '\n')
+    os.chmod(tmp, 0o644)
+    os.replace(tmp, path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--root', default=os.environ.get(
+        'MODEL_REGISTRY_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'model', 'registry')))
+    sub = parser.add_subparsers(dest='command', required=True)
+    p = sub.add_parser('publish')
+    p.add_argument('model_dir')
+    p.add_argument('--activate', action='store_true')
+    sub.add_parser('list')
+    p = sub.add_parser('activate')
+    p.add_argument('version')
+    sub.add_parser('rollback')
+    args = parser.parse_args()
+
+    registry = ModelRegistry(args.root)
+    try:
+        if args.command == 'publish':
+            print(registry.publish(args.model_dir, activate=args.activate))
+        elif args.command == 'list':
+            for v in registry.versions():
+                print(f"{'*' if v['active'] else ' '} {v['version']}  {v['format']}  {v['created_at']}")
+        elif args.command == 'activate':
+            print(registry.activate(args.version))
+        else:
+            print(registry.rollback())
+    except RegistryError as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,258 @@
+"""Score a large CSV or Parquet file offline across all CPU cores.
+
+    python score_file.py cardio_train.csv scored/ --workers 8
+    python score_file.py patients.parquet scored/ --age-unit years --merge scored.parquet
+
+The input is split into chunks (byte ranges of a CSV, row groups of a
+Parquet file). Every worker process loads the model once when it starts and
+then reads, scores and writes its chunks on its own, so only chunk
+descriptors travel between processes. Chunk i is written to
+out_dir/part-<i>.parquet (columns: id, prediction, probability, error),
+so the part files read back in input order. Scoring uses the same feature
+pipeline as app.py (BMI derivation, EXPECTED_COLS order).
+
+out_dir/_manifest.json records the chunking; running the same command again
+after a crash skips the chunks whose part file already exists.
+
+Needs pyarrow (and pandas for CSV input).
+"""
+import os
+
+# One BLAS/OpenMP thread per worker, the pool provides the parallelism
+for _var in ('OMP_NUM_THREADS', 'OPENBLAS_NUM_THREADS', 'MKL_NUM_THREADS'):
+    os.environ.setdefault(_var, '1')
+
+import argparse
+import glob
+import json
+import multiprocessing
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from artifact import load_model
+from features import INPUT_FEATURES, age_days_to_years, raw_to_matrix
+import streaming
+
+MANIFEST_VERSION = 2  # 2: first_row counted with an id column too
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+# Per-worker state, set once by init_worker()
+_scorer = None
+_job = None
+
+
+# Splitting ---------------------------------------------------------------------
+
+def plan_csv(path, sep, chunk_bytes):
+    # Cut the file into byte ranges that end on a line boundary. Also counts
+    # the data rows before every chunk, used as the id if there is no id column
+    # and for the line number of a line that cannot be read.
+    with open(path, 'rb') as f:
+        header_line = f.readline()
+        header = [c.strip().strip('"') for c in header_line.decode('utf-8-sig').split(sep)]
+        missing = [name for name in INPUT_FEATURES if name not in header]
+        if missing:
+            raise KeyError(', '.join(missing))
+        size = os.fstat(f.fileno()).st_size
+        chunks, start, row = [], len(header_line), 0
+        while start < size:
+            f.seek(min(start + chunk_bytes, size))
+            f.readline()
+            end = f.tell()
+            rows = 0
+            f.seek(start)
+            for block in iter(lambda: f.read(min(1 << 24, end - f.tell())), b''):
+                rows += block.count(b'\n')
+            chunks.append({'start': start, 'end': end, 'first_row': row})
+            start, row = end, row + rows
+    return {'format': 'csv', 'header': header, 'sep': sep, 'chunks': chunks}
+
+
+def plan_parquet(path, chunk_rows):
+    # Group row groups into chunks of about chunk_rows rows
+    meta = pq.ParquetFile(path).metadata
+    names = meta.schema.names
+    missing = [name for name in INPUT_FEATURES if name not in names]
+    if missing:
+        raise KeyError(', '.join(missing))
+    chunks, groups, rows, row = [], [], 0, 0
+    for i in range(meta.num_row_groups):
+        groups.append(i)
+        rows += meta.row_group(i).num_rows
+        if rows >= chunk_rows or i == meta.num_row_groups - 1:
+            chunks.append({'row_groups': groups, 'first_row': row})
+            groups, row, rows = [], row + rows, 0
+    return {'format': 'parquet', 'has_id': 'id' in names, 'chunks': chunks}
+
+
+# Workers -----------------------------------------------------------------------
+
+def init_worker(model_dir, mode, job):
+    # Runs once per process: load the model here instead of shipping it with every task
+    global _scorer, _job
+    _scorer, _ = load_model(model_dir, mode)
+    _job = job
+
+
+def read_chunk(chunk):
+    # Returns (ids, X, errors) for one chunk of the input
+    job = _job
+    if job['format'] == 'csv':
+        with open(job['input'], 'rb') as f:
+            f.seek(chunk['start'])
+            block = f.read(chunk['end'] - chunk['start'])
+        return next(streaming.parse_csv_blocks(
+            iter([block]), job['header'], job['sep'], job['age_in_days'], chunk['first_row']))
+
+    table = pq.ParquetFile(job['input']).read_row_groups(
+        chunk['row_groups'], columns=INPUT_FEATURES + (['id'] if job['has_id'] else []))
+    raw = np.column_stack([table.column(name).cast(pa.float64()).to_numpy() for name in INPUT_FEATURES])
+    if job['age_in_days']:
+        age = INPUT_FEATURES.index('age')
+        raw[:, age] = age_days_to_years(raw[:, age])
+    X, errors = raw_to_matrix(raw)
+    ids = table.column('id').to_pylist() if job['has_id'] else \
+        list(range(chunk['first_row'], chunk['first_row'] + len(raw)))
+    return ids, X, errors
+
+
+def score_chunk(index):
+    # Read, score and write chunk `index`; returns (index, rows, errors)
+    chunk = _job['chunks'][index]
+    ids, X, errors = read_chunk(chunk)
+    (ids, labels, probabilities, errors, _, _), = streaming.score_chunks(_scorer, [(ids, X, errors)], insights=False)
+
+    failed = np.zeros(len(ids), dtype=bool)
+    failed[list(errors)] = True
+    messages = [None] * len(ids)
+    for i, message in errors.items():
+        messages[i] = message
+    table = pa.table({
+        'id': pa.array(ids),
+        'prediction': pa.array(labels.astype(np.int8), mask=failed),
+        'probability': pa.array(probabilities, mask=failed),
+        'error': pa.array(messages, type=pa.string())
+    })
+    # Write next to the target and rename, a crash never leaves a partial part
+    fd, tmp = tempfile.mkstemp(prefix='.part-', dir=_job['out_dir'])
+    os.close(fd)
+    pq.write_table(table, tmp)
+    os.replace(tmp, part_path(_job['out_dir'], index))
+    return index, len(ids), len(errors)
+
+
+def part_path(out_dir, index):
+    return os.path.join(out_dir, f'part-{index:06d}.parquet')
+
+
+# Driver ------------------------------------------------------------------------
+
+def load_or_plan(args):
+    # Reuse the chunking of an interrupted run of the same input, or plan anew
+    stat = os.stat(args.input)
+    source = {'input': os.path.abspath(args.input), 'size': stat.st_size, 'mtime': stat.st_mtime,
+              'age_in_days': args.age_unit == 'days', 'chunk_bytes': args.chunk_bytes,
+              'chunk_rows': args.chunk_rows, 'sep': args.sep}
+    manifest_path = os.path.join(args.out_dir, '_manifest.json')
+    if os.path.exists(manifest_path):
+        with open(manifest_path) as f:
+            manifest = json.load(f)
+        if manifest.get('version') == MANIFEST_VERSION and manifest['source'] == source:
+            return manifest, True
+        if not args.overwrite:
+            raise ValueError(f'{args.out_dir} holds results of a different input or options '
+                             '(use --overwrite to start over)')
+        for path in glob.glob(os.path.join(args.out_dir, 'part-*.parquet')):
+            os.remove(path)
+
+    is_parquet = args.input.endswith(('.parquet', '.pq'))
+    plan = plan_parquet(args.input, args.chunk_rows) if is_parquet else \
+        plan_csv(args.input, args.sep, args.chunk_bytes)
+    manifest = dict(plan, version=MANIFEST_VERSION, source=source, complete=False)
+    write_manifest(args.out_dir, manifest)
+    return manifest, False
+
+
+def write_manifest(out_dir, manifest):
+    fd, tmp = tempfile.mkstemp(prefix='.manifest-', dir=out_dir)
+    with os.fdopen(fd, 'w') as f:
+        json.dump(manifest, f)
+    os.replace(tmp, os.path.join(out_dir, '_manifest.json'))
+
+
+def merge_parts(out_dir, n_chunks, target):
+    # Concatenate the part files in order, one part in memory at a time
+    writer = None
+    try:
+        for i in range(n_chunks):
+            table = pq.read_table(part_path(out_dir, i))
+            if writer is None:
+                writer = pq.ParquetWriter(target, table.schema)
+            writer.write_table(table)
+    finally:
+        if writer is not None:
+            writer.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('input', help='CSV (cardio_train.csv layout) or .parquet file')
+    parser.add_argument('out_dir', help='directory for the part files and manifest')
+    parser.add_argument('--workers', type=int, default=os.cpu_count())
+    parser.add_argument('--model-dir', default=os.path.join(HERE, 'model'))
+    parser.add_argument('--mode', choices=['lean', 'full'], default='lean')
+    parser.add_argument('--sep', default=';', help='CSV separator')
+    parser.add_argument('--age-unit', choices=['days', 'years'], default='days')
+    parser.add_argument('--chunk-bytes', type=int, default=16 << 20, help='CSV chunk size')
+    parser.add_argument('--chunk-rows', type=int, default=500000, help='Parquet chunk size (whole row groups)')
+    parser.add_argument('--merge', metavar='FILE', help='also write all results to a single Parquet file')
+    parser.add_argument('--overwrite', action='store_true', help='discard results of a different run in out_dir')
+    args = parser.parse_args()
+
+    os.makedirs(args.out_dir, exist_ok=True)
+    try:
+        manifest, resumed = load_or_plan(args)
+    except KeyError as e:
+        print(f"Error: missing required column(s): {e.args[0]}")
+        sys.exit(1)
+    except ValueError as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+
+    n_chunks = len(manifest['chunks'])
+    todo = [i for i in range(n_chunks) if not os.path.exists(part_path(args.out_dir, i))]
+    if resumed:
+        print(f"Resuming: {n_chunks - len(todo)} of {n_chunks} chunks already scored", file=sys.stderr)
+
+    job = dict(manifest, input=args.input, out_dir=args.out_dir,
+               age_in_days=manifest['source']['age_in_days'])
+    start = time.perf_counter()
+    rows = errors = done = 0
+    last_report = 0.0
+    if todo:
+        workers = max(1, min(args.workers, len(todo)))
+        with multiprocessing.Pool(workers, init_worker, (args.model_dir, args.mode, job)) as pool:
+            for _, n, bad in pool.imap_unordered(score_chunk, todo):
+                rows, errors, done = rows + n, errors + bad, done + 1
+                elapsed = time.perf_counter() - start
+                if elapsed - last_report >= 1.0 or done == len(todo):
+                    last_report = elapsed
+                    eta = elapsed / done * (len(todo) - done)
+                    print(f"[{done}/{len(todo)} chunks] {rows:,} rows, {rows / elapsed:,.0f} rows/s, "
+                          f"ETA {eta:.0f}s", file=sys.stderr)
+
+    write_manifest(args.out_dir, dict(manifest, complete=True))
+    elapsed = time.perf_counter() - start
+    if args.merge:
+        merge_parts(args.out_dir, n_chunks, args.merge)
+    print(f"Success! Scored {rows:,} rows ({errors:,} with errors) in {elapsed:.1f}s "
+          f"({rows / max(elapsed, 1e-9):,.0f} rows/s) -> {args.merge or args.out_dir}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,191 @@
+import math
+import threading
+
+import numpy as np
+
+from features import EXPECTED_COLS
+
+# Inputs used to check a compiled kernel against the original pipeline
+# (columns follow EXPECTED_COLS, ranges follow the frontend form bounds)
+_PARITY_LOW = [140, 40, 18, 80, 40, 10, 1, 1, 1, 0, 0, 0]
+_PARITY_HIGH = [200, 160, 100, 220, 140, 80, 3, 3, 2, 1, 1, 1]
+
+
+class UnsupportedModel(Exception):
+    # Raised when a pipeline cannot be compiled into a linear kernel
+    pass
+
+
+class LinearScorer:
+    # Compiled scaler + logistic regression pipeline.
+    #
+    # Every input column j (in EXPECTED_COLS order) is standardized as
+    # (x[j] - mean[j]) / scale[j] and weighted by coef[j]. Folding the scaler
+    # into the coefficients gives weights = coef / scale, so the decision
+    # value for a row is  x @ weights + bias,  one dot product and one
+    # sigmoid, no pandas and no sklearn.
+    kind = 'linear'
+
+    def __init__(self, mean, scale, coef, intercept, classes):
+        self.mean = np.asarray(mean, dtype=np.float64)
+        self.scale = np.asarray(scale, dtype=np.float64)
+        self.coef = np.asarray(coef, dtype=np.float64)
+        self.intercept = float(intercept)
+        self.classes = np.asarray(classes)
+        self.weights = np.ascontiguousarray(self.coef / self.scale)
+        self.bias = self.intercept - float(self.mean @ self.weights)
+        self._offsets = self.mean * self.weights
+        self._local = threading.local()
+
+    @classmethod
+    def from_pipeline(cls, model):
+        # 1. Split the pipeline into preprocessing steps and the classifier
+        steps = [step for _, step in model.steps] if hasattr(model, 'steps') else [model]
+        *transforms, clf = steps
+        if type(clf).__name__ != 'LogisticRegression' or len(clf.classes_) != 2:
+            raise UnsupportedModel(f'{type(clf).__name__} is not a binary logistic regression')
+
+        # 2. Track every column as  a * x[source] + b  through the steps
+        columns = [(j, 1.0, 0.0) for j in range(len(EXPECTED_COLS))]
+        for step in transforms:
+            columns = _fold_step(step, columns)
+
+        # 3. Map the coefficients back onto the input columns:
+        # a * x + b == (x - mean) / scale  with  scale = 1/a, mean = -b/a
+        coef = np.asarray(clf.coef_, dtype=np.float64).ravel()
+        if len(coef) != len(columns):
+            raise UnsupportedModel('Coefficient count does not match the pipeline output')
+        sources = [source for source, _, _ in columns]
+        if len(set(sources)) != len(sources) or any(a == 0 for _, a, _ in columns):
+            raise UnsupportedModel('Pipeline does not map input columns one-to-one')
+        n = len(EXPECTED_COLS)
+        mean, scale, folded = np.zeros(n), np.ones(n), np.zeros(n)
+        for (source, a, b), c in zip(columns, coef):
+            mean[source], scale[source], folded[source] = -b / a, 1.0 / a, c
+        intercept = float(np.ravel(clf.intercept_)[0])
+        return cls(mean, scale, folded, intercept, clf.classes_)
+
+    def decision_function(self, X, out=None):
+        out = np.dot(X, self.weights, out=out)
+        out += self.bias
+        return out
+
+    def risk(self, X, out=None):
+        # Probability of the positive class (classes[1]) for every row of X
+        out = self.decision_function(X, out=out)
+        np.negative(out, out=out)
+        with np.errstate(over='ignore'):
+            np.exp(out, out=out)
+        out += 1.0
+        np.reciprocal(out, out=out)
+        return out
+
+    def contributions(self, X, out=None):
+        # Share of every feature in the decision value, (x - mean) / scale * coef.
+        # A row's contributions plus the intercept add up to its log-odds.
+        out = np.multiply(X, self.weights, out=out)
+        out -= self._offsets
+        return out
+
+    def score_one(self, features):
+        # Score a single feature dict through a per-thread preallocated buffer
+        row = getattr(self._local, 'row', None)
+        if row is None:
+            row = self._local.row = np.empty(len(EXPECTED_COLS))
+        for j, name in enumerate(EXPECTED_COLS):
+            row[j] = features[name]
+        d = float(row @ self.weights) + self.bias
+        p = 1.0 / (1.0 + math.exp(-d)) if d >= 0 else 1.0 - 1.0 / (1.0 + math.exp(d))
+        return self.label(p), max(p, 1.0 - p)
+
+    def label(self, p):
+        return self.classes[1] if p > 0.5 else self.classes[0]
+
+    def labels(self, p):
+        return self.classes[(p > 0.5).astype(np.intp)]
+
+
+class SklearnScorer:
+    # Generic path for any fitted pipeline with predict_proba (needs pandas)
+    kind = 'sklearn'
+
+    def __init__(self, model):
+        self.model = model
+        self.classes = np.asarray(model.classes_)
+
+    def _frame(self, X):
+        import pandas as pd
+        return pd.DataFrame(np.atleast_2d(X), columns=EXPECTED_COLS)
+
+    def risk(self, X, out=None):
+        p = self.model.predict_proba(self._frame(X))[:, 1]
+        if out is not None:
+            out[:] = p
+            return out
+        return p
+
+    def score_one(self, features):
+        proba = self.model.predict_proba(self._frame([[features[c] for c in EXPECTED_COLS]]))[0]
+        return self.classes[proba.argmax()], proba.max()
+
+    def label(self, p):
+        return self.classes[1] if p > 0.5 else self.classes[0]
+
+    def labels(self, p):
+        return self.classes[(p > 0.5).astype(np.intp)]
+
+
+def top_features(contributions, k):
+    # Column indices of the k largest |contributions| in every row, largest first
+    k = min(k, contributions.shape[1])
+    if k <= 0:
+        return np.empty((len(contributions), 0), dtype=np.intp)
+    magnitude = np.abs(contributions)
+    idx = np.argpartition(-magnitude, k - 1, axis=1)[:, :k]
+    order = np.argsort(-np.take_along_axis(magnitude, idx, axis=1), axis=1, kind='stable')
+    return np.take_along_axis(idx, order, axis=1)
+
+
+def _fold_step(step, columns):
+    # Push the per-column affine form through one preprocessing step
+    name = type(step).__name__
+    if step == 'passthrough' or step is None:
+        return columns
+    if name == 'StandardScaler':
+        mean = step.mean_ if step.mean_ is not None else np.zeros(len(columns))
+        scale = step.scale_ if step.scale_ is not None else np.ones(len(columns))
+        return [(source, a / s, (b - m) / s)
+                for (source, a, b), m, s in zip(columns, mean, scale)]
+    if name == 'FunctionTransformer' and step.func is None:
+        return columns
+    if name == 'ColumnTransformer':
+        # transformers_ also lists the fitted remainder, if any
+        out = []
+        for _, transformer, cols in step.transformers_:
+            if transformer == 'drop' or cols is None or len(cols) == 0:
+                continue
+            indices = [EXPECTED_COLS.index(c) if isinstance(c, str) else int(c) for c in cols]
+            out.extend(_fold_step(transformer, [columns[i] for i in indices]))
+        return out
+    raise UnsupportedModel(f'Cannot compile preprocessing step {name}')
+
+
+def _check_parity(scorer, model, n=256, seed=0):
+    # Compare the compiled kernel with model.predict_proba on random inputs
+    import pandas as pd
+    rng = np.random.default_rng(seed)
+    X = rng.uniform(_PARITY_LOW, _PARITY_HIGH, size=(n, len(EXPECTED_COLS)))
+    expected = model.predict_proba(pd.DataFrame(X, columns=EXPECTED_COLS))[:, 1]
+    return np.allclose(scorer.risk(X), expected, rtol=1e-9, atol=1e-12)
+
+
+def compile_model(model):
+    # Compile linear pipelines into a LinearScorer, fall back to sklearn
+    try:
+        scorer = LinearScorer.from_pipeline(model)
+        if _check_parity(scorer, model):
+            return scorer
+        print("Warning: compiled kernel does not match the pipeline, using sklearn path.")
+    except (UnsupportedModel, AttributeError, ValueError) as e:
+        print(f"Info: using sklearn scoring path ({e}).")
+    return SklearnScorer(model)
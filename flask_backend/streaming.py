@@ -0,0 +1,265 @@
+import csv
+import io
+import json
+import queue
+import threading
+
+import numpy as np
+
+from features import EXPECTED_COLS, INPUT_FEATURES, age_days_to_years, raw_to_matrix, records_to_matrix
+from insights import engine as insight_engine
+from scoring import top_features
+
+# Default read size for streamed uploads (~25k rows of cardio_train.csv)
+CHUNK_BYTES = 1 << 20
+
+_DONE = object()
+
+
+def iter_blocks(stream, chunk_bytes=CHUNK_BYTES):
+    # Read a byte stream in fixed-size chunks and yield blocks that always
+    # end on a line boundary, so every block can be parsed on its own
+    carry = b''
+    while True:
+        data = stream.read(chunk_bytes)
+        if not data:
+            break
+        data = carry + data
+        cut = data.rfind(b'\n')
+        if cut < 0:
+            carry = data
+            continue
+        carry = data[cut + 1:]
+        yield data[:cut + 1]
+    if carry.strip():
+        yield carry
+
+
+def prefetch(iterable, depth=2):
+    # Run an iterator in a background thread, keeping at most `depth` items
+    # ready. Lets the caller score one chunk while the next one is read.
+    items = queue.Queue(maxsize=depth)
+    stop = threading.Event()
+
+    def worker():
+        try:
+            for item in iterable:
+                while not stop.is_set():
+                    try:
+                        items.put((item, None), timeout=0.1)
+                        break
+                    except queue.Full:
+                        pass
+                if stop.is_set():
+                    return
+            items.put((_DONE, None))
+        except Exception as e:
+            items.put((_DONE, e))
+
+    thread = threading.Thread(target=worker, daemon=True)
+    thread.start()
+    try:
+        while True:
+            item, error = items.get()
+            if error is not None:
+                raise error
+            if item is _DONE:
+                return
+            yield item
+    finally:
+        # Client went away or the consumer failed: let the reader exit
+        stop.set()
+
+
+def read_csv_header(blocks, sep):
+    # Split the header line off the first block (cardio_train.csv schema)
+    first = next(blocks, b'')
+    line, _, rest = first.partition(b'\n')
+    header = [c.strip().strip('"') for c in line.decode('utf-8-sig').split(sep)]
+    missing = [name for name in INPUT_FEATURES if name not in header]
+    if missing:
+        raise KeyError(', '.join(missing))
+
+    def remaining():
+        if rest.strip():
+            yield rest
+        yield from blocks
+    return header, remaining()
+
+
+def _field_count(line, sep):
+    try:
+        return len(next(csv.reader([line], delimiter=sep)))
+    except (csv.Error, StopIteration):
+        return 0
+
+
+def _read_csv_block(block, header, sep):
+    # Returns (n, rows, df, errors): n lines in the block, df the parsed
+    # lines and rows their positions, errors the blank and malformed lines
+    # (more fields than the header), which are left out of df but keep
+    # their place
+    import pandas as pd
+    n = block.count(b'\n') + (not block.endswith(b'\n'))
+    options = dict(sep=sep, header=None, names=header, index_col=False, on_bad_lines='error')
+    try:
+        df = pd.read_csv(io.BytesIO(block), **options)
+        if len(df) == n:
+            return n, np.arange(n), df, {}
+    except (pd.errors.ParserError, pd.errors.EmptyDataError):
+        pass
+    # Rare: check the block line by line
+    lines = [line.rstrip('\r') for line in block.decode('utf-8-sig').split('\n')[:n]]
+    errors, rows = {}, []
+    for i, line in enumerate(lines):
+        if not line.strip():
+            errors[i] = 'Empty line'
+        elif _field_count(line, sep) > len(header):
+            errors[i] = f'Malformed CSV line (more than {len(header)} fields)'
+        else:
+            rows.append(i)
+    if not rows:
+        return n, np.array(rows, dtype=np.intp), pd.DataFrame(columns=header), errors
+    df = pd.read_csv(io.StringIO('\n'.join(lines[i] for i in rows) + '\n'), **options)
+    return n, np.array(rows, dtype=np.intp), df, errors
+
+
+class LineError(str):
+    # Error of a line that could not be read as a patient (blank, malformed,
+    # invalid JSON). It has no id, so it carries its line number in the file.
+
+    def __new__(cls, line, message):
+        error = super().__new__(cls, f'Line {line}: {message}')
+        error.line = line
+        return error
+
+
+def parse_csv_blocks(blocks, header, sep, age_in_days=True, start=0):
+    # Yield (ids, X, errors) for every CSV block. Blank and malformed lines
+    # are error rows rather than dropped, so ids numbered by position (and
+    # score_file.py's first_row) stay aligned with the file; their id is
+    # None and their error a LineError. start is the position of the first
+    # row (the file's header is line 1).
+    import pandas as pd
+    for block in blocks:
+        n, rows, df, line_errors = _read_csv_block(block, header, sep)
+        raw = np.full((n, len(INPUT_FEATURES)), np.nan)
+        raw[rows] = np.column_stack([pd.to_numeric(df[name], errors='coerce').to_numpy(dtype=np.float64)
+                                     for name in INPUT_FEATURES])
+        if age_in_days:
+            raw[:, INPUT_FEATURES.index('age')] = age_days_to_years(raw[:, INPUT_FEATURES.index('age')])
+        X, errors = raw_to_matrix(raw)
+        errors.update((i, LineError(start + i + 2, message)) for i, message in line_errors.items())
+        ids = list(range(start, start + n))
+        for i in line_errors:
+            ids[i] = None
+        if 'id' in df:
+            for i, row_id in zip(rows.tolist(), df['id'].tolist()):
+                ids[i] = row_id
+        start += n
+        yield ids, X, errors
+
+
+def parse_ndjson_blocks(blocks, age_in_days=False):
+    # Yield (ids, X, errors) for every NDJSON block (one patient per line)
+    start = 0
+    for block in blocks:
+        # Blank lines are error rows too, rows are numbered like CSV lines
+        n = block.count(b'\n') + (not block.endswith(b'\n'))
+        records, errors = [], {}
+        for i, line in enumerate(block.split(b'\n')[:n]):
+            if not line.strip():
+                records.append(None)
+                errors[i] = LineError(start + i + 1, 'Empty line')
+                continue
+            try:
+                records.append(json.loads(line))
+            except ValueError:
+                records.append(None)
+                errors[i] = LineError(start + i + 1, 'Invalid JSON')
+        ids = [rec.get('id', start + i) if isinstance(rec, dict) else None
+               for i, rec in enumerate(records)]
+        if age_in_days:
+            records = [dict(rec, age=float(age_days_to_years(rec['age'])))
+                       if isinstance(rec, dict) and isinstance(rec.get('age'), (int, float)) else rec
+                       for rec in records]
+        X, row_errors = records_to_matrix(records)
+        row_errors.update(errors)
+        start += len(records)
+        yield ids, X, row_errors
+
+
+def score_chunks(scorer, chunks, top_k=None, insights=True):
+    # Score every parsed chunk with one vectorized call.
+    # Yields (ids, labels, probabilities, errors, drivers, insights) with one
+    # entry per row; drivers is None, or with top_k the (feature index,
+    # contribution) arrays of every row's top_k drivers (linear models only),
+    # insights the clinical insight codes of every row (None if not wanted).
+    for ids, X, errors in chunks:
+        labels = np.zeros(len(ids), dtype=np.int64)
+        probabilities = np.full(len(ids), np.nan)
+        valid = np.ones(len(ids), dtype=bool)
+        valid[list(errors)] = False
+        if valid.any():
+            risk = scorer.risk(X[valid])
+            labels[valid] = scorer.labels(risk)
+            probabilities[valid] = np.maximum(risk, 1.0 - risk)
+        drivers = None
+        if top_k:
+            contributions = scorer.contributions(X)
+            top = top_features(contributions, top_k)
+            drivers = (top, np.take_along_axis(contributions, top, axis=1))
+        codes = insight_engine.to_codes(insight_engine.evaluate(X)) if insights else None
+        yield ids, labels, probabilities, errors, drivers, codes
+
+
+def _drivers(drivers, i):
+    top, values = drivers
+    return [{'feature': EXPECTED_COLS[j], 'contribution': v} for j, v in zip(top[i].tolist(), values[i].tolist())]
+
+
+def format_ndjson(scored):
+    for ids, labels, probabilities, errors, drivers, insights in scored:
+        lines = []
+        for i, (row_id, label, p) in enumerate(zip(ids, labels.tolist(), probabilities.tolist())):
+            if isinstance(errors.get(i), LineError):
+                lines.append(json.dumps({'id': None, 'line': errors[i].line, 'error': errors[i],
+                                         'status': 'error'}))
+            elif i in errors:
+                lines.append(json.dumps({'id': row_id, 'error': errors[i], 'status': 'error'}))
+            elif drivers:
+                lines.append(json.dumps({'id': row_id, 'prediction': label, 'probability': p,
+                                         'insights': insights[i], 'top_drivers': _drivers(drivers, i)}))
+            else:
+                lines.append(json.dumps({'id': row_id, 'prediction': label, 'probability': p,
+                                         'insights': insights[i]}))
+        yield ('\n'.join(lines) + '\n').encode() if lines else b''
+
+
+def _csv_field(value, sep):
+    # Quote a field that contains the separator, a quote or a line break
+    text = str(value)
+    if sep in text or '"' in text or '\n' in text or '\r' in text:
+        return '"' + text.replace('"', '""') + '"'
+    return text
+
+
+def format_csv(scored, sep, top_k=None):
+    # insights lists the row's insight codes split by '|'. With top_k, a
+    # top_drivers column lists "feature:contribution" pairs the same way.
+    # Ids and error messages are quoted where needed; a line that could not be
+    # read has an empty id and its line number in the error.
+    yield sep.join(['id', 'prediction', 'probability', 'error', 'insights'] +
+                   (['top_drivers'] if top_k else [])).encode() + b'\n'
+    for ids, labels, probabilities, errors, drivers, insights in scored:
+        lines = []
+        for i, (row_id, label, p) in enumerate(zip(ids, labels.tolist(), probabilities.tolist())):
+            row_id = '' if row_id is None else _csv_field(row_id, sep)
+            if i in errors:
+                lines.append(f'{row_id}{sep}{sep}{sep}{_csv_field(errors[i], sep)}{sep}' + (sep if drivers else ''))
+            elif drivers:
+                pairs = '|'.join(f"{d['feature']}:{d['contribution']:.4f}" for d in _drivers(drivers, i))
+                lines.append(f"{row_id}{sep}{label}{sep}{p:.6f}{sep}{sep}{'|'.join(insights[i])}{sep}{pairs}")
+            else:
+                lines.append(f"{row_id}{sep}{label}{sep}{p:.6f}{sep}{sep}{'|'.join(insights[i])}")
+        yield ('\n'.join(lines) + '\n').encode() if lines else b''
@@ -0,0 +1,128 @@
+"""What-if sensitivity curves for /predict/sweep.
+
+A sweep moves one or more vitals of a base patient over a range of values
+while everything else stays fixed. All points are laid out as rows of one
+(n, 11) array in INPUT_FEATURES order, go through the usual feature
+engineering (so sweeping height or weight moves BMI too) and are scored
+in a single call:
+
+    {"patient": {...},
+     "sweep": [{"feature": "ap_hi", "start": 80, "stop": 220, "steps": 71},
+               {"feature": "weight"}],
+     "grid": ["ap_hi", "weight"]}
+
+Every swept feature gets its own 1-D curve. "grid" names two of them to
+also score their full 2-D grid (steps_a x steps_b points).
+"""
+import os
+
+import numpy as np
+
+from features import INPUT_FEATURES, engineer, records_to_matrix
+
+# Upper bound on scored points (curves + grid) per request
+MAX_POINTS = int(os.environ.get("SWEEP_MAX_POINTS", 40000))
+DEFAULT_STEPS = 50
+
+# Default range of every sweepable feature (age in years, BP in mmHg)
+RANGES = {
+    'age': (30, 70),
+    'height': (140, 200),
+    'weight': (40, 160),
+    'ap_hi': (80, 220),
+    'ap_lo': (50, 140),
+    'cholesterol': (1, 3),
+    'gluc': (1, 3),
+    'gender': (1, 2),
+    'smoke': (0, 1),
+    'alco': (0, 1),
+    'active': (0, 1)
+}
+# Categorical features always sweep all their levels
+_LEVELS = {'cholesterol', 'gluc', 'gender', 'smoke', 'alco', 'active'}
+
+
+class SweepError(ValueError):
+    pass
+
+
+def axis_values(spec):
+    # Values of one sweep spec: explicit "values", or start/stop/steps
+    if not isinstance(spec, dict) or spec.get('feature') not in RANGES:
+        raise SweepError(f"Each sweep needs a 'feature', one of: {', '.join(RANGES)}")
+    name = spec['feature']
+    try:
+        if 'values' in spec:
+            values = np.asarray(spec['values'], dtype=np.float64)
+        elif name in _LEVELS:
+            low, high = RANGES[name]
+            values = np.arange(low, high + 1, dtype=np.float64)
+        else:
+            low, high = RANGES[name]
+            steps = int(spec.get('steps', DEFAULT_STEPS))
+            if steps > MAX_POINTS:
+                raise SweepError(f"Sweep of '{name}' has more than {MAX_POINTS} steps")
+            values = np.linspace(float(spec.get('start', low)), float(spec.get('stop', high)), steps)
+    except SweepError:
+        raise
+    except (TypeError, ValueError):
+        raise SweepError(f"Invalid sweep range for '{name}'")
+    if values.ndim != 1 or not len(values) or not np.isfinite(values).all():
+        raise SweepError(f"Sweep of '{name}' needs at least one finite value")
+    if name == 'height' and (values <= 0).any():
+        raise SweepError("Sweep of 'height' must stay above 0")
+    return values
+
+
+def parse(body):
+    # Validate a request body. Returns (base, axes, grid) where base is the
+    # patient's raw (11,) row, axes maps feature -> values and grid is None
+    # or a pair of swept features.
+    if not isinstance(body, dict) or not isinstance(body.get('patient'), dict):
+        raise SweepError("Expected {'patient': {...}, 'sweep': [...]}")
+    _, errors = records_to_matrix([body['patient']])
+    if errors:
+        raise SweepError(errors[0])
+    base = np.array([body['patient'][name] for name in INPUT_FEATURES], dtype=np.float64)
+
+    specs = body.get('sweep')
+    if not isinstance(specs, list) or not specs:
+        raise SweepError("'sweep' must be a non-empty list of features to vary")
+    axes = {}
+    for spec in specs:
+        values = axis_values(spec)
+        if spec['feature'] in axes:
+            raise SweepError(f"'{spec['feature']}' is swept more than once")
+        axes[spec['feature']] = values
+
+    grid = body.get('grid')
+    if grid is not None:
+        if not isinstance(grid, list) or len(grid) != 2 or grid[0] == grid[1] or \
+                any(name not in axes for name in grid):
+            raise SweepError("'grid' must name two different swept features")
+    points = sum(len(v) for v in axes.values()) + (len(axes[grid[0]]) * len(axes[grid[1]]) if grid else 0)
+    if points > MAX_POINTS:
+        raise SweepError(f'Sweep has {points} points, the limit is {MAX_POINTS}')
+    return base, axes, grid
+
+
+def build(base, axes, grid=None):
+    # Lay out every point as one row: the base patient repeated, with the
+    # swept column(s) overwritten. Row 0 is the unchanged patient. Returns
+    # the (n, 12) model matrix and the row slices of every curve and the grid.
+    n_grid = len(axes[grid[0]]) * len(axes[grid[1]]) if grid else 0
+    raw = np.empty((1 + sum(len(v) for v in axes.values()) + n_grid, len(INPUT_FEATURES)))
+    raw[:] = base
+    slices, start = {}, 1
+    for name, values in axes.items():
+        raw[start:start + len(values), INPUT_FEATURES.index(name)] = values
+        slices[name] = slice(start, start + len(values))
+        start += len(values)
+    if grid:
+        # Row-major (len(y), len(x)): the x feature varies fastest
+        x, y = axes[grid[0]], axes[grid[1]]
+        block = raw[start:].reshape(len(y), len(x), -1)
+        block[:, :, INPUT_FEATURES.index(grid[0])] = x[None, :]
+        block[:, :, INPUT_FEATURES.index(grid[1])] = y[:, None]
+        slices['grid'] = slice(start, start + n_grid)
+    return engineer(raw), slices
@@ -0,0 +1,54 @@
+import json
+import os
+
+import pytest
+
+from artifact import ArtifactError, load_header, swap_dir
+
+
+def write_file(name, text):
+    def write(tmp):
+        with open(os.path.join(tmp, name), 'w') as f:
+            f.write(text)
+    return write
+
+
+def test_swap_dir_replaces_and_cleans_up(tmp_path):
+    out = tmp_path / 'population'
+    swap_dir(str(out), write_file('a.txt', 'old'))
+    swap_dir(str(out), write_file('b.txt', 'new'))
+    assert sorted(os.listdir(out)) == ['b.txt']
+    assert sorted(os.listdir(tmp_path)) == ['population']
+
+
+def test_swap_dir_keeps_previous_on_failure(tmp_path):
+    out = tmp_path / 'population'
+    swap_dir(str(out), write_file('a.txt', 'old'))
+
+    def broken(tmp):
+        write_file('b.txt', 'half')(tmp)
+        raise OSError('disk full')
+
+    with pytest.raises(OSError):
+        swap_dir(str(out), broken)
+    assert sorted(os.listdir(out)) == ['a.txt']
+    assert sorted(os.listdir(tmp_path)) == ['population']
+
+
+@pytest.mark.parametrize('header, message', [
+    ({'format': 'other', 'format_version': 1}, 'Unsupported format'),
+    ({'format': 'cardio-test', 'format_version': 2}, 'Unsupported format'),
+    ({'format': 'cardio-test', 'format_version': 1, 'genders': [2]}, 'genders'),
+    ({'format': 'cardio-test', 'format_version': 1, 'genders': [1, 2], 'model_version': 'abc'}, 'Built for model abc'),
+])
+def test_load_header_rejects(tmp_path, header, message):
+    path = tmp_path / 'header.json'
+    path.write_text(json.dumps(header))
+    with pytest.raises(ArtifactError, match=message):
+        load_header(str(path), 'cardio-test', 1, 'def', genders=[1, 2])
+
+
+def test_load_header_accepts(tmp_path):
+    path = tmp_path / 'header.json'
+    path.write_text(json.dumps({'format': 'cardio-test', 'format_version': 1, 'model_version': None}))
+    assert load_header(str(path), 'cardio-test', 1, 'def')['format'] == 'cardio-test'
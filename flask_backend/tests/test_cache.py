@@ -0,0 +1,88 @@
+import threading
+
+import pytest
+
+from cache import PredictionCache, cache_key
+
+
+class Clock:
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_hit_after_miss():
+    cache, calls = PredictionCache(), []
+    for _ in range(3):
+        assert cache.get_or_compute('k', lambda: calls.append(1) or 'v', version='a') == 'v'
+    assert len(calls) == 1
+    assert (cache.hits, cache.misses) == (2, 1)
+
+
+def test_keys_are_canonical():
+    base = {'age': 50, 'gender': 2, 'height': 170, 'weight': 80, 'ap_hi': 130, 'ap_lo': 85,
+            'cholesterol': 1, 'gluc': 1, 'smoke': 0, 'alco': 0, 'active': 1}
+    assert cache_key(base) == cache_key(dict(base, age=50.0)) == cache_key(dict(base, age='50'))
+
+
+def test_entries_expire():
+    clock = Clock()
+    cache = PredictionCache(ttl=10, clock=clock)
+    cache.get_or_compute('k', lambda: 1)
+    clock.now = 9.9
+    assert cache.get_or_compute('k', lambda: 2) == 1
+    clock.now = 10.0
+    assert cache.get_or_compute('k', lambda: 3) == 3
+    assert cache.expirations == 1
+
+
+def test_model_version_is_part_of_the_key():
+    cache = PredictionCache()
+    cache.get_or_compute('k', lambda: 'old', version='a')
+    assert cache.get_or_compute('k', lambda: 'new', version='b') == 'new'
+    # Requests still on the old model during a hot swap keep their entries
+    assert cache.get_or_compute('k', lambda: 'recomputed', version='a') == 'old'
+    assert cache.stats()['size'] == 2
+
+
+def test_lru_eviction():
+    cache = PredictionCache(max_size=2)
+    for key in 'abc':
+        cache.get_or_compute(key, lambda: key)
+    assert cache.evictions == 1
+    assert cache.get_or_compute('a', lambda: 'recomputed') == 'recomputed'
+
+
+def test_errors_are_not_cached():
+    cache = PredictionCache()
+
+    def fail():
+        raise ValueError('bad')
+
+    with pytest.raises(ValueError):
+        cache.get_or_compute('k', fail)
+    assert cache.get_or_compute('k', lambda: 'ok') == 'ok'
+
+
+def test_concurrent_misses_are_coalesced():
+    cache, release, calls = PredictionCache(), threading.Event(), []
+
+    def slow():
+        calls.append(1)
+        release.wait(5)
+        return 'v'
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.get_or_compute('k', slow))) for _ in range(4)]
+    for t in threads:
+        t.start()
+    while cache.stats()['coalesced'] < 3:
+        pass
+    release.set()
+    for t in threads:
+        t.join()
+    assert results == ['v'] * 4
+    assert len(calls) == 1
@@ -0,0 +1,31 @@
+import json
+import os
+import subprocess
+import sys
+
+from metrics import Metrics
+
+
+def dead_pid():
+    proc = subprocess.Popen([sys.executable, '-c', 'pass'])
+    proc.wait()
+    return proc.pid
+
+
+def test_exited_workers_are_retired(tmp_path):
+    metrics = Metrics(directory=str(tmp_path))
+    metrics.inc('cardio_requests_total', (('endpoint', 'predict'), ('status', '200')), 3)
+    metrics.collectors.append(lambda m: m.set_gauge('cardio_model_info', (('version', 'a'),), 1))
+
+    # A snapshot left behind by an exited worker: 2 requests and a gauge
+    snap = dict(metrics.snapshot(), pid=dead_pid())
+    (tmp_path / f"worker-{snap['pid']}.json").write_text(json.dumps(snap | {
+        'counters': [['cardio_requests_total', [['endpoint', 'predict'], ['status', '200']], 2]]}))
+
+    for _ in range(2):
+        text = metrics.render()
+        assert 'cardio_requests_total{endpoint="predict",status="200"} 5' in text
+        assert text.count('cardio_model_info{') == 1
+        assert f'pid="{os.getpid()}"' in text
+    assert sorted(p for p in os.listdir(tmp_path) if not p.startswith('.')) == \
+        ['retired.json', f'worker-{os.getpid()}.json']
@@ -0,0 +1,64 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from app import MODEL_DIR
+from artifact import export_artifact, load_artifact, load_pickle
+from features import EXPECTED_COLS, records_to_matrix
+from scoring import LinearScorer, SklearnScorer, compile_model, top_features
+
+
+def random_patients(n, seed=0):
+    rng = np.random.default_rng(seed)
+    return [{'age': rng.uniform(30, 65), 'gender': rng.integers(1, 3), 'height': rng.uniform(145, 195),
+             'weight': rng.uniform(45, 140), 'ap_hi': rng.uniform(90, 200), 'ap_lo': rng.uniform(55, 120),
+             'cholesterol': rng.integers(1, 4), 'gluc': rng.integers(1, 4), 'smoke': rng.integers(0, 2),
+             'alco': rng.integers(0, 2), 'active': rng.integers(0, 2)} for _ in range(n)]
+
+
+@pytest.fixture(scope='module')
+def pipeline():
+    model, _ = load_pickle(f'{MODEL_DIR}/model.pkl')
+    return model
+
+
+@pytest.fixture(scope='module')
+def X():
+    X, errors = records_to_matrix(random_patients(500))
+    assert not errors
+    return X
+
+
+def test_linear_scorer_matches_pipeline(pipeline, X):
+    scorer = compile_model(pipeline)
+    assert isinstance(scorer, LinearScorer)
+    frame = pd.DataFrame(X, columns=EXPECTED_COLS)
+    np.testing.assert_allclose(scorer.risk(X), pipeline.predict_proba(frame)[:, 1], rtol=1e-9, atol=1e-12)
+    np.testing.assert_array_equal(scorer.labels(scorer.risk(X)), pipeline.predict(frame))
+    label, p = scorer.score_one(dict(zip(EXPECTED_COLS, X[0])))
+    assert label == pipeline.predict(frame[:1])[0]
+    assert p == pytest.approx(pipeline.predict_proba(frame[:1]).max())
+
+
+def test_contributions_add_up_to_the_decision(pipeline, X):
+    scorer = compile_model(pipeline)
+    contributions = scorer.contributions(X)
+    np.testing.assert_allclose(contributions.sum(axis=1) + scorer.intercept, scorer.decision_function(X))
+    top = top_features(contributions, 3)
+    assert (np.abs(np.take_along_axis(contributions, top, axis=1))[:, 0] == np.abs(contributions).max(axis=1)).all()
+
+
+def test_artifact_round_trip(pipeline, X, tmp_path):
+    scorer = compile_model(pipeline)
+    export_artifact(scorer, str(tmp_path / 'linear'), model_version='v1')
+    loaded, header = load_artifact(str(tmp_path / 'linear'))
+    assert header['model_version'] == 'v1'
+    np.testing.assert_array_equal(loaded.risk(X), scorer.risk(X))
+
+
+def test_non_linear_models_use_sklearn(X):
+    from sklearn.neighbors import KNeighborsClassifier
+    model = KNeighborsClassifier(5).fit(pd.DataFrame(X, columns=EXPECTED_COLS), (X[:, 3] > np.median(X[:, 3])).astype(int))
+    scorer = compile_model(model)
+    assert isinstance(scorer, SklearnScorer)
+    np.testing.assert_array_equal(scorer.risk(X), model.predict_proba(pd.DataFrame(X, columns=EXPECTED_COLS))[:, 1])
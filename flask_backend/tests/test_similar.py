@@ -0,0 +1,47 @@
+import numpy as np
+import pytest
+
+import app as backend
+from features import records_to_matrix
+from neighbors import LazyIndex, export_index
+
+PATIENT = {'age': 50, 'gender': 2, 'height': 170, 'weight': 80, 'ap_hi': 130, 'ap_lo': 85,
+           'cholesterol': 1, 'gluc': 1, 'smoke': 0, 'alco': 0, 'active': 1}
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    # The served model with a small neighbour index of jittered copies of PATIENT
+    served = backend.hot_model.current
+    rng = np.random.default_rng(0)
+    X, _ = records_to_matrix([dict(PATIENT, weight=PATIENT['weight'] + d) for d in rng.normal(0, 5, 50)])
+    export_index(served.scorer, X, rng.integers(0, 2, 50), str(tmp_path / 'neighbors'), served.version)
+    monkeypatch.setattr(backend.hot_model, 'current', served._replace(neighbors=LazyIndex(str(tmp_path / 'neighbors'))))
+    return backend.app.test_client()
+
+
+def test_single_patient(client):
+    response = client.post('/similar', json=dict(PATIENT, k=5))
+    assert response.status_code == 200
+    assert len(response.get_json()['neighbors']) == 5
+
+
+def test_invalid_single_patient_is_a_bad_request(client):
+    response = client.post('/similar', json=dict(PATIENT, weight='heavy'))
+    assert response.status_code == 400
+    assert 'weight' in response.get_json()['error']
+
+
+def test_invalid_patient_in_a_list_is_a_row_error(client):
+    response = client.post('/similar', json={'patients': [PATIENT, dict(PATIENT, weight='heavy')], 'k': 3})
+    assert response.status_code == 200
+    body = response.get_json()
+    assert [r['status'] for r in body['results']] == ['success', 'error']
+
+
+def test_list_without_valid_patients_reports_row_errors(client):
+    response = client.post('/similar', json={'patients': [{'age': 'x'}, dict(PATIENT, weight='heavy')], 'k': 3})
+    assert response.status_code == 200
+    body = response.get_json()
+    assert [r['status'] for r in body['results']] == ['error', 'error']
+    assert body['errors'] == 2
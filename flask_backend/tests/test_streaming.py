@@ -0,0 +1,74 @@
+import csv
+import io
+import json
+
+import numpy as np
+import pytest
+
+import streaming
+from app import app
+
+HEADER = 'id;age;gender;height;weight;ap_hi;ap_lo;cholesterol;gluc;smoke;alco;active;cardio'
+GOOD = '{};18393;2;168;62;110;80;1;1;0;0;1;0'
+
+
+@pytest.fixture
+def client():
+    return app.test_client()
+
+
+def upload(lines):
+    return '\n'.join(lines).encode() + b'\n'
+
+
+def test_bad_lines_are_error_rows_in_place():
+    lines = [GOOD.format(1), GOOD.format(2) + ';99', '', GOOD.format(3), '4;x;1;165;64;130;70;3;1;0;0;0;1']
+    (ids, X, errors), = streaming.parse_csv_blocks(iter([upload(lines)]), HEADER.split(';'), ';')
+    assert ids == [1, None, None, 3, 4]
+    assert sorted(errors) == [1, 2, 4]
+    # Lines after the header: the first data row is line 2
+    assert errors[1] == 'Line 3: Malformed CSV line (more than 13 fields)'
+    assert (errors[2], errors[2].line) == ('Line 4: Empty line', 4)
+    assert np.isfinite(X[[0, 3]]).all()
+
+
+def test_positions_without_id_column_follow_lines():
+    header = HEADER.split(';')[1:]
+    good = GOOD.split(';', 1)[1]
+    blocks = [upload([good, good + ';1', good]), upload(['', good])]
+    ids = [i for block_ids, _, _ in streaming.parse_csv_blocks(iter(blocks), header, ';') for i in block_ids]
+    assert ids == [0, None, 2, None, 4]
+
+
+def test_stream_reports_every_row(client):
+    body = upload([HEADER, GOOD.format(1), GOOD.format(2) + ';99', GOOD.format(3)])
+    response = client.post('/predict/stream', data=body, content_type='text/csv')
+    rows = [json.loads(line) for line in response.data.decode().splitlines()]
+    assert [row['id'] for row in rows] == [1, None, 3]
+    assert [row.get('status') for row in rows] == [None, 'error', None]
+    assert rows[1]['line'] == 3
+
+
+def test_csv_output_quotes_errors():
+    scored = [([1, 'a,b'], np.zeros(2, dtype=np.int64), np.zeros(2), {0: 'Bad "value", here'}, None, [[], []])]
+    out = b''.join(streaming.format_csv(scored, ',')).decode()
+    rows = list(csv.reader(io.StringIO(out)))
+    assert rows[1] == ['1', '', '', 'Bad "value", here', '']
+    assert rows[2][0] == 'a,b'
+
+
+def test_csv_output_leaves_unread_line_id_empty():
+    scored = [([None], np.zeros(1, dtype=np.int64), np.zeros(1), {0: streaming.LineError(7, 'Empty line')},
+               None, [[]])]
+    out = b''.join(streaming.format_csv(scored, ',')).decode()
+    assert out.splitlines()[1] == ',,,Line 7: Empty line,'
+
+
+def test_ndjson_blank_lines_are_error_rows():
+    record = json.dumps({'age': 50, 'gender': 2, 'height': 168, 'weight': 62, 'ap_hi': 110, 'ap_lo': 80,
+                         'cholesterol': 1, 'gluc': 1, 'smoke': 0, 'alco': 0, 'active': 1})
+    blocks = [upload([record, '', '{bad']), upload([record])]
+    chunks = list(streaming.parse_ndjson_blocks(iter(blocks)))
+    assert [ids for ids, _, _ in chunks] == [[0, None, None], [3]]
+    errors = chunks[0][2]
+    assert (errors[1], errors[2]) == ('Line 2: Empty line', 'Line 3: Invalid JSON')
@@ -0,0 +1,21 @@
+import pytest
+
+import sweep
+
+PATIENT = {'age': 50, 'gender': 2, 'height': 170, 'weight': 80, 'ap_hi': 130, 'ap_lo': 85,
+           'cholesterol': 1, 'gluc': 1, 'smoke': 0, 'alco': 0, 'active': 1}
+
+
+def test_duplicate_feature_is_rejected():
+    body = {'patient': PATIENT, 'sweep': [{'feature': 'age', 'start': 18, 'stop': 100, 'steps': 83},
+                                          {'feature': 'age'}]}
+    with pytest.raises(sweep.SweepError, match="'age' is swept more than once"):
+        sweep.parse(body)
+
+
+def test_curves_and_grid_layout():
+    body = {'patient': PATIENT, 'grid': ['ap_hi', 'weight'],
+            'sweep': [{'feature': 'ap_hi', 'steps': 3}, {'feature': 'weight', 'steps': 4}, {'feature': 'smoke'}]}
+    base, axes, grid = sweep.parse(body)
+    assert [len(v) for v in axes.values()] == [3, 4, 2]
+    assert grid == ['ap_hi', 'weight']
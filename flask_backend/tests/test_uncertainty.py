@@ -0,0 +1,20 @@
+import numpy as np
+
+import uncertainty
+from app import MODEL_DIR
+from artifact import load_model
+
+PATIENT = np.array([50, 2, 170, 80, 130, 85, 1, 1, 0, 0, 1], dtype=np.float64)
+
+
+def test_large_requests_do_not_keep_buffers(monkeypatch):
+    monkeypatch.setattr(uncertainty, 'BUFFER_SAMPLES', 1000)
+    scorer, _ = load_model(MODEL_DIR)
+    noise = uncertainty.parse_noise(uncertainty.DEFAULT_NOISE)
+    mc = uncertainty.MonteCarlo()
+    small = mc.sample(scorer, PATIENT, noise, 500, seed=1).copy()
+    assert len(mc._local.raw) == 500
+    assert len(mc.sample(scorer, PATIENT, noise, 5000, seed=1)) == 5000
+    assert len(mc._local.raw) == 500
+    # Seeded draws do not depend on the buffers
+    np.testing.assert_array_equal(mc.sample(scorer, PATIENT, noise, 500, seed=1), small)
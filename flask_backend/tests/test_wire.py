@@ -0,0 +1,80 @@
+import numpy as np
+import pyarrow as pa
+import msgpack
+import pytest
+
+import wire
+from app import app
+from features import INPUT_FEATURES
+
+PATIENT = {'age': 50, 'gender': 2, 'height': 170, 'weight': 80, 'ap_hi': 130, 'ap_lo': 85,
+           'cholesterol': 1, 'gluc': 1, 'smoke': 0, 'alco': 0, 'active': 1}
+
+
+def arrow_body(rows):
+    table = pa.table({name: [float(row[name]) for row in rows] for name in INPUT_FEATURES})
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+
+def msgpack_body(rows):
+    return msgpack.packb({name: [float(row[name]) for row in rows] for name in INPUT_FEATURES})
+
+
+BODIES = {'arrow': arrow_body, 'msgpack': msgpack_body}
+
+
+@pytest.fixture
+def client():
+    return app.test_client()
+
+
+@pytest.mark.parametrize('fmt', ['arrow', 'msgpack'])
+@pytest.mark.parametrize('accept', [None, '*/*', 'application/*'])
+def test_binary_request_answers_in_kind(client, fmt, accept):
+    headers = {'Content-Type': wire.MIMETYPES[fmt]}
+    if accept:
+        headers['Accept'] = accept
+    response = client.post('/predict/batch', data=BODIES[fmt]([PATIENT]), headers=headers)
+    assert response.status_code == 200
+    assert response.mimetype == wire.MIMETYPES[fmt]
+
+
+@pytest.mark.parametrize('fmt', ['arrow', 'msgpack'])
+def test_explicit_accept_wins(client, fmt):
+    response = client.post('/predict/batch', data=BODIES[fmt]([PATIENT]),
+                           headers={'Content-Type': wire.MIMETYPES[fmt], 'Accept': 'application/json'})
+    assert response.mimetype == 'application/json'
+    assert response.get_json()['results'][0]['prediction'] in (0, 1)
+
+
+def test_json_request_defaults_to_json(client):
+    response = client.post('/predict/batch', json=[PATIENT], headers={'Accept': '*/*'})
+    assert response.mimetype == 'application/json'
+
+
+@pytest.mark.parametrize('fmt', ['arrow', 'msgpack'])
+def test_formats_agree_with_json(client, fmt):
+    rows = [PATIENT, dict(PATIENT, ap_hi=170, weight=110), dict(PATIENT, weight=float('nan'))]
+    expected = client.post('/predict/batch', json=rows[:2]).get_json()['results']
+    response = client.post('/predict/batch', data=BODIES[fmt](rows), headers={'Content-Type': wire.MIMETYPES[fmt]})
+    assert response.status_code == 200
+    if fmt == 'arrow':
+        table = pa.ipc.open_stream(response.data).read_all()
+        prediction = table.column('prediction').to_pylist()
+        probability = table.column('probability').to_numpy(zero_copy_only=False)
+        errors = {i: e for i, e in enumerate(table.column('error').to_pylist()) if e}
+    else:
+        body = msgpack.unpackb(response.data, strict_map_key=False)
+        prediction = np.frombuffer(body['prediction'], dtype=np.int8).tolist()
+        probability = np.frombuffer(body['probability'], dtype=np.float64)
+        errors = body['errors']
+    for i, result in enumerate(expected):
+        assert prediction[i] == result['prediction']
+        assert probability[i] == pytest.approx(result['probability'])
+    # The invalid row comes back as an error in its own position
+    # (null in Arrow, -1 in msgpack)
+    assert prediction[2] in (None, -1) and np.isnan(probability[2])
+    assert list(errors) == [2]
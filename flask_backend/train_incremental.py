@@ -0,0 +1,301 @@
+"""Incremental (out-of-core) training on cardio_train.csv-style files.
+
+    python train_incremental.py --data cardio_train.csv
+    python train_incremental.py --data outcomes.csv --warm-start      # continue from the deployed model
+    python registry.py publish model/incremental --activate
+
+The file is never loaded as a whole. Pass 1 streams it once to accumulate
+the scaler statistics (mean/variance merged chunk by chunk) and the class
+counts. Every following pass standardizes each chunk with those statistics
+and updates an SGDClassifier (logistic loss) with partial_fit, so memory is
+bounded by --chunk-rows whatever the file size. Cleaning and feature
+engineering are the ones train_model.py uses; every --holdout-th row is
+kept out of training and scored in a final pass.
+
+With --warm-start the deployed model (registry CURRENT, else model/) or the
+given model directory is the starting point: its coefficients are
+re-expressed in the new scaling, w' = w * s' / s and
+b' = b + sum(w * (m' - m) / s), which leaves its predictions unchanged.
+They are set on the classifier before the first partial_fit, which keeps
+them, and the learning rate starts small (--eta0 0.01 unless given), since
+the step schedule starts over and large first steps would undo the
+deployed fit.
+
+Writes a linear artifact the backend loads to <out>/linear, a population
+reference (percentiles), a similar-patient index and the dataset
+aggregates built from the held-out rows to <out>/population,
+<out>/neighbors and <out>/aggregates.json (a uniform sample of at most
+--reference-rows held-out rows, so memory stays bounded here too), and
+<out>/metrics.json with rows/s per pass, hold-out accuracy/log loss and
+peak memory.
+"""
+import argparse
+import hashlib
+import json
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+from sklearn.linear_model import SGDClassifier
+
+from aggregates import dataset_hash, export_aggregates
+from artifact import export_artifact, load_model
+from features import EXPECTED_COLS
+from neighbors import export_index
+from population import export_reference
+from registry import ModelRegistry
+from scoring import LinearScorer
+from train_model import NUMERIC, clean_frame
+
+try:
+    import resource
+except ImportError:  # Windows: no getrusage, peak memory is not reported
+    resource = None
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+CLASSES = np.array([0, 1])
+
+# Columns the scaler standardizes; the others pass through (mean 0, scale 1)
+_SCALED = np.array([name in NUMERIC for name in EXPECTED_COLS])
+_AGE = EXPECTED_COLS.index('age')
+_GENDER = EXPECTED_COLS.index('gender')
+
+
+class RunningStats:
+    # Mean and variance per column, merged chunk by chunk (Chan et al.), so
+    # the result equals StandardScaler fitted on all rows at once
+
+    def __init__(self, n_features):
+        self.n = 0
+        self.mean = np.zeros(n_features)
+        self.m2 = np.zeros(n_features)
+
+    def update(self, X):
+        n_b = len(X)
+        if n_b == 0:
+            return
+        mean_b = X.mean(axis=0)
+        m2_b = ((X - mean_b) ** 2).sum(axis=0)
+        n = self.n + n_b
+        delta = mean_b - self.mean
+        self.mean = self.mean + delta * n_b / n
+        self.m2 = self.m2 + m2_b + delta ** 2 * self.n * n_b / n
+        self.n = n
+
+    def scaler(self):
+        # (mean, scale) over EXPECTED_COLS, passthrough columns left as they are
+        scale = np.sqrt(self.m2 / max(self.n, 1))
+        scale[scale < 10 * np.finfo(np.float64).eps] = 1.0  # constant column, like StandardScaler
+        return np.where(_SCALED, self.mean, 0.0), np.where(_SCALED, scale, 1.0)
+
+
+def iter_chunks(path, chunk_rows, holdout):
+    # Yield (X, y, X_holdout, y_holdout, summary) per chunk of the file.
+    # Rows are held out by their position in the file, so every pass holds
+    # out the same ones.
+    start = 0
+    for df in pd.read_csv(path, sep=';', chunksize=chunk_rows):
+        held = (np.arange(start, start + len(df)) % holdout == 0) if holdout else np.zeros(len(df), dtype=bool)
+        start += len(df)
+        X, y, summary = clean_frame(df[~held])
+        X_hold, y_hold, _ = clean_frame(df[held])
+        summary.update(rows=len(df), rows_held_out=len(y_hold))
+        yield X, y, X_hold, y_hold, summary
+
+
+def peak_rss_mb():
+    if resource is None:
+        return None
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024  # KiB on Linux
+
+
+def deployed_model_dir():
+    # What the API serves: the registry's CURRENT version, else the bundled model/
+    registry = ModelRegistry(os.environ.get('MODEL_REGISTRY_DIR', os.path.join(HERE, 'model', 'registry')))
+    version = registry.current() if registry.exists() else None
+    return registry.path(version) if version else os.path.join(HERE, 'model')
+
+
+def warm_start_coefficients(scorer, mean, scale):
+    # Re-express a LinearScorer's coefficients for new scaler statistics
+    coef = np.asarray(scorer.coef, dtype=np.float64)
+    old_mean, old_scale = np.asarray(scorer.mean), np.asarray(scorer.scale)
+    return coef * scale / old_scale, scorer.intercept + float(np.sum(coef * (mean - old_mean) / old_scale))
+
+
+class Reservoir:
+    # Uniform sample of at most `size` rows of a stream (Algorithm R, one
+    # vectorized draw per chunk); memory is fixed by `size`
+
+    def __init__(self, size, n_features, seed):
+        self.size = size
+        self.seen = 0
+        self.X = np.empty((size, n_features))
+        self.y = np.empty(size, dtype=np.int8)
+        self.risk = np.empty(size)
+        self.rng = np.random.default_rng(seed)
+
+    def add(self, X, y, risk):
+        # Row t of the stream fills slot t while there is room, then replaces
+        # a random slot with probability size / (t + 1)
+        t = self.seen + np.arange(len(y))
+        self.seen += len(y)
+        slots = np.where(t < self.size, t, self.rng.integers(0, t + 1))
+        keep = slots < self.size
+        self.X[slots[keep]] = X[keep]
+        self.y[slots[keep]] = y[keep]
+        self.risk[slots[keep]] = risk[keep]
+
+    def arrays(self):
+        # (risk, X, y) of the sampled rows
+        n = min(self.seen, self.size)
+        return self.risk[:n], self.X[:n], self.y[:n]
+
+
+def holdout_metrics(models, path, args, mean, scale):
+    # Streaming accuracy and log loss of every (name, coef, intercept) on the
+    # held-out rows. Also returns a sample of those rows as (risk of the first
+    # model, X, y), the reference patients of the new model.
+    totals = {name: [0, 0.0] for name, _, _ in models}
+    reference = Reservoir(args.reference_rows, len(EXPECTED_COLS), args.seed)
+    n = 0
+    for _, _, X, y, _ in iter_chunks(path, args.chunk_rows, args.holdout):
+        Z = (X - mean) / scale
+        n += len(y)
+        for k, (name, coef, intercept) in enumerate(models):
+            margin = Z @ coef + intercept
+            totals[name][0] += int(((margin > 0) == (y == 1)).sum())
+            # log(1 + e^-m) for positives, log(1 + e^m) for negatives
+            totals[name][1] += float(np.logaddexp(0, np.where(y == 1, -margin, margin)).sum())
+            if k == 0:
+                reference.add(np.asarray(X, dtype=np.float64), y, 1.0 / (1.0 + np.exp(-margin)))
+    metrics = {name: {'accuracy': correct / n, 'log_loss': loss / n, 'rows': n}
+               for name, (correct, loss) in totals.items()} if n else {}
+    return metrics, reference.arrays() if n else None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--data', default=os.environ.get('CARDIO_DATA', os.path.join(HERE, 'data', 'cardio_train.csv')))
+    parser.add_argument('--out', default=os.path.join(HERE, 'model', 'incremental'))
+    parser.add_argument('--chunk-rows', type=int, default=100000)
+    parser.add_argument('--epochs', type=int, default=5, help='partial_fit passes over the file')
+    parser.add_argument('--alpha', type=float, default=1e-4, help='L2 regularization')
+    parser.add_argument('--eta0', type=float, help='initial learning rate (default 0.2, 0.01 with --warm-start)')
+    parser.add_argument('--holdout', type=int, default=10, help='hold out every Nth row (0: none)')
+    parser.add_argument('--reference-rows', type=int, default=100000,
+                        help='held-out rows sampled for the percentile reference, neighbour index and aggregates')
+    parser.add_argument('--warm-start', nargs='?', const='deployed', metavar='MODEL_DIR',
+                        help='start from a model directory (default: the deployed model)')
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+    start = time.perf_counter()
+    rss_before = peak_rss_mb()
+    passes = []
+
+    # 1. Pass 1: scaler statistics and class counts, one chunk at a time
+    t = time.perf_counter()
+    stats = RunningStats(len(EXPECTED_COLS))
+    counts = np.zeros(len(CLASSES))
+    data = {'rows': 0, 'duplicates_removed': 0, 'implausible_removed': 0, 'rows_used': 0, 'rows_held_out': 0}
+    for X, y, _, _, summary in iter_chunks(args.data, args.chunk_rows, args.holdout):
+        stats.update(X)
+        counts += np.bincount(y, minlength=len(CLASSES))
+        for key in data:
+            data[key] += summary[key]
+    if not stats.n or counts.min() == 0:
+        print("Error: need training rows of both classes")
+        sys.exit(1)
+    mean, scale = stats.scaler()
+    seconds = time.perf_counter() - t
+    passes.append({'pass': 'statistics', 'rows': data['rows'], 'seconds': seconds,
+                   'rows_per_second': data['rows'] / seconds})
+    print(f"Pass 1: statistics of {stats.n} rows ({data['rows'] / seconds:,.0f} rows/s)")
+
+    # 2. Starting point: zeros, or the deployed coefficients in the new scaling
+    init, base_version = None, None
+    if args.warm_start:
+        model_dir = deployed_model_dir() if args.warm_start == 'deployed' else args.warm_start
+        scorer, base_version = load_model(model_dir)
+        if not isinstance(scorer, LinearScorer):
+            print(f"Error: can only warm-start from a linear model (got {scorer.kind})")
+            sys.exit(1)
+        init = warm_start_coefficients(scorer, mean, scale)
+        print(f"Warm start from {base_version} ({model_dir})")
+
+    # 3. partial_fit passes over the shuffled chunks. Classes are weighted
+    # as class_weight='balanced' would on the whole file, like the batch model.
+    class_weight = dict(zip(CLASSES.tolist(), (counts.sum() / (len(CLASSES) * counts)).tolist()))
+    eta0 = args.eta0 if args.eta0 is not None else 0.01 if init is not None else 0.2
+    clf = SGDClassifier(loss='log_loss', alpha=args.alpha, learning_rate='invscaling', eta0=eta0,
+                        class_weight=class_weight, max_iter=1, tol=None, random_state=args.seed)
+    if init is not None:
+        # partial_fit continues from coefficients that are already set. The
+        # classes are passed with every chunk, so a chunk of one class is fine.
+        clf.coef_, clf.intercept_ = init[0][None, :].copy(), np.array([init[1]])
+    rng = np.random.default_rng(args.seed)
+    for epoch in range(args.epochs):
+        t, rows = time.perf_counter(), 0
+        for X, y, _, _, _ in iter_chunks(args.data, args.chunk_rows, args.holdout):
+            if not len(y):
+                continue
+            order = rng.permutation(len(y))
+            Z = (X[order] - mean) / scale
+            clf.partial_fit(Z, y[order], classes=CLASSES)
+            rows += len(y)
+        seconds = time.perf_counter() - t
+        passes.append({'pass': epoch + 1, 'rows': rows, 'seconds': seconds, 'rows_per_second': rows / seconds})
+        print(f"Pass {epoch + 2}: partial_fit on {rows} rows ({rows / seconds:,.0f} rows/s)")
+
+    # 4. Score the held-out rows, with the starting model for comparison
+    coef, intercept = clf.coef_[0], float(clf.intercept_[0])
+    models = [('trained', coef, intercept)]
+    if args.warm_start:
+        models.append(('warm_start',) + warm_start_coefficients(scorer, mean, scale))
+    holdout, reference = holdout_metrics(models, args.data, args, mean, scale)
+    for name, m in holdout.items():
+        print(f"Hold-out ({name}): accuracy {m['accuracy']:.4f}, log loss {m['log_loss']:.4f}")
+
+    # 5. Write the artifact the backend loads, versioned by its content
+    scorer = LinearScorer(mean, scale, coef, intercept, CLASSES)
+    digest = hashlib.sha256()
+    for array in (scorer.mean, scorer.scale, scorer.coef, np.float64(intercept)):
+        digest.update(np.ascontiguousarray(array, dtype=np.float64).tobytes())
+    version = digest.hexdigest()[:12]
+    export_artifact(scorer, os.path.join(args.out, 'linear'), model_version=version,
+                    extra={'trainer': 'incremental', 'warm_start_from': base_version})
+    if reference:
+        # Percentile reference, similar-patient index and aggregates from
+        # the held-out rows, never seen in training
+        risk, X_ref, y_ref = reference
+        extra = {'data': os.path.abspath(args.data), 'rows': 'held out'}
+        export_reference(risk, X_ref[:, _AGE], X_ref[:, _GENDER], os.path.join(args.out, 'population'),
+                         version, extra=extra)
+        export_index(scorer, X_ref, y_ref, os.path.join(args.out, 'neighbors'), version, extra=extra)
+        export_aggregates(X_ref, y_ref, risk, args.out, version, dataset_hash(args.data), extra=extra)
+
+    metrics = {
+        'model_version': version,
+        'trainer': 'incremental',
+        'warm_start_from': base_version,
+        'data': dict(data, path=os.path.abspath(args.data), positive_rate=float(counts[1] / counts.sum())),
+        'chunk_rows': args.chunk_rows,
+        'eta0': eta0,
+        'passes': passes,
+        'holdout': holdout,
+        'peak_rss_mb': peak_rss_mb(),
+        'rss_before_training_mb': rss_before,
+        'trained_at': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+        'training_seconds': time.perf_counter() - start
+    }
+    with open(os.path.join(args.out, 'metrics.json'), 'w') as f:
+        json.dump(metrics, f, indent=2)
+    print(f"Success! {args.out}/linear artifact {version} written in {metrics['training_seconds']:.1f}s.")
+    if metrics['peak_rss_mb']:
+        print(f"Peak RSS {metrics['peak_rss_mb']:.0f} MiB ({rss_before:.0f} MiB before training)")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,21 +1,244 @@
+"""Train the cardio risk model on cardio_train.csv and write what the API serves.
+
+    python train_model.py --data cardio_train.csv
+    python train_model.py --data cardio_train.csv --models logreg rf knn --jobs -1
+
+Writes model/model.pkl, the memory-mapped artifact in model/linear, the
+population reference for percentiles in model/population, the
+similar-patient index in model/neighbors, the dataset aggregates of the
+Feature Relations page in model/aggregates.json and model/metrics.json (cleaning summary, cross-validation results of every
+candidate, hold-out metrics of the deployed model). Cleaned arrays, CV
+folds and fitted preprocessing steps are cached in --cache-dir, so repeat
+runs on the same file only refit the models.
+"""
+import argparse
+import json
+import os
 import pickle
-from sklearn.linear_model import LinearRegression
+import shutil
+import time
+
 import numpy as np
-import os
+import pandas as pd
+import sklearn
+from joblib import Memory
+from sklearn.compose import ColumnTransformer
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.linear_model import LogisticRegression
+from sklearn.metrics import accuracy_score, confusion_matrix, roc_auc_score
+from sklearn.model_selection import GridSearchCV, StratifiedKFold, train_test_split
+from sklearn.neighbors import KNeighborsClassifier
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import StandardScaler
+
+from aggregates import dataset_hash, export_aggregates
+from artifact import ArtifactError, export_pickle, load_pickle
+from features import EXPECTED_COLS, INPUT_FEATURES, age_days_to_years, engineer
+from neighbors import export_index
+from population import export_for_model
+from scoring import compile_model
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+# Readings outside these ranges are measurement/entry errors (e.g. ap_hi of
+# 16020 or -150) and are dropped before training
+PLAUSIBLE = {
+    'ap_hi': (70, 250),
+    'ap_lo': (40, 200),
+    'height': (100, 250),
+    'weight': (30, 250)
+}
+
+# Column groups of the preprocessing step, as in the deployed pipeline
+NUMERIC = ['height', 'weight', 'age', 'ap_hi', 'ap_lo', 'bmi']
+ORDINAL = ['cholesterol', 'gluc']
+BINARY = ['gender', 'smoke', 'alco', 'active']
+
+# Candidate models and the hyperparameters searched for each
+CANDIDATES = {
+    # l1_ratio 0 / 1 is the L2 / L1 penalty (needs scikit-learn >= 1.8)
+    'logreg': (
+        LogisticRegression(class_weight='balanced', solver='liblinear', max_iter=2000),
+        {'model__C': [0.01, 0.1, 1.0, 10.0], 'model__l1_ratio': [0.0, 1.0]}
+    ),
+    'rf': (
+        RandomForestClassifier(n_estimators=200, class_weight='balanced', n_jobs=1, random_state=0),
+        {'model__max_depth': [8, 12], 'model__min_samples_leaf': [20, 50]}
+    ),
+    'knn': (
+        KNeighborsClassifier(),
+        {'model__n_neighbors': [25, 50, 100]}
+    )
+}
+
+
+def clean_frame(df):
+    # Clean a frame in the cardio_train.csv layout and return (X, y, summary).
+    # Also used chunk by chunk by train_incremental.py.
+    summary = {'rows': len(df)}
+
+    # 1. Drop exact duplicate patients (ignoring the id)
+    df = df.drop(columns=['id'], errors='ignore').drop_duplicates()
+    summary['duplicates_removed'] = summary['rows'] - len(df)
+
+    # 2. Drop implausible readings, including diastolic above systolic
+    keep = df['ap_lo'] <= df['ap_hi']
+    for name, (low, high) in PLAUSIBLE.items():
+        keep &= df[name].between(low, high)
+    summary['implausible_removed'] = int((~keep).sum())
+    df = df[keep]
+
+    # 3. Age from days to completed years, then the serving feature
+    # engineering (BMI, EXPECTED_COLS order) so training sees what the API sees
+    raw = df[INPUT_FEATURES].to_numpy(dtype=np.float64)
+    raw[:, INPUT_FEATURES.index('age')] = age_days_to_years(raw[:, INPUT_FEATURES.index('age')])
+    X = engineer(raw)
+    y = df['cardio'].to_numpy(dtype=np.int64)
+    summary['rows_used'] = len(y)
+    return X, y, summary
+
+
+def load_clean(path, mtime):
+    # Read and clean cardio_train.csv. `mtime` is only part of the cache key,
+    # so an edited file is re-read.
+    X, y, summary = clean_frame(pd.read_csv(path, sep=';'))
+    summary['positive_rate'] = float(y.mean())
+    return X, y, summary
+
+
+def make_folds(y, n_splits, seed):
+    return list(StratifiedKFold(n_splits, shuffle=True, random_state=seed).split(np.zeros(len(y)), y))
+
+
+def make_pipeline(estimator, memory=None):
+    prep = ColumnTransformer([
+        ('num', StandardScaler(), NUMERIC),
+        ('ord', 'passthrough', ORDINAL),
+        ('bin', 'passthrough', BINARY)
+    ])
+    return Pipeline([('prep', prep), ('model', estimator)], memory=memory)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--data', default=os.environ.get('CARDIO_DATA', os.path.join(HERE, 'data', 'cardio_train.csv')))
+    parser.add_argument('--out', default=os.path.join(HERE, 'model'))
+    parser.add_argument('--models', nargs='+', choices=list(CANDIDATES), default=list(CANDIDATES))
+    parser.add_argument('--deploy', choices=['logreg', 'best'], default='logreg',
+                        help="'logreg' keeps the interpretable, artifact-compatible model; "
+                             "'best' deploys whichever candidate scored highest")
+    parser.add_argument('--cv', type=int, default=5)
+    parser.add_argument('--test-size', type=float, default=0.2)
+    parser.add_argument('--jobs', type=int, default=-1, help='parallel CV fits (-1: all cores)')
+    parser.add_argument('--cache-dir', default=os.path.join(HERE, '.train_cache'))
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+    start = time.perf_counter()
+    memory = Memory(args.cache_dir, verbose=0)
+
+    # 1. Load, clean and engineer (cached per file version)
+    X, y, summary = memory.cache(load_clean)(os.path.abspath(args.data), os.path.getmtime(args.data))
+    print(f"Loaded {summary['rows']} rows, training on {summary['rows_used']} "
+          f"({summary['duplicates_removed']} duplicates, {summary['implausible_removed']} implausible removed)")
+
+    # 2. Hold out a test set, cross-validate on the rest
+    X_train, X_test, y_train, y_test = train_test_split(
+        X, y, test_size=args.test_size, stratify=y, random_state=args.seed)
+    X_train = pd.DataFrame(X_train, columns=EXPECTED_COLS)
+    X_test = pd.DataFrame(X_test, columns=EXPECTED_COLS)
+    folds = memory.cache(make_folds)(y_train, args.cv, args.seed)
+
+    # 3. Parallel grid search per candidate. The pipeline memory keeps the
+    # fitted preprocessing of every fold, so it is fitted once per fold
+    # instead of once per hyperparameter setting (and run)
+    searches, candidates = {}, []
+    for name in args.models:
+        estimator, grid = CANDIDATES[name]
+        search = GridSearchCV(make_pipeline(estimator, memory), grid, cv=folds,
+                              scoring={'accuracy': 'accuracy', 'roc_auc': 'roc_auc'},
+                              refit='accuracy', n_jobs=args.jobs)
+        t = time.perf_counter()
+        search.fit(X_train, y_train)
+        best = search.best_index_
+        candidates.append({
+            'model': name,
+            'best_params': {k.replace('model__', ''): v for k, v in search.best_params_.items()},
+            'cv_accuracy': float(search.cv_results_['mean_test_accuracy'][best]),
+            'cv_accuracy_std': float(search.cv_results_['std_test_accuracy'][best]),
+            'cv_roc_auc': float(search.cv_results_['mean_test_roc_auc'][best]),
+            'settings_tried': len(search.cv_results_['params']),
+            'search_seconds': time.perf_counter() - t
+        })
+        searches[name] = search
+        print(f"{name}: CV accuracy {candidates[-1]['cv_accuracy']:.4f} "
+              f"(AUC {candidates[-1]['cv_roc_auc']:.4f}) with {candidates[-1]['best_params']}")
+
+    # 4. Pick the model to deploy and score it on the hold-out set
+    if args.deploy == 'best' or 'logreg' not in searches:
+        chosen = max(candidates, key=lambda c: c['cv_accuracy'])['model']
+    else:
+        chosen = 'logreg'
+    model = searches[chosen].best_estimator_
+    model.set_params(memory=None)
+    risk = model.predict_proba(X_test)[:, 1]
+    predicted = model.predict(X_test)
+    test = {
+        'accuracy': float(accuracy_score(y_test, predicted)),
+        'roc_auc': float(roc_auc_score(y_test, risk)),
+        'confusion_matrix': confusion_matrix(y_test, predicted).tolist(),
+        'rows': len(y_test)
+    }
+    print(f"Deploying {chosen}: test accuracy {test['accuracy']:.4f}, AUC {test['roc_auc']:.4f}")
+
+    # 5. Save the pickle, the artifact the backend loads and the metrics
+    os.makedirs(args.out, exist_ok=True)
+    pickle_path = os.path.join(args.out, 'model.pkl')
+    with open(pickle_path, 'wb') as f:
+        pickle.dump(model, f)
+    try:
+        header = export_pickle(pickle_path, os.path.join(args.out, 'linear'))
+        version = header['model_version']
+        print(f"Success! {args.out}/linear artifact {version} has been created.")
+    except ArtifactError as e:
+        # Non-linear model: served from the pickle, drop an artifact of an older model
+        shutil.rmtree(os.path.join(args.out, 'linear'), ignore_errors=True)
+        _, version = load_pickle(pickle_path)
+        print(f"Skipped artifact export: {e}")
+
+    # 6. Population reference for percentiles: the deployed model's scores
+    # of every cleaned patient, sorted per age/gender stratum
+    scorer = compile_model(model)
+    reference = export_for_model(scorer, X, os.path.join(args.out, 'population'), version,
+                                 extra={'data': os.path.abspath(args.data)})
+    print(f"Success! Population reference of {reference['strata']['all']} patients written.")
 
-# 1. Create a simple dummy model (looks for a pattern y = 2x)
-X = np.array([[1], [2], [3], [4]])
-y = np.array([2, 4, 6, 8])
+    # 7. Similar-patient index over the same patients and their outcomes
+    index = export_index(scorer, X, y, os.path.join(args.out, 'neighbors'), version,
+                         extra={'data': os.path.abspath(args.data)})
+    print(f"Success! Neighbour index of {index['rows']} patients written "
+          f"({sum(index['memory_bytes'].values()) / (1 << 20):.1f} MiB).")
 
-model = LinearRegression()
-model.fit(X, y)
+    # 8. Dataset aggregates (correlations, risk by age band and lifestyle,
+    # blood pressure quantiles), keyed by the data file's hash
+    aggregates = export_aggregates(X, y, scorer.risk(X), args.out, version, dataset_hash(args.data),
+                                   extra={'data': os.path.abspath(args.data)})
+    print(f"Success! Aggregates of {aggregates['rows']} patients written (dataset {aggregates['dataset_hash']}).")
 
-# 2. Create the 'model' folder if it doesn't exist
-if not os.path.exists('model'):
-    os.makedirs('model')
+    metrics = {
+        'model_version': version,
+        'deployed': chosen,
+        'data': dict(summary, path=os.path.abspath(args.data)),
+        'cv_folds': args.cv,
+        'candidates': candidates,
+        'test': test,
+        'sklearn_version': sklearn.__version__,
+        'trained_at': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+        'training_seconds': time.perf_counter() - start
+    }
+    with open(os.path.join(args.out, 'metrics.json'), 'w') as f:
+        json.dump(metrics, f, indent=2)
+    print(f"Success! {pickle_path} and metrics.json written in {metrics['training_seconds']:.1f}s.")
 
-# 3. Save the model
-with open('model/model.pkl', 'wb') as f:
-    pickle.dump(model, f)
 
-print("Success! model/model.pkl has been created.")
\ No newline at end of file
+if __name__ == '__main__':
+    main()
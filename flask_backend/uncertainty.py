@@ -0,0 +1,179 @@
+"""Monte Carlo risk uncertainty for /predict/uncertainty.
+
+A single blood pressure or weight reading is noisy, so the risk of the
+submitted vitals is a point estimate. Here every noisy vital is drawn N
+times around its submitted value, the N patients are scored in one
+vectorized pass, and the spread of their risk is summarized:
+
+    {"patient": {...}, "samples": 100000, "interval": 0.95,
+     "noise": {"ap_hi": 10, "weight": {"dist": "uniform", "half_width": 2}}}
+
+A noise entry is a normal standard deviation (a number or
+{"dist": "normal", "sd": ...}) or a uniform {"half_width": ...};
+features without an entry are taken as exact. The defaults come from
+DEFAULT_NOISE, overridable with the UNCERTAINTY_NOISE environment variable
+(same JSON).
+
+Each thread keeps one random generator and sample buffers, which grow to
+the largest request seen up to UNCERTAINTY_BUFFER_SAMPLES samples (about
+190 bytes each) and are reused afterwards, so a typical request allocates
+no per-sample memory. Larger requests get buffers of their own that are
+freed with the request, so one big request doesn't pin memory in every
+worker thread.
+"""
+import json
+import os
+import threading
+
+import numpy as np
+
+from features import EXPECTED_COLS, INPUT_FEATURES, engineer, records_to_matrix
+
+DEFAULT_SAMPLES = int(os.environ.get("UNCERTAINTY_SAMPLES", 100000))
+MAX_SAMPLES = int(os.environ.get("UNCERTAINTY_MAX_SAMPLES", 1000000))
+BUFFER_SAMPLES = int(os.environ.get("UNCERTAINTY_BUFFER_SAMPLES", DEFAULT_SAMPLES))
+
+# Typical measurement error of a single reading (normal standard deviation):
+# office BP readings vary by several mmHg, scales and tape measures by ~1 unit
+DEFAULT_NOISE = json.loads(os.environ.get("UNCERTAINTY_NOISE", 'null')) or {
+    'ap_hi': 8.0,
+    'ap_lo': 6.0,
+    'weight': 1.0,
+    'height': 1.0
+}
+# Categorical inputs are recorded, not measured
+_MEASURED = ['age', 'height', 'weight', 'ap_hi', 'ap_lo']
+
+# Decision threshold of the served models (label 1 above it)
+THRESHOLD = 0.5
+
+
+class UncertaintyError(ValueError):
+    pass
+
+
+def parse_noise(spec):
+    # {feature: number | {"dist": ..., ...}} -> {feature: (dist, width)}
+    if not isinstance(spec, dict):
+        raise UncertaintyError("'noise' must map features to a standard deviation or distribution")
+    noise = {}
+    for name, value in spec.items():
+        if name not in _MEASURED:
+            raise UncertaintyError(f"Noise can only be set for: {', '.join(_MEASURED)}")
+        if isinstance(value, dict):
+            dist = value.get('dist', 'normal')
+            width = value.get('sd') if dist == 'normal' else value.get('half_width')
+        else:
+            dist, width = 'normal', value
+        if dist not in ('normal', 'uniform'):
+            raise UncertaintyError(f"Unknown distribution '{dist}' for '{name}' (normal or uniform)")
+        try:
+            width = float(width)
+        except (TypeError, ValueError):
+            raise UncertaintyError(f"Noise of '{name}' needs a numeric sd / half_width")
+        if not np.isfinite(width) or width < 0:
+            raise UncertaintyError(f"Noise of '{name}' must be a finite value >= 0")
+        if width > 0:
+            noise[name] = (dist, width)
+    return noise
+
+
+def parse(body):
+    # Validate a request body. Returns (base, noise, samples, interval, seed).
+    if not isinstance(body, dict) or not isinstance(body.get('patient'), dict):
+        raise UncertaintyError("Expected {'patient': {...}}")
+    _, errors = records_to_matrix([body['patient']])
+    if errors:
+        raise UncertaintyError(errors[0])
+    base = np.array([body['patient'][name] for name in INPUT_FEATURES], dtype=np.float64)
+    noise = parse_noise(body.get('noise', DEFAULT_NOISE))
+    try:
+        samples = int(body.get('samples', DEFAULT_SAMPLES))
+        interval = float(body.get('interval', 0.95))
+        seed = None if body.get('seed') is None else int(body['seed'])
+    except (TypeError, ValueError):
+        raise UncertaintyError("'samples' and 'seed' must be integers, 'interval' a number")
+    if not 1 <= samples <= MAX_SAMPLES:
+        raise UncertaintyError(f"'samples' must be between 1 and {MAX_SAMPLES}")
+    if not 0 < interval < 1:
+        raise UncertaintyError("'interval' must be between 0 and 1")
+    return base, noise, samples, interval, seed
+
+
+def _allocate(n):
+    return (np.empty((n, len(INPUT_FEATURES)), order='F'), np.empty((n, len(EXPECTED_COLS))), np.empty(n))
+
+
+class MonteCarlo:
+    # Per-thread random generator and sample buffers. The raw buffer is
+    # column-major so every feature column is contiguous and can be filled
+    # by the generator in place.
+
+    def __init__(self):
+        self._local = threading.local()
+
+    def _buffers(self, n):
+        # (raw, X, risk) with room for n samples: this thread's buffers up to
+        # BUFFER_SAMPLES, buffers for this call only above that
+        state = self._local
+        if n > BUFFER_SAMPLES:
+            return _allocate(n)
+        if getattr(state, 'raw', None) is None or len(state.raw) < n:
+            state.raw, state.X, state.risk = _allocate(n)
+        return state.raw, state.X, state.risk
+
+    def _rng(self):
+        state = self._local
+        if getattr(state, 'rng', None) is None:
+            state.rng = np.random.default_rng()
+        return state.rng
+
+    def sample(self, scorer, base, noise, n, seed=None):
+        # Draw n noisy copies of the patient and score them. Returns the risk
+        # of every sample, possibly a view into this thread's buffer (valid
+        # until the thread's next call).
+        raw, X, risk = self._buffers(n)
+        rng = self._rng() if seed is None else np.random.default_rng(seed)
+        raw = raw[:n]
+        for j, name in enumerate(INPUT_FEATURES):
+            column = raw[:, j]
+            if name not in noise:
+                column.fill(base[j])
+                continue
+            dist, width = noise[name]
+            if dist == 'normal':
+                rng.standard_normal(out=column)
+            else:
+                rng.random(out=column)
+                column *= 2.0
+                column -= 1.0
+            column *= width
+            column += base[j]
+        # Keep heights physical, BMI divides by them
+        height = raw[:, INPUT_FEATURES.index('height')]
+        np.maximum(height, 1.0, out=height)
+        X = engineer(raw, out=X[:n])
+        return scorer.risk(X, out=risk[:n])
+
+
+def summarize(risk, point_risk, interval):
+    # Mean, spread, equal-tailed credible interval and threshold crossings.
+    # Partially sorts `risk` in place.
+    n = len(risk)
+    mean = float(risk.mean())
+    std = float(risk.std())
+    above = int(np.count_nonzero(risk > THRESHOLD))
+    tail = (1.0 - interval) / 2
+    low, high = np.quantile(risk, [tail, 1.0 - tail], overwrite_input=True)
+    point_above = point_risk > THRESHOLD
+    return {
+        'risk': point_risk,
+        'risk_mean': mean,
+        'risk_std': std,
+        'interval': {'level': interval, 'low': float(low), 'high': float(high)},
+        'threshold': THRESHOLD,
+        'p_above_threshold': above / n,
+        # Share of plausible re-measurements that would flip the prediction
+        'p_label_change': (n - above) / n if point_above else above / n,
+        'samples': n
+    }
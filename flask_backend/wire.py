@@ -0,0 +1,234 @@
+"""Binary columnar formats for /predict/batch.
+
+JSON bodies are lists of 11-key objects, and building and reading those
+per-row dicts dominates the cost of large batches. The binary formats carry
+one array per feature instead, which goes straight into the model matrix:
+
+    application/vnd.apache.arrow.stream
+        Arrow IPC stream, one numeric column per feature (needs pyarrow)
+    application/msgpack
+        map of feature name -> little-endian float64 bytes, or a plain
+        list of numbers (needs msgpack)
+
+The request's Content-Type selects the input format, the Accept header the
+response format (default: the request's format). Responses carry the
+columns prediction (int8, -1 for rows with an error), probability
+(float64, NaN for rows with an error) and the per-row error messages.
+With ?contributions=1 they also carry every feature's contribution to the
+log-odds and the indices or names of each row's top_k drivers. Models with
+a population reference add percentile, age_percentile and
+age_gender_percentile columns (float64, NaN/null for rows with an error).
+Clinical insights come as a uint16 bit mask per row, bit j standing for
+the j-th of the insight_codes listed in the metadata.
+Both libraries are optional: without them the endpoint answers 415 for
+that format and JSON keeps working.
+"""
+import numpy as np
+
+from features import EXPECTED_COLS, INPUT_FEATURES
+
+JSON = 'application/json'
+ARROW = 'application/vnd.apache.arrow.stream'
+MSGPACK = 'application/msgpack'
+
+# Content-Type / Accept values -> format name
+FORMATS = {
+    JSON: 'json',
+    ARROW: 'arrow',
+    'application/x-msgpack': 'msgpack',
+    MSGPACK: 'msgpack'
+}
+MIMETYPES = {'json': JSON, 'arrow': ARROW, 'msgpack': MSGPACK}
+
+
+def response_format(accept, fmt):
+    # Response format for a werkzeug Accept header and the request's format.
+    # The request's own mimetype is the first candidate, so */* (and a
+    # missing Accept header) answer in the request's format.
+    own = MIMETYPES[fmt]
+    return FORMATS[accept.best_match([own] + [m for m in FORMATS if m != own], own)]
+
+
+class WireError(ValueError):
+    pass
+
+
+class UnsupportedFormat(Exception):
+    pass
+
+
+def _pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.ipc
+        return pyarrow
+    except ImportError:
+        raise UnsupportedFormat('Arrow support needs pyarrow (pip install pyarrow)')
+
+
+def _msgpack():
+    try:
+        import msgpack
+        return msgpack
+    except ImportError:
+        raise UnsupportedFormat('msgpack support needs msgpack (pip install msgpack)')
+
+
+# Requests ----------------------------------------------------------------------
+
+def decode(fmt, body):
+    # Parse a request body into an (n, 11) array in INPUT_FEATURES order.
+    # Raises KeyError for a missing column, WireError for a malformed body.
+    columns = _decode_arrow(body) if fmt == 'arrow' else _decode_msgpack(body)
+    lengths = {len(columns[name]) for name in INPUT_FEATURES}
+    if len(lengths) > 1:
+        raise WireError('All feature columns must have the same length')
+    raw = np.empty((lengths.pop(), len(INPUT_FEATURES)), dtype=np.float64)
+    for j, name in enumerate(INPUT_FEATURES):
+        raw[:, j] = columns[name]
+    return raw
+
+
+def _decode_arrow(body):
+    pa = _pyarrow()
+    try:
+        table = pa.ipc.open_stream(body).read_all()
+    except (pa.ArrowInvalid, OSError) as e:
+        raise WireError(f'Invalid Arrow IPC stream: {e}')
+    columns = {}
+    for name in INPUT_FEATURES:
+        if name not in table.column_names:
+            raise KeyError(name)
+        try:
+            # Nulls become NaN and are reported as row errors
+            column = table.column(name).cast(pa.float64())
+        except (pa.ArrowInvalid, pa.ArrowNotImplementedError):
+            raise WireError(f"Column '{name}' must be numeric")
+        columns[name] = column.to_numpy()
+    return columns
+
+
+def _decode_msgpack(body):
+    msgpack = _msgpack()
+    try:
+        data = msgpack.unpackb(body, raw=False)
+    except (ValueError, msgpack.ExtraData, msgpack.FormatError, msgpack.StackError) as e:
+        raise WireError(f'Invalid msgpack body: {e}')
+    if not isinstance(data, dict):
+        raise WireError('Expected a msgpack map of feature columns')
+    columns = {}
+    for name in INPUT_FEATURES:
+        value = data[name]
+        try:
+            if isinstance(value, bytes):
+                columns[name] = np.frombuffer(value, dtype='<f8')
+            else:
+                columns[name] = np.array(value, dtype=np.float64)
+        except (TypeError, ValueError):
+            raise WireError(f"Column '{name}' must be float64 bytes or a list of numbers")
+        if columns[name].ndim != 1:
+            raise WireError(f"Column '{name}' must be one-dimensional")
+    return columns
+
+
+# Responses ---------------------------------------------------------------------
+
+def encode(fmt, labels, probabilities, errors, model_version, contributions=None, top=None, population=None,
+           insights=None):
+    # Serialize batch results; labels/probabilities hold one entry per row.
+    # contributions (n, 12) and top (n, k feature indices) are added when
+    # explanations were requested, population percentiles (name -> (n,)
+    # float64) when the model has a population reference, and insights as
+    # (per-row bit mask, codes of the bits).
+    args = (labels, probabilities, errors, model_version, contributions, top, population, insights)
+    if fmt == 'arrow':
+        return _encode_arrow(*args)
+    return _encode_msgpack(*args)
+
+
+def _encode_arrow(labels, probabilities, errors, model_version, contributions, top, population, insights):
+    pa = _pyarrow()
+    failed = np.zeros(len(labels), dtype=bool)
+    failed[list(errors)] = True
+    messages = [None] * len(labels)
+    for i, message in errors.items():
+        messages[i] = message
+    columns = {
+        'prediction': pa.array(labels.astype(np.int8), mask=failed),
+        'probability': pa.array(probabilities, mask=failed),
+        'error': pa.array(messages, type=pa.string())
+    }
+    if contributions is not None:
+        for j, name in enumerate(EXPECTED_COLS):
+            columns[f'contribution_{name}'] = pa.array(contributions[:, j], mask=failed)
+        # top_drivers: list of feature names per row, strongest first
+        offsets = pa.array(np.arange(len(labels) + 1) * top.shape[1], type=pa.int32())
+        names = pa.array(np.asarray(EXPECTED_COLS, dtype=object)[top.ravel()], type=pa.string())
+        columns['top_drivers'] = pa.ListArray.from_arrays(offsets, names, mask=pa.array(failed))
+    for name, values in (population or {}).items():
+        if name != 'age_band':
+            columns[name] = pa.array(values, mask=np.isnan(values))
+    metadata = {'model_version': model_version or ''}
+    if insights is not None:
+        # Bit j of a row's value is set when insight code j applies
+        columns['insights'] = pa.array(insights[0].astype(np.uint16), mask=failed)
+        metadata['insight_codes'] = ','.join(insights[1])
+    table = pa.table(columns).replace_schema_metadata(metadata)
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+
+def _encode_msgpack(labels, probabilities, errors, model_version, contributions, top, population, insights):
+    data = {
+        'prediction': labels.astype(np.int8).tobytes(),
+        'probability': probabilities.astype('<f8').tobytes(),
+        'errors': errors,
+        'count': len(labels),
+        'model_version': model_version,
+        'status': 'success'
+    }
+    if contributions is not None:
+        # Row-major (n, 12) float64 and (n, top_k) int8 indices into 'features'
+        data.update(features=EXPECTED_COLS, top_k=top.shape[1],
+                    contributions=np.ascontiguousarray(contributions, dtype='<f8').tobytes(),
+                    top_drivers=np.ascontiguousarray(top, dtype=np.int8).tobytes())
+    for name, values in (population or {}).items():
+        if name != 'age_band':
+            data[name] = values.astype('<f8').tobytes()
+    if insights is not None:
+        data.update(insights=insights[0].astype('<u2').tobytes(), insight_codes=insights[1])
+    return _msgpack().packb(data)
+
+
+# Client side (benchmarks, bulk scoring) ------------------------------------------
+
+def encode_request(fmt, raw):
+    # Build a request body from an (n, 11) array in INPUT_FEATURES order
+    raw = np.asarray(raw, dtype=np.float64)
+    if fmt == 'arrow':
+        pa = _pyarrow()
+        table = pa.table({name: raw[:, j] for j, name in enumerate(INPUT_FEATURES)})
+        sink = pa.BufferOutputStream()
+        with pa.ipc.new_stream(sink, table.schema) as writer:
+            writer.write_table(table)
+        return sink.getvalue().to_pybytes()
+    return _msgpack().packb({name: np.ascontiguousarray(raw[:, j]).astype('<f8').tobytes()
+                             for j, name in enumerate(INPUT_FEATURES)})
+
+
+def decode_response(fmt, body):
+    # Returns (labels, probabilities, errors, model_version)
+    if fmt == 'arrow':
+        pa = _pyarrow()
+        table = pa.ipc.open_stream(body).read_all()
+        labels = table.column('prediction').fill_null(-1).to_numpy()
+        probabilities = table.column('probability').to_numpy()
+        errors = {i: m for i, m in enumerate(table.column('error').to_pylist()) if m is not None}
+        version = (table.schema.metadata or {}).get(b'model_version', b'').decode() or None
+        return labels, probabilities, errors, version
+    data = _msgpack().unpackb(body, raw=False, strict_map_key=False)
+    return (np.frombuffer(data['prediction'], dtype=np.int8),
+            np.frombuffer(data['probability'], dtype='<f8'),
+            data['errors'], data['model_version'])
@@ -0,0 +1,192 @@
+"""HTTP client for the CardioCare backend.
+
+One ApiClient per Streamlit server process (held in st.cache_resource):
+
+- a requests.Session with a keep-alive connection pool, so reruns and
+  parallel calls reuse open connections instead of a TLS handshake each
+- connect/read timeouts on every call
+- bounded retries with full-jitter exponential backoff for connection
+  errors, timeouts and 502/503/504 answers (all backend calls are pure
+  scoring, so repeating them is safe)
+- a circuit breaker: after `failure_threshold` consecutive failures calls
+  fail fast for `reset_seconds`, then one trial call decides whether the
+  backend is back
+- gather() to run several calls in parallel on a small thread pool
+- an optional observer(method, path, status, seconds) called after every
+  call (the rerun profiler, see profiler.py); status is the HTTP status or
+  the exception's class name
+
+The base URL comes from CARDIO_API_URL, else the api_url entry of the
+Streamlit secrets, else the production deployment.
+"""
+import contextvars
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from requests.adapters import HTTPAdapter
+
+DEFAULT_URL = "https://cardiocare-production-cba0.up.railway.app"
+RETRY_STATUS = {502, 503, 504}
+
+
+class CircuitOpenError(requests.ConnectionError):
+    pass
+
+
+class CircuitBreaker:
+    # closed -> open after `failure_threshold` consecutive failures;
+    # open -> half-open after `reset_seconds` (one trial call goes through)
+
+    def __init__(self, failure_threshold=5, reset_seconds=30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.failures = 0
+        self.opened_at = None
+        self._trial = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        if self.opened_at is None:
+            return 'closed'
+        return 'half-open' if time.monotonic() - self.opened_at >= self.reset_seconds else 'open'
+
+    def allow(self):
+        with self._lock:
+            state = self.state
+            if state == 'closed':
+                return True
+            if state == 'half-open' and not self._trial:
+                self._trial = True
+                return True
+            return False
+
+    def success(self):
+        with self._lock:
+            self.failures, self.opened_at, self._trial = 0, None, False
+
+    def release(self):
+        # A call ended without telling whether the backend is healthy (a
+        # client-side error): let the next call be the trial
+        with self._lock:
+            self._trial = False
+
+    def failure(self):
+        with self._lock:
+            self.failures += 1
+            self._trial = False
+            if self.failures >= self.failure_threshold or self.opened_at is not None:
+                self.opened_at = time.monotonic()
+
+
+class ApiClient:
+
+    def __init__(self, base_url, timeout=(3.05, 15.0), retries=2, backoff=0.25,
+                 pool_size=8, breaker=None, observer=None):
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.breaker = breaker or CircuitBreaker()
+        self.observer = observer
+        self.session = requests.Session()
+        # Retries are done here (with jitter and the breaker), not by urllib3
+        adapter = HTTPAdapter(pool_connections=2, pool_maxsize=pool_size, max_retries=0)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self._pool = ThreadPoolExecutor(max_workers=pool_size, thread_name_prefix='api')
+        self.last_latency = None
+
+    def request(self, method, path, **kwargs):
+        # Returns the requests.Response; raises requests.RequestException
+        # (CircuitOpenError while the breaker is open) once retries run out
+        if self.observer is None:
+            return self._request(method, path, **kwargs)
+        start, status = time.perf_counter(), None
+        try:
+            response = self._request(method, path, **kwargs)
+            status = response.status_code
+            return response
+        except Exception as e:
+            status = type(e).__name__
+            raise
+        finally:
+            self.observer(method, path, status, time.perf_counter() - start)
+
+    def _request(self, method, path, **kwargs):
+        kwargs.setdefault('timeout', self.timeout)
+        url = f'{self.base_url}{path}'
+        for attempt in range(self.retries + 1):
+            if not self.breaker.allow():
+                raise CircuitOpenError(f'Backend unavailable, retrying in up to {self.breaker.reset_seconds:.0f}s')
+            start = time.perf_counter()
+            try:
+                response = self.session.request(method, url, **kwargs)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                self.breaker.failure()
+                if attempt == self.retries:
+                    raise
+                error = e
+            except requests.RequestException:
+                # Anything else requests raises (a broken response, too many
+                # redirects, ...) is a failed call but not worth retrying
+                self.breaker.failure()
+                raise
+            except BaseException:
+                # Not a verdict on the backend (e.g. a bad argument), but it must
+                # not leave a half-open breaker waiting for this trial forever
+                self.breaker.release()
+                raise
+            else:
+                self.last_latency = time.perf_counter() - start
+                if response.status_code not in RETRY_STATUS:
+                    self.breaker.success()
+                    return response
+                self.breaker.failure()
+                if attempt == self.retries:
+                    return response
+            # Full jitter: sleep anywhere up to the exponential backoff
+            time.sleep(random.uniform(0, self.backoff * (2 ** attempt)))
+        raise error
+
+    def get(self, path, **kwargs):
+        return self.request('GET', path, **kwargs)
+
+    def post(self, path, json=None, **kwargs):
+        return self.request('POST', path, json=json, **kwargs)
+
+    def submit(self, method, path, **kwargs):
+        # Start a call in the background, returns a Future of the Response.
+        # The call runs in a copy of the caller's context (for the observer).
+        return self._pool.submit(contextvars.copy_context().run, self.request, method, path, **kwargs)
+
+    def gather(self, *calls):
+        # Run (method, path, kwargs) calls in parallel. Returns one Response
+        # or exception per call, in order, so one failure doesn't hide the rest.
+        futures = [self.submit(method, path, **kwargs) for method, path, kwargs in calls]
+        results = []
+        for future in futures:
+            try:
+                results.append(future.result())
+            except requests.RequestException as e:
+                results.append(e)
+        return results
+
+    def close(self):
+        self._pool.shutdown(wait=False)
+        self.session.close()
+
+
+def api_url(secrets=None):
+    # CARDIO_API_URL, else secrets['api_url'], else the production backend
+    url = os.environ.get('CARDIO_API_URL')
+    if not url and secrets is not None:
+        try:
+            url = secrets.get('api_url')
+        except Exception:  # no secrets.toml
+            url = None
+    return url or DEFAULT_URL
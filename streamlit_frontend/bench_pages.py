@@ -0,0 +1,81 @@
+"""Render time of every frontend page, measured with Streamlit's AppTest.
+
+For each page a fresh Python process runs the app once (first load: imports
+plus the first script run, as a new server process would) and then reruns
+it (what every widget interaction costs). Only the app's own code is timed.
+Prints a JSON report like flask_backend/benchmark.py:
+
+    python bench_pages.py --reruns 20
+    CARDIO_API_URL=http://127.0.0.1:5000 python bench_pages.py --pages risk cohort
+
+Point CARDIO_API_URL at a local backend; pages that call it otherwise wait
+for the production deployment.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+PAGES = ["overview", "risk", "cohort", "analytics", "journey", "data_insights"]
+
+# Runs inside the child process. The app is executed through a small runner
+# script that times the app's own code, leaving out AppTest's overhead.
+CHILD = r"""
+import json, os, sys, tempfile, time, types
+t = time.perf_counter()
+from streamlit.testing.v1 import AppTest
+framework = time.perf_counter() - t
+# Streamlit swaps __main__ for the script, so the times live in their own module
+sink = sys.modules['bench_times'] = types.ModuleType('bench_times')
+times = sink.times = []
+runner = os.path.join(tempfile.mkdtemp(), 'runner.py')
+with open(runner, 'w') as f:
+    f.write('import runpy, sys, time\n'
+            't = time.perf_counter()\n'
+            'try:\n'
+            f'    runpy.run_path({os.path.abspath(sys.argv[1])!r}, run_name="__main__")\n'
+            'finally:\n'
+            '    sys.modules["bench_times"].times.append(time.perf_counter() - t)\n')
+at = AppTest.from_file(runner, default_timeout=60)
+at.session_state.page = sys.argv[2]
+at.run()
+if at.exception:
+    raise SystemExit(at.exception[0].message)
+time.sleep(float(sys.argv[4]))
+for _ in range(int(sys.argv[3])):
+    at.run()
+print(json.dumps({'framework_import_s': framework, 'first_run_s': times[0], 'reruns_s': times[1:]}))
+"""
+
+
+def measure(script, page, reruns, settle):
+    out = subprocess.run([sys.executable, '-c', CHILD, script, page, str(reruns), str(settle)], cwd=HERE,
+                         capture_output=True, text=True, check=True)
+    result = json.loads(out.stdout.strip().splitlines()[-1])
+    runs = sorted(result.pop('reruns_s'))
+    result['rerun_p50_ms'] = runs[len(runs) // 2] * 1000
+    result['rerun_p95_ms'] = runs[min(int(len(runs) * 0.95), len(runs) - 1)] * 1000
+    result['first_run_ms'] = result.pop('first_run_s') * 1000
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--script', default='frontend_app.py')
+    parser.add_argument('--pages', nargs='+', default=PAGES)
+    parser.add_argument('--reruns', type=int, default=20)
+    parser.add_argument('--settle', type=float, default=3.0,
+                        help='seconds between the first run and the reruns (lets background preloading finish)')
+    args = parser.parse_args()
+
+    results = {}
+    for page in args.pages:
+        results[page] = measure(args.script, page, args.reruns, args.settle)
+        print(json.dumps({page: results[page]}), file=sys.stderr)
+    print(json.dumps({'scenario': 'pages', 'script': args.script, 'results': results}, indent=2))
+
+
+if __name__ == '__main__':
+    main()
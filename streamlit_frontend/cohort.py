@@ -0,0 +1,270 @@
+"""Cohort scoring for the upload page.
+
+A clinic's CSV or Excel sheet is read in chunks of CHUNK_ROWS patients.
+Every chunk is validated against the risk form's bounds and encoded the way
+the form encodes its payload with vectorized pandas, then sent to
+/predict/batch as Arrow IPC (as JSON if the backend answers 415, i.e. it
+has no pyarrow). Up to MAX_IN_FLIGHT chunks are scored concurrently over
+the pooled ApiClient.
+
+Only a fixed-size summary (risk histogram, counts per age band and insight
+code) stays in memory; scored rows are appended to a CSV file on disk that
+the page offers for download. So memory depends on the chunk size, not on
+the number of patients (Excel sheets are the exception: pandas can only
+read them whole).
+
+Expected columns are the payload keys of the risk page: age (years, or
+days as in cardio_train.csv), gender, height, weight, ap_hi, ap_lo,
+cholesterol, gluc, smoke, alco, active. Categorical columns take the form's
+labels ("Male", "Well Above Normal", "Yes", ...) or their codes.
+"""
+import os
+import tempfile
+from collections import deque
+
+import numpy as np
+import pandas as pd
+
+CHUNK_ROWS = int(os.environ.get("COHORT_CHUNK_ROWS", 2000))
+MAX_IN_FLIGHT = int(os.environ.get("COHORT_MAX_IN_FLIGHT", 4))
+
+ARROW_MIMETYPE = "application/vnd.apache.arrow.stream"
+
+# Same bounds as the number inputs of the risk form
+BOUNDS = {
+    "age": (18, 100),
+    "height": (140, 200),
+    "weight": (40, 160),
+    "ap_hi": (80, 220),
+    "ap_lo": (40, 140)
+}
+LEVELS = ["Normal", "Above Normal", "Well Above Normal"]
+# Label -> code, as in the risk page payload (codes are accepted as is)
+CATEGORIES = {
+    "gender": {"female": 1, "male": 2, "1": 1, "2": 2},
+    "cholesterol": {**{level.lower(): i + 1 for i, level in enumerate(LEVELS)}, "1": 1, "2": 2, "3": 3},
+    "gluc": {**{level.lower(): i + 1 for i, level in enumerate(LEVELS)}, "1": 1, "2": 2, "3": 3},
+    "smoke": {"yes": 1, "no": 0, "true": 1, "false": 0, "1": 1, "0": 0},
+    "alco": {"yes": 1, "no": 0, "true": 1, "false": 0, "1": 1, "0": 0},
+    "active": {"yes": 1, "no": 0, "true": 1, "false": 0, "1": 1, "0": 0}
+}
+# Backend feature order (flask_backend/features.py INPUT_FEATURES)
+FEATURES = ["age", "gender", "height", "weight", "ap_hi", "ap_lo",
+            "cholesterol", "gluc", "smoke", "alco", "active"]
+
+# Ages above this are taken as days (cardio_train.csv layout)
+AGE_DAYS_ABOVE = 150
+
+RISK_BINS = np.linspace(0.0, 1.0, 21)
+AGE_EDGES = [40, 50, 60]
+AGE_BANDS = ["<40", "40-49", "50-59", "60+"]
+
+
+class CohortError(ValueError):
+    pass
+
+
+def read_chunks(upload, chunk_rows=CHUNK_ROWS):
+    # Yields DataFrame chunks of an uploaded CSV (',' ';' or tab separated)
+    # or Excel file, with lower-cased column names
+    name = upload.name.lower()
+    if name.endswith(".xlsx"):
+        try:
+            frame = pd.read_excel(upload)
+        except ImportError:
+            raise CohortError("Reading Excel files needs openpyxl; upload a CSV instead.")
+        frame.columns = [str(c).strip().lower() for c in frame.columns]
+        for start in range(0, len(frame), chunk_rows):
+            yield frame.iloc[start:start + chunk_rows]
+        return
+
+    head = upload.read(4096).decode("utf-8", errors="ignore").split("\n", 1)[0]
+    upload.seek(0)
+    sep = max([",", ";", "\t"], key=head.count)
+    for chunk in pd.read_csv(upload, sep=sep, chunksize=chunk_rows, dtype=str, skipinitialspace=True):
+        chunk.columns = [str(c).strip().lower() for c in chunk.columns]
+        yield chunk
+
+
+def count_rows(upload):
+    # Data rows of the upload for the progress bar, without parsing it
+    # (None if unknown)
+    if upload.name.lower().endswith(".xlsx"):
+        try:
+            from openpyxl import load_workbook
+        except ImportError:
+            return None
+        rows = load_workbook(upload, read_only=True).active.max_row
+        upload.seek(0)
+        return max(rows - 1, 0) if rows else None
+    data = upload.getvalue()
+    return max(data.count(b"\n") - 1 + (not data.endswith(b"\n")), 0)
+
+
+def check_columns(columns):
+    missing = [name for name in FEATURES if name not in columns]
+    if missing:
+        raise CohortError(f"Missing columns: {', '.join(missing)}")
+
+
+def encode(chunk):
+    # Returns (X, errors): an (n, 11) float frame in FEATURES order, NaN
+    # where a value is missing or invalid, and one error string per row
+    # ("" for valid rows)
+    X = pd.DataFrame(index=chunk.index, columns=FEATURES, dtype=np.float64)
+    errors = pd.Series("", index=chunk.index, dtype=object)
+    for name in FEATURES:
+        raw = chunk[name]
+        if name in CATEGORIES:
+            text = raw.astype(str).str.strip().str.lower().str.replace(r"\.0$", "", regex=True)
+            values = text.map(CATEGORIES[name]).astype(np.float64)
+        else:
+            values = pd.to_numeric(raw, errors="coerce")
+            if name == "age":
+                # Completed years, as flask_backend/features.py age_days_to_years
+                values = values.where(values <= AGE_DAYS_ABOVE, np.floor(values / 365.25))
+            low, high = BOUNDS[name]
+            values = values.where(values.between(low, high))
+        bad = values.isna()
+        if bad.any():
+            errors.loc[bad] += f"{name}; "
+        X[name] = values
+    failed = errors != ""
+    errors.loc[failed] = "invalid " + errors[failed].str[:-2]
+    return X.to_numpy(), errors.to_numpy()
+
+
+def encode_arrow(X):
+    import pyarrow as pa
+    table = pa.table({name: X[:, j] for j, name in enumerate(FEATURES)})
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+
+def decode_arrow(body):
+    # Returns (risk, errors, insight bits, insight codes, model version)
+    import pyarrow as pa
+    table = pa.ipc.open_stream(body).read_all()
+    prediction = table.column("prediction").to_numpy(zero_copy_only=False)
+    probability = table.column("probability").to_numpy(zero_copy_only=False)
+    # The backend returns the probability of the predicted class
+    risk = np.where(prediction == 1, probability, 1.0 - probability)
+    errors = np.array(table.column("error").to_pylist(), dtype=object)
+    metadata = table.schema.metadata or {}
+    codes = metadata.get(b"insight_codes", b"").decode()
+    bits = (table.column("insights").fill_null(0).to_numpy().astype(np.uint16)
+            if "insights" in table.column_names else np.zeros(len(table), dtype=np.uint16))
+    return risk, errors, bits, codes.split(",") if codes else [], metadata.get(b"model_version", b"").decode()
+
+
+def encode_records(X):
+    # JSON fallback: one patient object per row, null where a value is invalid
+    return [{name: (None if v != v else v) for name, v in zip(FEATURES, row)} for row in X.tolist()]
+
+
+def decode_json(body):
+    # Same as decode_arrow for a JSON /predict/batch answer
+    results = body["results"]
+    risk = np.array([np.nan if r.get("status") != "success" else
+                     r["probability"] if r["prediction"] == 1 else 1.0 - r["probability"] for r in results])
+    errors = np.array([r.get("error") for r in results], dtype=object)
+    codes = sorted({code for r in results for code in r.get("insights", [])})
+    bits = np.array([sum(1 << codes.index(code) for code in r.get("insights", [])) for r in results],
+                    dtype=np.uint16)
+    return risk, errors, bits, codes, body.get("model_version") or ""
+
+
+def submit(client, X, arrow=True):
+    # Start scoring one encoded chunk, returns the Future of the response
+    if arrow:
+        return client.submit("POST", "/predict/batch", data=encode_arrow(X),
+                             headers={"Content-Type": ARROW_MIMETYPE, "Accept": ARROW_MIMETYPE})
+    return client.submit("POST", "/predict/batch", json=encode_records(X))
+
+
+class Summary:
+    # Running aggregates of a scored cohort; fixed size whatever the cohort
+
+    def __init__(self):
+        self.rows = 0
+        self.scored = 0
+        self.high = 0
+        self.risk_sum = 0.0
+        self.histogram = np.zeros(len(RISK_BINS) - 1, dtype=np.int64)
+        self.bands = np.zeros((len(AGE_BANDS), 2), dtype=np.int64)  # low / high risk
+        self.insights = {}
+        self.model_version = None
+
+    def add(self, risk, age, bits, codes):
+        valid = ~np.isnan(risk)
+        risk, age, bits = risk[valid], age[valid], bits[valid]
+        high = risk > 0.5
+        self.scored += len(risk)
+        self.high += int(high.sum())
+        self.risk_sum += float(risk.sum())
+        self.histogram += np.histogram(risk, RISK_BINS)[0]
+        np.add.at(self.bands, (np.digitize(age, AGE_EDGES), high.astype(np.intp)), 1)
+        for j, code in enumerate(codes):
+            self.insights[code] = self.insights.get(code, 0) + int(np.count_nonzero(bits & (1 << j)))
+
+    @property
+    def errors(self):
+        return self.rows - self.scored
+
+
+def score(client, upload, on_progress=None, chunk_rows=CHUNK_ROWS, max_in_flight=MAX_IN_FLIGHT):
+    # Score an uploaded cohort. Returns (Summary, path of the results CSV).
+    # on_progress(rows_done, summary) is called after every chunk.
+    summary = Summary()
+    out = tempfile.NamedTemporaryFile("w", suffix=".csv", prefix="cohort-", delete=False, newline="")
+    pending = deque()
+    header, done, arrow = True, 0, True
+
+    def finish():
+        # Wait for the oldest chunk, then aggregate it and append it to the file
+        nonlocal header, done, arrow
+        chunk, X, errors, sent_arrow, future = pending.popleft()
+        response = future.result()
+        if response.status_code == 415 and sent_arrow:
+            # Backend without pyarrow: score this and all further chunks as JSON
+            arrow = False
+            response = submit(client, X, arrow=False).result()
+        if response.status_code != 200:
+            raise CohortError(f"Backend answered {response.status_code}: {response.text[:200]}")
+        if response.headers.get("Content-Type", "").startswith(ARROW_MIMETYPE):
+            risk, backend_errors, bits, codes, version = decode_arrow(response.content)
+        else:
+            risk, backend_errors, bits, codes, version = decode_json(response.json())
+        summary.model_version = version or summary.model_version
+        summary.add(risk, X[:, FEATURES.index("age")], bits, codes)
+        result = chunk.copy()
+        result["risk"] = np.round(risk, 4)
+        result["prediction"] = np.where(np.isnan(risk), "", np.where(risk > 0.5, "High", "Low"))
+        result["insights"] = [" ".join(code for j, code in enumerate(codes) if b >> j & 1) for b in bits.tolist()]
+        result["error"] = np.where(errors != "", errors, np.where(pd.isna(backend_errors), "", backend_errors))
+        result.to_csv(out, index=False, header=header)
+        header, done = False, done + len(chunk)
+        if on_progress:
+            on_progress(done, summary)
+
+    try:
+        for chunk in read_chunks(upload, chunk_rows):
+            check_columns(chunk.columns)
+            X, errors = encode(chunk)
+            summary.rows += len(chunk)
+            # Rows that fail validation go out as NaN and come back as errors
+            pending.append((chunk, X, errors, arrow, submit(client, X, arrow)))
+            if len(pending) >= max_in_flight:
+                finish()
+        while pending:
+            finish()
+    except Exception:
+        for *_, future in pending:
+            future.cancel()
+        out.close()
+        os.unlink(out.name)
+        raise
+    out.close()
+    return summary, out.name
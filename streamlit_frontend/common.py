@@ -0,0 +1,73 @@
+"""Helpers shared by the pages in views/."""
+import os
+
+import requests
+import streamlit as st
+
+import profiler
+from api_client import ApiClient, api_url
+
+STATIC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "static")
+
+
+@st.cache_resource
+def load_css():
+    # Global styles, read once per server process
+    with open(os.path.join(STATIC_DIR, "style.css")) as f:
+        return f"<style>\n{f.read()}</style>"
+
+
+@st.cache_resource
+def get_client():
+    # One pooled backend client per server process, shared by all sessions.
+    # URL from CARDIO_API_URL or api_url in .streamlit/secrets.toml.
+    return ApiClient(api_url(st.secrets), observer=profiler.record_call if profiler.ENABLED else None)
+
+
+def json_or_none(response):
+    # Body of a successful call, None for errors and failed connections
+    if isinstance(response, Exception) or response.status_code != 200:
+        return None
+    return response.json()
+
+
+@st.cache_data(ttl=300, show_spinner=False)
+def fetch_coefficients():
+    # Coefficients of the served model, None if the backend can't provide
+    # them (unreachable, or a non-linear model without explanations)
+    try:
+        return json_or_none(get_client().get("/model/coefficients"))
+    except requests.RequestException:
+        return None
+
+
+def figure_from_dict(spec):
+    # Wrap a plotly dict memoized with st.cache_data for st.plotly_chart.
+    # The dict came from Figure.to_dict(), so plotly's validation (most of
+    # the cost of passing a dict) is skipped.
+    import plotly.graph_objects as go
+    return go.Figure(spec, _validate=False)
+
+# Backend feature names -> labels shown in the charts
+FEATURE_LABELS = {
+    "age": "Age", "gender": "Gender", "height": "Height", "weight": "Weight",
+    "ap_hi": "Systolic BP", "ap_lo": "Diastolic BP", "cholesterol": "Cholesterol",
+    "gluc": "Glucose", "smoke": "Smoking", "alco": "Alcohol", "active": "Active", "bmi": "BMI"
+}
+
+# Wording of the insight codes the backend returns (flask_backend/insights.py)
+INSIGHT_TEXT = {
+    "BMI_OBESE": "<b>Weight Management:</b> BMI of {bmi:.1f} indicates obesity. This significantly increases heart workload.",
+    "BMI_OVERWEIGHT": "<b>Weight Management:</b> BMI of {bmi:.1f} indicates you are overweight. Monitor caloric intake.",
+    "BP_ABOVE_TARGET": "<b>Blood Pressure:</b> Readings ({ap_hi}/{ap_lo}) are above ideal levels (Target: &lt;120/80).",
+    "CHOLESTEROL_HIGH": "<b>Cholesterol:</b> {cholesterol} levels detected. High cholesterol can lead to plaque buildup.",
+    "GLUCOSE_HIGH": "<b>Glucose:</b> {gluc} levels may indicate metabolic risk or diabetes.",
+    "SMOKER": "<b>Smoking:</b> Major risk factor. Cessation is the single best step for heart health.",
+    "ALCOHOL": "<b>Alcohol:</b> Limit consumption to reduce cardiovascular stress.",
+    "INACTIVE": "<b>Physical Activity:</b> Sedentary lifestyle contributes to risk. Aim for 150 mins/week of moderate activity."
+}
+INSIGHT_LABELS = {
+    "BMI_OBESE": "Obese (BMI ≥ 30)", "BMI_OVERWEIGHT": "Overweight (BMI 25-30)",
+    "BP_ABOVE_TARGET": "BP above 120/80", "CHOLESTEROL_HIGH": "High cholesterol",
+    "GLUCOSE_HIGH": "High glucose", "SMOKER": "Smoker", "ALCOHOL": "Alcohol", "INACTIVE": "Inactive"
+}
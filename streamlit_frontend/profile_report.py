@@ -0,0 +1,128 @@
+"""Per-page rerun cost from the rerun profiler's log (see profiler.py).
+
+Reads the JSONL log written with CARDIO_PROFILE=1 and prints, per page, the
+p50/p95/max of the whole script run, of the backend calls it waited on and
+of every section, across all sessions in the log. Runs that imported the
+page's module (the first visit per server process) are left out unless
+--cold is given.
+
+    python profile_report.py profile.jsonl
+    python profile_report.py profile.jsonl --budget 150 --budget risk=600 --json
+
+With --budget (milliseconds, for all pages or as page=ms), pages whose p95
+exceeds their budget are listed and the exit status is 1, so the report
+can gate a change.
+"""
+import argparse
+import json
+import os
+import sys
+from collections import defaultdict
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+def percentile(values, q):
+    # Nearest-rank percentile, as in bench_pages.py
+    values = sorted(values)
+    return values[min(int(len(values) * q), len(values) - 1)]
+
+
+def stats(values):
+    return {'p50_ms': percentile(values, 0.5), 'p95_ms': percentile(values, 0.95), 'max_ms': max(values)}
+
+
+def read_log(path, cold=False):
+    # Records per page; unreadable lines (e.g. a run cut off mid-write) are skipped
+    pages = defaultdict(list)
+    skipped = 0
+    with open(path) as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                skipped += 1
+                continue
+            if record.get('cold') and not cold:
+                continue
+            pages[record['page']].append(record)
+    if skipped:
+        print(f"Warning: skipped {skipped} unreadable lines in {path}", file=sys.stderr)
+    return pages
+
+
+def summarize(records):
+    sections = defaultdict(list)
+    for record in records:
+        for name, ms in record['sections'].items():
+            sections[name].append(ms)
+    return dict(
+        runs=len(records),
+        sessions=len({record['session'] for record in records}),
+        **stats([record['total_ms'] for record in records]),
+        backend=stats([sum(call['ms'] for call in record['calls']) for record in records]),
+        calls=sum(len(record['calls']) for record in records),
+        sections={name: stats(values) for name, values in sections.items()}
+    )
+
+
+def parse_budgets(items):
+    # ["150", "risk=600"] -> (default, {page: ms})
+    default, budgets = None, {}
+    for item in items:
+        page, _, ms = item.rpartition('=')
+        if page:
+            budgets[page] = float(ms)
+        else:
+            default = float(ms)
+    return default, budgets
+
+
+def print_report(report):
+    print(f"{'page':<15}{'runs':>6}{'sessions':>10}{'p50 ms':>10}{'p95 ms':>10}{'max ms':>10}"
+          f"{'backend p95':>13}  budget")
+    for page, s in report['pages'].items():
+        budget = s.get('budget_ms')
+        verdict = '' if budget is None else f"{budget:.0f} {'OVER' if s['over_budget'] else 'ok'}"
+        print(f"{page:<15}{s['runs']:>6}{s['sessions']:>10}{s['p50_ms']:>10.1f}{s['p95_ms']:>10.1f}"
+              f"{s['max_ms']:>10.1f}{s['backend']['p95_ms']:>13.1f}  {verdict}")
+        for name, section in sorted(s['sections'].items(), key=lambda item: -item[1]['p95_ms']):
+            print(f"    {name:<22}p50 {section['p50_ms']:>8.1f}  p95 {section['p95_ms']:>8.1f}"
+                  f"  max {section['max_ms']:>8.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('log', nargs='?', default=os.environ.get('CARDIO_PROFILE_LOG', os.path.join(HERE, 'profile.jsonl')))
+    parser.add_argument('--budget', action='append', default=[], metavar='[PAGE=]MS',
+                        help='p95 budget in ms, for every page or one page (repeatable)')
+    parser.add_argument('--cold', action='store_true', help='include runs that imported the page module')
+    parser.add_argument('--json', action='store_true', help='print the report as JSON')
+    args = parser.parse_args()
+    if not os.path.exists(args.log):
+        print(f"Error: no profile log at {args.log} (run the app with CARDIO_PROFILE=1)")
+        sys.exit(1)
+
+    default, budgets = parse_budgets(args.budget)
+    report = {'log': args.log, 'pages': {}}
+    for page, records in sorted(read_log(args.log, args.cold).items()):
+        summary = summarize(records)
+        budget = budgets.get(page, default)
+        if budget is not None:
+            summary['budget_ms'] = budget
+            summary['over_budget'] = summary['p95_ms'] > budget
+        report['pages'][page] = summary
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print_report(report)
+
+    over = [page for page, s in report['pages'].items() if s.get('over_budget')]
+    if over:
+        print(f"Warning: over budget (p95): {', '.join(over)}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,136 @@
+"""Opt-in rerun profiler for the Streamlit app.
+
+With CARDIO_PROFILE=1 every script run is timed section by section, like
+the backend's per-stage timers: frontend_app.py starts a RerunProfile, the
+pages call mark("section") at the end of each section (the time since the
+previous mark), and every backend call made through the ApiClient is
+recorded with its path, status and duration (including calls running on
+the client's thread pool). At the end of the run the breakdown is shown in
+a collapsed debug panel and appended as one JSON line to CARDIO_PROFILE_LOG
+(default streamlit_frontend/profile.jsonl):
+
+    CARDIO_PROFILE=1 streamlit run frontend_app.py
+    python profile_report.py profile.jsonl --budget 150 --budget risk=600
+
+Disabled (the default), mark() and the client hook are no-ops.
+"""
+import json
+import os
+import threading
+import time
+import uuid
+from contextvars import ContextVar
+
+ENABLED = os.environ.get("CARDIO_PROFILE", "0") == "1"
+LOG_PATH = os.environ.get("CARDIO_PROFILE_LOG",
+                          os.path.join(os.path.dirname(os.path.abspath(__file__)), "profile.jsonl"))
+
+_log_lock = threading.Lock()
+
+
+class RerunProfile:
+    # Section times of one script run plus the backend calls it made;
+    # calls may be recorded from the ApiClient's pool threads
+
+    def __init__(self, page, session, rerun):
+        self.page = page
+        self.session = session
+        self.rerun = rerun
+        self.sections = {}
+        self.calls = []
+        self._lock = threading.Lock()
+        self.started_at = time.time()
+        self.start = self.last = time.perf_counter()
+
+    def mark(self, section):
+        now = time.perf_counter()
+        self.sections[section] = self.sections.get(section, 0.0) + (now - self.last) * 1000
+        self.last = now
+
+    def call(self, method, path, status, seconds):
+        with self._lock:
+            self.calls.append({"method": method, "path": path, "status": status, "ms": seconds * 1000})
+
+    def finish(self, cold=False):
+        # Time after the last mark goes to "rest"; returns the log record.
+        # cold: the page's module was imported in this run.
+        self.mark("rest")
+        return {
+            "ts": self.started_at,
+            "session": self.session,
+            "rerun": self.rerun,
+            "page": self.page,
+            "cold": cold,
+            "total_ms": (self.last - self.start) * 1000,
+            "sections": self.sections,
+            "calls": list(self.calls)
+        }
+
+
+class _NullProfile:
+    __slots__ = ()
+
+    def mark(self, section):
+        pass
+
+    def call(self, method, path, status, seconds):
+        pass
+
+
+NULL_PROFILE = _NullProfile()
+
+# The profile of the script run on this thread. ApiClient.submit copies the
+# context into its pool threads, so their calls land in the same profile.
+_current = ContextVar("cardio_rerun_profile", default=NULL_PROFILE)
+
+
+def start(page, session_state):
+    # Profile this script run (no-op unless CARDIO_PROFILE=1)
+    if not ENABLED:
+        return NULL_PROFILE
+    session = session_state.setdefault("_profile_session", uuid.uuid4().hex[:12])
+    session_state["_profile_reruns"] = session_state.get("_profile_reruns", 0) + 1
+    profile = RerunProfile(page, session, session_state["_profile_reruns"])
+    _current.set(profile)
+    return profile
+
+
+def mark(section):
+    _current.get().mark(section)
+
+
+def record_call(method, path, status, seconds):
+    # ApiClient observer: attributes a backend call to the current run
+    _current.get().call(method, path, status, seconds)
+
+
+def finish(profile, cold=False):
+    # Close the run's profile and append it to the log; returns the record
+    if profile is NULL_PROFILE:
+        return None
+    _current.set(NULL_PROFILE)
+    record = profile.finish(cold)
+    try:
+        with _log_lock, open(LOG_PATH, "a") as f:
+            f.write(json.dumps(record) + "\n")
+    except OSError as e:
+        print(f"Warning: could not write the rerun profile to {LOG_PATH}: {e}")
+    return record
+
+
+def render_panel(st, record):
+    # Collapsed debug panel with the run's breakdown (not itself timed)
+    with st.expander(f"⏱️ Rerun profile: {record['total_ms']:.0f} ms ({record['page']}, run {record['rerun']})"):
+        rows = ["| Section | ms | Share |", "|---|---:|---:|"]
+        total = record["total_ms"] or 1.0
+        for name, ms in record["sections"].items():
+            rows.append(f"| {name} | {ms:.1f} | {ms / total:.0%} |")
+        st.markdown("\n".join(rows))
+        if record["calls"]:
+            rows = ["| Backend call | Status | ms |", "|---|---|---:|"]
+            for call in record["calls"]:
+                rows.append(f"| {call['method']} {call['path']} | {call['status']} | {call['ms']:.1f} |")
+            st.markdown("\n".join(rows))
+        else:
+            st.caption("No backend calls in this run (cached or not needed).")
+        st.caption(f"Appended to {LOG_PATH}; summarize with `python profile_report.py`.")
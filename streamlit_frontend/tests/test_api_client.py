@@ -0,0 +1,97 @@
+import pytest
+import requests
+
+from api_client import ApiClient, CircuitBreaker, CircuitOpenError
+
+
+class FakeResponse:
+
+    def __init__(self, status_code):
+        self.status_code = status_code
+
+
+def client_with(outcomes, threshold=1):
+    # ApiClient whose session answers with the given responses/exceptions in
+    # order; no retries and an immediately half-open breaker
+    client = ApiClient('http://backend', retries=0, backoff=0,
+                       breaker=CircuitBreaker(failure_threshold=threshold, reset_seconds=0))
+    outcomes = list(outcomes)
+
+    def request(method, url, **kwargs):
+        outcome = outcomes.pop(0)
+        if isinstance(outcome, BaseException):
+            raise outcome
+        return outcome
+
+    client.session.request = request
+    return client
+
+
+@pytest.mark.parametrize('error', [requests.exceptions.ChunkedEncodingError('cut off'),
+                                   requests.exceptions.InvalidURL('bad'), ValueError('bad argument')])
+def test_half_open_trial_is_settled_by_any_error(error):
+    client = client_with([requests.ConnectionError('down'), error, FakeResponse(200)])
+    with pytest.raises(requests.ConnectionError):
+        client.get('/health')
+    assert client.breaker.state == 'half-open'
+    with pytest.raises(type(error)):
+        client.get('/health')
+    # The next call is let through as a trial again, and closes the breaker
+    assert client.get('/health').status_code == 200
+    assert client.breaker.state == 'closed'
+
+
+class Clock:
+
+    def __init__(self, monkeypatch):
+        self.now = 1000.0
+        monkeypatch.setattr('api_client.time.monotonic', lambda: self.now)
+
+
+def test_breaker_opens_after_consecutive_failures(monkeypatch):
+    clock = Clock(monkeypatch)
+    breaker = CircuitBreaker(failure_threshold=3, reset_seconds=30)
+    for _ in range(2):
+        breaker.failure()
+    assert breaker.state == 'closed'
+    breaker.success()
+    for _ in range(3):
+        breaker.failure()
+    assert breaker.state == 'open'
+    assert not breaker.allow()
+    clock.now += 30
+    assert breaker.state == 'half-open'
+
+
+def test_half_open_lets_one_trial_through(monkeypatch):
+    clock = Clock(monkeypatch)
+    breaker = CircuitBreaker(failure_threshold=1, reset_seconds=30)
+    breaker.failure()
+    clock.now += 30
+    assert breaker.allow()
+    assert not breaker.allow()
+    # A failed trial reopens for another reset period
+    breaker.failure()
+    assert breaker.state == 'open'
+    clock.now += 30
+    assert breaker.allow()
+    breaker.success()
+    assert breaker.state == 'closed'
+    assert breaker.allow() and breaker.allow()
+
+
+def test_open_breaker_fails_fast():
+    client = client_with([requests.ConnectionError('down')])
+    client.breaker.reset_seconds = 60
+    with pytest.raises(requests.ConnectionError):
+        client.get('/health')
+    # No outcome left: a call reaching the session would fail with IndexError
+    with pytest.raises(CircuitOpenError):
+        client.get('/health')
+
+
+def test_retries_server_errors_then_succeeds():
+    client = client_with([FakeResponse(503), FakeResponse(200)], threshold=5)
+    client.retries = 1
+    assert client.get('/health').status_code == 200
+    assert client.breaker.failures == 0
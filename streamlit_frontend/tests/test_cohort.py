@@ -0,0 +1,67 @@
+import io
+from concurrent.futures import Future
+
+import numpy as np
+import pandas as pd
+
+import cohort
+
+CSV = ("age,gender,height,weight,ap_hi,ap_lo,cholesterol,gluc,smoke,alco,active\n"
+       "50,Male,170,80,130,85,Normal,Normal,No,No,Yes\n"
+       "18393,Female,165,64,130,70,3,1,0,0,0\n"
+       "x,Male,170,80,130,85,Normal,Normal,No,No,Yes\n")
+
+
+class Upload(io.BytesIO):
+    name = "cohort.csv"
+
+
+class FakeResponse:
+
+    def __init__(self, status_code, body=None):
+        self.status_code = status_code
+        self.headers = {"Content-Type": "application/json"}
+        self.text = ""
+        self._body = body
+
+    def json(self):
+        return self._body
+
+
+class JsonOnlyBackend:
+    # Answers 415 to Arrow uploads, like a backend without pyarrow
+
+    def __init__(self):
+        self.calls = []
+
+    def submit(self, method, path, json=None, data=None, headers=None):
+        self.calls.append("json" if json is not None else "arrow")
+        future = Future()
+        if json is None:
+            future.set_result(FakeResponse(415))
+        else:
+            results = [{"status": "success", "prediction": 1, "probability": 0.8, "insights": ["SMOKER"]}
+                       if row["age"] is not None else {"status": "error", "error": "Invalid value"}
+                       for row in json]
+            future.set_result(FakeResponse(200, {"results": results, "model_version": "v1"}))
+        return future
+
+
+def test_falls_back_to_json_without_pyarrow():
+    backend = JsonOnlyBackend()
+    summary, path = cohort.score(backend, Upload(CSV.encode()), chunk_rows=1, max_in_flight=1)
+    # Only the first chunk is tried as Arrow
+    assert backend.calls == ["arrow", "json", "json", "json"]
+    assert (summary.rows, summary.scored, summary.model_version) == (3, 2, "v1")
+    assert summary.insights == {"SMOKER": 2}
+    result = pd.read_csv(path)
+    assert result["risk"].tolist()[:2] == [0.8, 0.8]
+    assert result["error"].fillna("").tolist()[2] == "invalid age"
+
+
+
+def test_age_in_days_is_completed_years():
+    X, errors = cohort.encode(pd.DataFrame({name: ["1"] for name in cohort.FEATURES}).assign(
+        age=["18393"], height=["170"], weight=["80"], ap_hi=["130"], ap_lo=["85"]))
+    assert X[0, cohort.FEATURES.index("age")] == 50
+    assert errors.tolist() == [""]
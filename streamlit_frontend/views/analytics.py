@@ -0,0 +1,56 @@
+"""Model Analytics: performance and coefficients of the served model."""
+import pandas as pd
+import plotly.express as px
+import streamlit as st
+
+import profiler
+from common import FEATURE_LABELS, fetch_coefficients, figure_from_dict
+
+
+@st.cache_data(max_entries=8, show_spinner=False)
+def coefficient_figure(model_version, _coefficients):
+    # Built once per model version, memoized as a plotly dict
+    coef_data = pd.DataFrame({
+        "Feature": [FEATURE_LABELS.get(f["feature"], f["feature"]) for f in _coefficients["features"]],
+        "Weight": [f["coefficient"] for f in _coefficients["features"]]
+    }).sort_values(by="Weight", ascending=True)
+
+    fig_coef = px.bar(coef_data, x="Weight", y="Feature", orientation='h',
+                     color="Weight", color_continuous_scale="RdBu_r")
+    fig_coef.update_layout(plot_bgcolor="rgba(0,0,0,0)", font_color="#475569")
+    return fig_coef.to_dict()
+
+
+def render():
+    st.markdown('<div class="animate__animated animate__fadeInUp">', unsafe_allow_html=True)
+    st.title("Model Analytics")
+    st.markdown('<p class="subtitle">Logistic Regression Performance & Metrics</p>', unsafe_allow_html=True)
+
+    # Performance
+    
+    st.subheader("📊 Performance Metrics")
+    c1, c2, c3, c4 = st.columns(4)
+    with c1: st.metric("Accuracy", "73.2%", delta="Test Set")
+    with c2: st.metric("ROC-AUC", "0.73")
+    with c3: st.metric("Specificity", "0.70")
+    with c4: st.metric("Sensitivity", "0.68")
+    # st.markdown('</div>', unsafe_allow_html=True)
+    profiler.mark("metrics")
+
+    # Feature Importance (Coefficients approximation for LogReg)
+    # st.markdown('<div class="content-card">', unsafe_allow_html=True)
+    st.subheader("⚖️ Feature Importance (Weights)")
+    st.markdown("Positive values indicate increased risk, negative values indicate protective factors.")
+    
+    # Coefficients of the deployed model (per standard deviation for the
+    # measurements, per level/flag for the categorical features)
+    coefficients = fetch_coefficients()
+    profiler.mark("fetch")
+    if coefficients:
+        st.plotly_chart(figure_from_dict(coefficient_figure(coefficients["model_version"], coefficients)), use_container_width=True)
+        st.caption(f"Model version {coefficients['model_version']}")
+    else:
+        st.info("Model coefficients are unavailable right now (the backend is unreachable or serves a non-linear model).")
+    st.markdown('</div>', unsafe_allow_html=True)
+    st.markdown("</div>", unsafe_allow_html=True)
+    profiler.mark("coefficients")
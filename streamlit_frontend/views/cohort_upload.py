@@ -0,0 +1,110 @@
+"""Cohort Upload: score a CSV or Excel file of patients."""
+import os
+import time
+
+import numpy as np
+import pandas as pd
+import plotly.express as px
+import requests
+import streamlit as st
+
+import cohort
+import profiler
+from common import INSIGHT_LABELS, get_client
+
+
+def render():
+    st.markdown('<div class="animate__animated animate__fadeIn">', unsafe_allow_html=True)
+    st.title("Cohort Assessment")
+    st.markdown('<p class="subtitle">Score a whole patient list at once</p>', unsafe_allow_html=True)
+
+    st.markdown(f"""
+    Upload a CSV or Excel file with one patient per row and the columns
+    `{', '.join(cohort.FEATURES)}`. Categorical columns take the labels of the risk form
+    (e.g. `Male`, `Well Above Normal`, `Yes`) or their codes; age may be in years or days.
+    Rows outside the form's ranges are reported in the results instead of being scored.
+    """)
+    upload = st.file_uploader("Patient file", type=["csv", "xlsx"])
+    profiler.mark("upload")
+
+    if upload is not None and st.button("Score Cohort", type="primary"):
+        # Results of an earlier upload are replaced
+        previous = st.session_state.pop("cohort", None)
+        if previous and os.path.exists(previous["path"]):
+            os.unlink(previous["path"])
+
+        total = cohort.count_rows(upload)
+        progress = st.progress(0.0, text="Scoring patients...")
+
+        def show_progress(done, summary):
+            if total:
+                progress.progress(min(done / total, 1.0), text=f"Scored {done:,} of {total:,} patients")
+            else:
+                progress.progress(0.0, text=f"Scored {done:,} patients")
+
+        started = time.perf_counter()
+        try:
+            summary, path = cohort.score(get_client(), upload, show_progress)
+            st.session_state.cohort = {"file": upload.name, "summary": summary, "path": path,
+                                       "seconds": time.perf_counter() - started}
+        except cohort.CohortError as e:
+            st.error(str(e))
+        except requests.RequestException:
+            st.error("Prediction service unavailable.")
+        progress.empty()
+        profiler.mark("scoring")
+
+    scored = st.session_state.get("cohort")
+    if scored:
+        summary = scored["summary"]
+        st.caption(f"{scored['file']}: {summary.rows:,} patients in {scored['seconds']:.1f}s"
+                   + (f" · model {summary.model_version}" if summary.model_version else ""))
+        c1, c2, c3, c4 = st.columns(4)
+        with c1: st.metric("Patients Scored", f"{summary.scored:,}")
+        with c2: st.metric("High Risk", f"{summary.high / max(summary.scored, 1) * 100:.1f}%")
+        with c3: st.metric("Mean Risk", f"{summary.risk_sum / max(summary.scored, 1) * 100:.1f}%")
+        with c4: st.metric("Rejected Rows", f"{summary.errors:,}")
+        profiler.mark("metrics")
+
+        if summary.scored:
+            col_a, col_b = st.columns(2)
+            with col_a:
+                st.subheader("📊 Risk Distribution")
+                fig_hist = px.bar(
+                    x=(cohort.RISK_BINS[:-1] + 0.025) * 100, y=summary.histogram,
+                    labels={"x": "Estimated risk (%)", "y": "Patients"},
+                    color=cohort.RISK_BINS[:-1] >= 0.5, color_discrete_map={True: "#EF4444", False: "#10B981"}
+                )
+                fig_hist.update_layout(plot_bgcolor="rgba(0,0,0,0)", showlegend=False, bargap=0.05)
+                st.plotly_chart(fig_hist, use_container_width=True)
+            with col_b:
+                st.subheader("👥 High Risk by Age")
+                band_df = pd.DataFrame({
+                    "Age Band": cohort.AGE_BANDS * 2,
+                    "Group": ["Low risk"] * len(cohort.AGE_BANDS) + ["High risk"] * len(cohort.AGE_BANDS),
+                    "Patients": np.concatenate([summary.bands[:, 0], summary.bands[:, 1]])
+                })
+                fig_band = px.bar(band_df, x="Age Band", y="Patients", color="Group",
+                                  color_discrete_map={"Low risk": "#10B981", "High risk": "#EF4444"})
+                fig_band.update_layout(plot_bgcolor="rgba(0,0,0,0)")
+                st.plotly_chart(fig_band, use_container_width=True)
+
+            if summary.insights:
+                st.subheader("💡 Most Common Risk Factors")
+                insight_df = pd.DataFrame({
+                    "Risk Factor": [INSIGHT_LABELS.get(code, code) for code in summary.insights],
+                    "Share": [count / summary.scored * 100 for count in summary.insights.values()]
+                }).sort_values("Share")
+                fig_ins = px.bar(insight_df, x="Share", y="Risk Factor", orientation="h",
+                                 labels={"Share": "Patients (%)"}, color_discrete_sequence=["#3B82F6"])
+                fig_ins.update_layout(plot_bgcolor="rgba(0,0,0,0)")
+                st.plotly_chart(fig_ins, use_container_width=True)
+            profiler.mark("charts")
+
+        if os.path.exists(scored["path"]):
+            with open(scored["path"], "rb") as f:
+                st.download_button("⬇️ Download Results (CSV)", f, type="primary",
+                                   file_name=f"{os.path.splitext(scored['file'])[0]}_scored.csv", mime="text/csv")
+            profiler.mark("download")
+
+    st.markdown("</div>", unsafe_allow_html=True)
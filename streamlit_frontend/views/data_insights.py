@@ -0,0 +1,253 @@
+"""Feature Relations: how the features relate to the outcome.
+
+The figures are built from the dataset aggregates the backend computes at
+training time (GET /model/aggregates, see flask_backend/aggregates.py).
+Each figure is memoized as a plotly dict per (dataset_hash, model_version),
+so a rerun costs a cache lookup; a new model or dataset gets new figures.
+"""
+import pandas as pd
+import plotly.express as px
+import plotly.graph_objects as go
+import requests
+import streamlit as st
+
+import profiler
+from common import FEATURE_LABELS, figure_from_dict, get_client, json_or_none
+
+# Shown while the served model has no aggregates (or the backend is
+# unreachable): the numbers from the original analysis, in the same shape
+ILLUSTRATIVE = {
+    "dataset_hash": "illustrative",
+    "model_version": None,
+    "rows": None,
+    "correlations": {"age": 0.24, "cholesterol": 0.22, "weight": 0.18, "gluc": 0.09, "ap_hi": 0.05,
+                     "ap_lo": 0.06, "smoke": -0.02, "active": -0.04, "alco": -0.01},
+    "age_risk": {"bands": ["30-39", "40-49", "50-59", "60-69", "70+"], "patients": None,
+                 "disease_rate": [0.2, 0.35, 0.55, 0.75, 0.85], "mean_risk": [0.2, 0.35, 0.55, 0.75, 0.85]},
+    "lifestyle": {
+        "smoke": {"values": [0, 1], "patients": None, "disease_rate": None, "mean_risk": [0.49, 0.52]},
+        "alco": {"values": [0, 1], "patients": None, "disease_rate": None, "mean_risk": [0.50, 0.51]},
+        "active": {"values": [0, 1], "patients": None, "disease_rate": None, "mean_risk": [0.54, 0.48]}
+    },
+    # 5/25/50/75/95% points of N(115, 10), N(135, 15), N(70, 8) and N(85, 10)
+    "blood_pressure": {
+        "quantiles": [0.05, 0.25, 0.5, 0.75, 0.95],
+        "ap_hi": {"0": [98.6, 108.3, 115.0, 121.7, 131.4], "1": [110.3, 124.9, 135.0, 145.1, 159.7]},
+        "ap_lo": {"0": [56.8, 64.6, 70.0, 75.4, 83.2], "1": [68.6, 78.3, 85.0, 91.7, 101.4]}
+    }
+}
+
+# (label for 0, label for 1, colour category) per lifestyle flag
+LIFESTYLE_LABELS = {
+    "smoke": ("Non-Smoker", "Smoker", "Smoke"),
+    "alco": ("Non-Drinker", "Drinker", "Alcohol"),
+    "active": ("Inactive", "Active", "Activity")
+}
+
+
+@st.cache_data(ttl=300, show_spinner=False)
+def fetch_aggregates():
+    # Aggregates of the served model's dataset, None if it has none
+    try:
+        return json_or_none(get_client().get("/model/aggregates"))
+    except requests.RequestException:
+        return None
+
+
+# The figure builders are keyed by (dataset_hash, model_version); the
+# aggregates themselves are not hashed (leading underscore)
+
+
+@st.cache_data(max_entries=8, show_spinner=False)
+def correlation_figure(dataset_hash, model_version, _aggregates):
+    corr_data = pd.DataFrame({
+        "Feature": [FEATURE_LABELS.get(name, name) for name in _aggregates["correlations"]],
+        "Correlation": list(_aggregates["correlations"].values())
+    }).dropna().sort_values(by="Correlation", ascending=False)
+
+    fig_corr = px.bar(
+        corr_data,
+        x="Correlation",
+        y="Feature",
+        orientation='h',
+        color="Correlation",
+        color_continuous_scale="RdBu_r",
+        text="Correlation"
+    )
+
+    fig_corr.update_layout(
+        plot_bgcolor="rgba(0,0,0,0)",
+        xaxis_title="Correlation Coefficient (with Target)",
+        yaxis_title=None,
+        height=400,
+        margin=dict(l=0, r=0, t=30, b=0)
+    )
+    fig_corr.update_traces(texttemplate='%{text:.2f}', textposition='outside')
+    return fig_corr.to_dict()
+
+
+@st.cache_data(max_entries=8, show_spinner=False)
+def age_risk_figure(dataset_hash, model_version, _aggregates):
+    # Observed disease rate per age band, the model's mean risk as bars
+    age_risk = _aggregates["age_risk"]
+
+    fig_age = px.line(
+        x=age_risk["bands"],
+        y=age_risk["disease_rate"],
+        markers=True,
+        line_shape='spline',
+        labels={'x': 'Age (Years)', 'y': 'Probability of Disease'}
+    )
+    fig_age.update_traces(line_color='#EF4444', line_width=4)
+    fig_age.add_bar(
+        x=age_risk["bands"],
+        y=age_risk["mean_risk"],
+        opacity=0.2,
+        marker_color='#EF4444',
+        name='Model Risk'
+    )
+    fig_age.update_layout(
+        height=300,
+        margin=dict(l=0, r=0, t=10, b=0),
+        plot_bgcolor="rgba(0,0,0,0)"
+    )
+    return fig_age.to_dict()
+
+
+@st.cache_data(max_entries=8, show_spinner=False)
+def lifestyle_figure(dataset_hash, model_version, _aggregates):
+    rows = []
+    for name, (off, on, category) in LIFESTYLE_LABELS.items():
+        mean_risk = _aggregates["lifestyle"][name]["mean_risk"]
+        rows += [(on, mean_risk[1], category), (off, mean_risk[0], category)]
+    lifestyle_data = pd.DataFrame(rows, columns=["Factor", "Avg Risk Score", "Category"]).dropna()
+
+    fig_life = px.bar(
+        lifestyle_data,
+        x="Factor",
+        y="Avg Risk Score",
+        color="Category",
+        text="Avg Risk Score",
+        color_discrete_map={"Smoke": "#64748B", "Alcohol": "#F59E0B", "Activity": "#10B981"}
+    )
+    fig_life.update_layout(
+        yaxis_range=[lifestyle_data["Avg Risk Score"].min() - 0.1, lifestyle_data["Avg Risk Score"].max() + 0.08],
+        height=300,
+        showlegend=False,
+        margin=dict(l=0, r=0, t=10, b=0),
+        plot_bgcolor="rgba(0,0,0,0)"
+    )
+    fig_life.update_traces(texttemplate='%{text:.2f}', textposition='inside')
+    return fig_life.to_dict()
+
+
+@st.cache_data(max_entries=8, show_spinner=False)
+def blood_pressure_figure(dataset_hash, model_version, _aggregates):
+    # Box plot drawn from precomputed quantiles: whiskers at 5% / 95%
+    bp = _aggregates["blood_pressure"]
+    q = {p: i for i, p in enumerate(bp["quantiles"])}
+    fig_bp = go.Figure()
+    for outcome, group, color in (("0", "Healthy", "#10B981"), ("1", "Disease", "#EF4444")):
+        stats = [bp["ap_hi"].get(outcome), bp["ap_lo"].get(outcome)]
+        if None in stats:
+            # No patients with this outcome in the dataset
+            continue
+        fig_bp.add_trace(go.Box(
+            x=["Systolic", "Diastolic"],
+            lowerfence=[s[q[0.05]] for s in stats],
+            q1=[s[q[0.25]] for s in stats],
+            median=[s[q[0.5]] for s in stats],
+            q3=[s[q[0.75]] for s in stats],
+            upperfence=[s[q[0.95]] for s in stats],
+            name=group,
+            marker_color=color
+        ))
+
+    fig_bp.update_layout(
+        boxmode="group",
+        plot_bgcolor="rgba(0,0,0,0)",
+        yaxis_title="Blood Pressure (mmHg)",
+        xaxis_title=None,
+        height=400,
+        margin=dict(l=0, r=0, t=30, b=0)
+    )
+    return fig_bp.to_dict()
+
+
+def render():
+    st.markdown('<div class="animate__animated animate__fadeIn">', unsafe_allow_html=True)
+    st.title("🧠 Feature Relations & Insights")
+    st.markdown('<p class="subtitle">Deep dive into the factors driving cardiovascular risk</p>', unsafe_allow_html=True)
+
+    aggregates = fetch_aggregates() or ILLUSTRATIVE
+    profiler.mark("fetch")
+    key = (aggregates["dataset_hash"], aggregates["model_version"], aggregates)
+    if aggregates is ILLUSTRATIVE:
+        st.caption("Illustrative figures: the served model has no dataset aggregates (see flask_backend/aggregates.py).")
+    else:
+        st.caption(f"Computed from {aggregates['rows']:,} patients (dataset {aggregates['dataset_hash']}, "
+                   f"model version {aggregates['model_version']})")
+
+    # 1. Correlation Heatmap (Top Predictors)
+    top = sorted((r, name) for name, r in aggregates["correlations"].items() if r is not None)[::-1][:3]
+    top = [f"<b>{FEATURE_LABELS.get(name, name)}</b>" for _, name in top]
+    st.subheader("🔗 Feature Correlations")
+    st.markdown(f"""
+        <div class="content-card">
+            <p style="color: #64748B; margin-bottom: 15px;">
+                This heatmap highlights which features have the strongest relationship with Cardiovascular Disease (Target).
+                {', '.join(top[:-1])}, and {top[-1]} show the strongest positive correlations.
+            </p>
+        </div>
+    """, unsafe_allow_html=True)
+
+    st.plotly_chart(figure_from_dict(correlation_figure(*key)), use_container_width=True)
+    profiler.mark("correlations")
+
+    c1, c2 = st.columns(2)
+
+    # 2. Age Distribution & Risk
+    with c1:
+        st.subheader("📅 Age vs. Disease Risk")
+        st.markdown("""
+        <div style="background: white; padding: 15px; border-radius: 10px; border: 1px solid #E2E8F0; margin-bottom: 20px;">
+            <p style="font-size: 0.9rem; color: #475569;">
+                The risk increases significantly after age <b>50</b>. This chart overlays the disease probability on age distribution.
+            </p>
+        </div>
+        """, unsafe_allow_html=True)
+
+        st.plotly_chart(figure_from_dict(age_risk_figure(*key)), use_container_width=True)
+        profiler.mark("age_risk")
+
+    # 3. Behavioral Risk Factors
+    with c2:
+        st.subheader("🍷 Lifestyle Impact")
+        st.markdown("""
+        <div style="background: white; padding: 15px; border-radius: 10px; border: 1px solid #E2E8F0; margin-bottom: 20px;">
+            <p style="font-size: 0.9rem; color: #475569;">
+                Surprisingly, <b>Smoking</b> and <b>Alcohol</b> show weaker direct correlations in this dataset compared to metabolic factors like Cholesterol.
+            </p>
+        </div>
+        """, unsafe_allow_html=True)
+
+        st.plotly_chart(figure_from_dict(lifestyle_figure(*key)), use_container_width=True)
+        profiler.mark("lifestyle")
+
+
+    # 4. Blood Pressure Impact (Box Plot)
+    st.markdown("<br>", unsafe_allow_html=True)
+    st.subheader("🩸 Blood Pressure Impact")
+    st.markdown("""
+        <div class="content-card">
+            <p style="color: #64748B; margin-bottom: 15px;">
+                Higher Systolic (Ap_Hi) and Diastolic (Ap_Lo) pressures are clear indicators of risk.
+                The range for <b>Cardio Disease</b> patients is visibly higher.
+            </p>
+        </div>
+    """, unsafe_allow_html=True)
+
+    st.plotly_chart(figure_from_dict(blood_pressure_figure(*key)), use_container_width=True)
+    profiler.mark("blood_pressure")
+
+    st.markdown("</div>", unsafe_allow_html=True)
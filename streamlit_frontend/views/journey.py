@@ -0,0 +1,127 @@
+"""Model Journey: preprocessing steps and the models compared."""
+import pandas as pd
+import plotly.express as px
+import streamlit as st
+
+import profiler
+
+
+@st.cache_resource(show_spinner=False)
+def benchmark_figure():
+    # Static chart, built once per server process
+    models = pd.DataFrame({
+        "Model": ["Logistic Regression", "Random Forest", "KNN (K-Nearest Neighbors)"],
+        "Accuracy": [73.2, 73.5, 72.0],
+        "Color": ["#2563EB", "#10B981", "#64748B"] # Highlight the selected model
+    })
+
+    fig_bench = px.bar(
+        models, 
+        x="Accuracy", 
+        y="Model", 
+        orientation='h', 
+        text="Accuracy",
+        color="Model",
+        color_discrete_map={
+            "Logistic Regression": "#2563EB",  # Primary Brand Color
+            "Random Forest": "#10B981",        # Secondary
+            "KNN (K-Nearest Neighbors)": "#94A3B8"
+        }
+    )
+    
+    fig_bench.update_traces(
+        texttemplate='%{text:.1f}%', 
+        textposition='outside',
+        marker_line_color='rgb(255, 255, 255)', 
+        marker_line_width=1.5, 
+        opacity=0.9
+    )
+    
+    fig_bench.update_layout(
+        xaxis_title="Accuracy (%)",
+        xaxis_range=[65, 80],
+        plot_bgcolor="rgba(0,0,0,0)",
+        font_color="#475569",
+        showlegend=False,
+        height=350,
+        margin=dict(l=0, r=0, t=30, b=0)
+    )
+    return fig_bench
+
+
+def render():
+    st.markdown('<div class="animate__animated animate__fadeIn">', unsafe_allow_html=True)
+    st.title("The Model Journey")
+    st.markdown('<p class="subtitle">From raw data to predictive insights</p>', unsafe_allow_html=True)
+
+    # 1. Data Processing Pipeline
+    st.subheader("🛠️ Data Preprocessing Pipeline")
+    st.markdown("""
+    <div class="content-card">
+        <p style="color: #475569; margin-bottom: 20px;">
+            The dataset underwent rigorous cleaning and feature engineering to ensure optimal model performance.
+            Key steps taken in the <b>EDA (Exploratory Data Analysis)</b> phase:
+        </p>
+        <div style="display: flex; flex-direction: column; gap: 15px;">
+            <div style="display: flex; align-items: center; gap: 15px;">
+                <div style="background: #EFF6FF; color: #2563EB; font-weight: bold; padding: 8px 15px; border-radius: 8px; width: 50px; text-align: center;">1</div>
+                <div>
+                    <h5 style="margin:0; color: #1E293B;">Outlier Removal</h5>
+                    <span style="color: #64748B; font-size: 0.9rem;">Filtered erroneous Blood Pressure readings (e.g., Systolic > 400 or < 0).</span>
+                </div>
+            </div>
+            <div style="display: flex; align-items: center; gap: 15px;">
+                <div style="background: #EFF6FF; color: #2563EB; font-weight: bold; padding: 8px 15px; border-radius: 8px; width: 50px; text-align: center;">2</div>
+                <div>
+                    <h5 style="margin:0; color: #1E293B;">Feature Transformation</h5>
+                    <span style="color: #64748B; font-size: 0.9rem;">Converted Age from days to years. Encoded Gender to binary (0/1).</span>
+                </div>
+            </div>
+            <div style="display: flex; align-items: center; gap: 15px;">
+                <div style="background: #EFF6FF; color: #2563EB; font-weight: bold; padding: 8px 15px; border-radius: 8px; width: 50px; text-align: center;">3</div>
+                <div>
+                    <h5 style="margin:0; color: #1E293B;">Feature Engineering</h5>
+                    <span style="color: #64748B; font-size: 0.9rem;">Created <b>BMI (Body Mass Index)</b> feature from Height and Weight to capture obesity trends.</span>
+                </div>
+            </div>
+            <div style="display: flex; align-items: center; gap: 15px;">
+                <div style="background: #EFF6FF; color: #2563EB; font-weight: bold; padding: 8px 15px; border-radius: 8px; width: 50px; text-align: center;">4</div>
+                <div>
+                    <h5 style="margin:0; color: #1E293B;">Data Cleaning</h5>
+                    <span style="color: #64748B; font-size: 0.9rem;">Removed 24 duplicates and handled potential inconsistencies in categorical variables.</span>
+                </div>
+            </div>
+        </div>
+    </div>
+    """, unsafe_allow_html=True)
+
+    st.markdown("<br>", unsafe_allow_html=True)
+
+    profiler.mark("pipeline")
+
+    # 2. Model Benchmarking
+    st.subheader("🏆 Model Benchmarking")
+    st.markdown("Comparison of different algorithms tested during development.")
+
+    fig_bench = benchmark_figure()
+
+    c1, c2 = st.columns([2, 1])
+    with c1:
+        st.plotly_chart(fig_bench, use_container_width=True)
+    with c2:
+        st.markdown("""
+        <div style="background-color: #F8FAFC; padding: 20px; border-radius: 12px; border: 1px solid #E2E8F0; height: 100%;">
+            <h4 style="margin-top:0; color: #2563EB;">Why Logistic Regression?</h4>
+            <p style="font-size: 0.95rem; color: #475569; line-height: 1.6;">
+                Although <b>Random Forest</b> achieved a slightly higher accuracy (73.5%), we selected <b>Logistic Regression</b> (73.2%) for the final deployment because:
+            </p>
+            <ul style="font-size: 0.9rem; color: #475569; padding-left: 20px;">
+                <li style="margin-bottom: 5px;">It offers superior <b>interpretability</b> for clinical explanation.</li>
+                <li style="margin-bottom: 5px;">It is computationally lightweight and faster for real-time inference.</li>
+                <li style="margin-bottom: 5px;">The accuracy trade-off (0.3%) is negligible compared to the gains in transparency.</li>
+            </ul>
+        </div>
+        """, unsafe_allow_html=True)
+    
+    st.markdown("</div>", unsafe_allow_html=True)
+    profiler.mark("benchmark")
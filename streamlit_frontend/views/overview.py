@@ -0,0 +1,79 @@
+"""Overview: what the tool does and why it matters."""
+import streamlit as st
+
+import profiler
+
+
+def render():
+    st.markdown('<div class="animate__animated animate__fadeIn">', unsafe_allow_html=True)
+    st.title("Cardiovascular Health System")
+    st.markdown('<p class="subtitle">Clinical Decision Support System</p>', unsafe_allow_html=True)
+
+    # Hero Card
+    st.markdown("""
+    <div class="content-card">
+        <h3 style="color: #1E293B; margin-top:0;">Precision Risk Analysis</h3>
+        <p style="color: #475569; line-height: 1.7; font-size: 1.05rem;">
+            CardioCare utilizes a calibrated <b>Logistic Regression</b> algorithm to analyze patient vitals and predict cardiovascular risks. 
+            Designed for interpretability and speed, it assists clinicians in early triage and preventative care planning.
+        </p>
+    </div>
+    """, unsafe_allow_html=True)
+
+    profiler.mark("hero")
+
+    # Metrics
+    c1, c2, c3, c4 = st.columns(4)
+    metrics = [
+        ("73.2%", "Accuracy"),
+        ("0.73", "ROC-AUC"),
+        ("70k+", "Records Analyzed"),
+        ("LogReg", "Core Model")
+    ]
+    
+    for i, (col, (val, label)) in enumerate(zip([c1, c2, c3, c4], metrics)):
+        with col:
+            st.markdown(f"""
+            <div class="metric-container animate__animated animate__fadeInUp" style="animation-delay: {i*0.1}s;">
+                <div class="metric-value">{val}</div>
+                <div class="metric-label">{label}</div>
+            </div>
+            """, unsafe_allow_html=True)
+            
+    st.markdown("</div>", unsafe_allow_html=True)
+
+    profiler.mark("metrics")
+
+    # Educational Insights Section
+    st.markdown("<br>", unsafe_allow_html=True)
+    st.subheader("📘 Understanding Cardiovascular Health")
+    
+    col_a, col_b, col_c = st.columns(3)
+    with col_a:
+        st.markdown("""
+        <div style="background: white; padding: 20px; border-radius: 12px; border: 1px solid #E2E8F0; height: 100%;">
+            <h4 style="color: #EF4444; margin-top: 0;">Global Impact</h4>
+            <p style="color: #64748B; font-size: 0.9rem;">
+                Cardiovascular diseases (CVDs) are the leading cause of death globally, taking an estimated <b>17.9 million lives</b> each year.
+            </p>
+        </div>
+        """, unsafe_allow_html=True)
+    with col_b:
+        st.markdown("""
+        <div style="background: white; padding: 20px; border-radius: 12px; border: 1px solid #E2E8F0; height: 100%;">
+            <h4 style="color: #F59E0B; margin-top: 0;">Preventable Risks</h4>
+            <p style="color: #64748B; font-size: 0.9rem;">
+                Most CVDs can be prevented by addressing behavioral risk factors such as tobacco use, unhealthy diet and obesity, physical inactivity and harmful use of alcohol.
+            </p>
+        </div>
+        """, unsafe_allow_html=True)
+    with col_c:
+        st.markdown("""
+        <div style="background: white; padding: 20px; border-radius: 12px; border: 1px solid #E2E8F0; height: 100%;">
+            <h4 style="color: #3B82F6; margin-top: 0;">Silent Symptoms</h4>
+            <p style="color: #64748B; font-size: 0.9rem;">
+                Often, there are no underlying symptoms of the underlying disease of the blood vessels. A heart attack or stroke may be the first warning of underlying disease.
+            </p>
+        </div>
+        """, unsafe_allow_html=True)
+    profiler.mark("education")
@@ -0,0 +1,322 @@
+"""Risk Assessment: score one patient entered in the form."""
+import time
+
+import pandas as pd
+import plotly.express as px
+import plotly.graph_objects as go
+import streamlit as st
+
+import cohort
+import profiler
+from common import FEATURE_LABELS, INSIGHT_TEXT, fetch_coefficients, get_client, json_or_none
+
+# Ages (years) the form accepts; the age sweep covers the same range
+AGE_RANGE = (18, 100)
+
+
+def render():
+    st.markdown('<div class="animate__animated animate__fadeInRight">', unsafe_allow_html=True)
+    st.title("Risk Assessment")
+    st.markdown('<p class="subtitle">Input patient data below</p>', unsafe_allow_html=True)
+
+    with st.container():
+        # Removed explicit .content-card DIV wrapper to fix white box issue
+        # The form itself is now styled as a card via CSS [data-testid="stForm"]
+        st.subheader("1️⃣ Personal Details")
+        c1, c2 = st.columns(2)
+        with c1:
+            age_years = st.number_input("Age (years)", *AGE_RANGE, 50)
+            gender = st.selectbox("Gender", ["Female", "Male"])
+        with c2:
+            height = st.number_input("Height (cm)", 140, 200, 165)
+            weight = st.number_input("Weight (kg)", 40, 160, 70)
+            
+        # Real-time BMI Calculation display
+        bmi =  weight / ((height/100)**2) if height > 0 else 0
+        bmi_color = "#10B981" if 18.5 <= bmi <= 25 else "#F59E0B" if 25 < bmi < 30 else "#EF4444"
+        status = "Normal" if 18.5 <= bmi <= 25 else "Overweight" if 25 < bmi < 30 else "Obese" if bmi >= 30 else "Underweight"
+        
+        st.markdown(f"""
+        <div style="margin: 10px 0; padding:10px; border-radius:8px; background:{bmi_color}15; border:1px solid {bmi_color}; display: flex; align-items: center; justify-content: space-between;">
+            <span style="color:#64748B; font-weight:500;">Body Mass Index </span>
+            <span style="font-size:1.1rem; color:{bmi_color}; font-weight:bold;">{bmi:.1f} ({status})</span>
+        </div>
+        """, unsafe_allow_html=True)
+
+        st.markdown("---")
+        st.subheader("2️⃣ Vitals & Labs")
+        
+        c3, c4 = st.columns(2)
+        with c3:
+            ap_hi = st.number_input("Systolic BP (mmHg)", 80, 220, 120, help="Upper number. Normal < 120")
+            cholesterol = st.selectbox(
+                "Cholesterol Level",
+                options=cohort.LEVELS,
+                help="Normal: <200 | Borderline: 200-239 | High: ≥240"
+            )
+            st.caption("Values: Normal (<200), High (200-239), Very High (≥240)")
+
+        with c4:
+            ap_lo = st.number_input("Diastolic BP (mmHg)", 40, 140, 80, help="Lower number. Normal < 80")
+            gluc = st.selectbox(
+                "Glucose Level",
+                options=cohort.LEVELS,
+                help="Normal: <100 | Prediabetes: 100-125 | Diabetes: ≥126"
+            )
+            st.caption("Values: Normal (<100), Prediabetes (100-125), Diabetes (≥126)")
+
+        st.markdown("---")
+        st.subheader("3️⃣ Lifestyle")
+        
+        c5, c6, c7 = st.columns(3)
+        with c5:
+            st.write("**Activity**")
+            active = st.radio("Physical Activity", ["Yes", "No"], horizontal=True, label_visibility="collapsed")
+        with c6:
+            st.write("**Habits**")
+            smoke = st.checkbox("Smoker")
+        with c7:
+            st.write("**Alcohol**")
+            alco = st.checkbox("Alcohol Consumer")
+
+        st.markdown("<br>", unsafe_allow_html=True)
+        
+        # State management for predicting status
+        if 'predicting' not in st.session_state:
+            st.session_state.predicting = False
+
+        predict_btn = st.button("Run Risk Assessment", type="primary")
+        profiler.mark("form")
+
+        if predict_btn:
+            st.session_state.predicting = True
+        
+        # Logic is now outside the form (since we removed the form)
+        if predict_btn:
+            clicked_at = time.perf_counter()
+            payload = {
+                "age": age_years,
+                "gender": 2 if gender == "Male" else 1,
+                "height": height,
+                "weight": weight,
+                "ap_hi": ap_hi,
+                "ap_lo": ap_lo,
+                "cholesterol": cohort.LEVELS.index(cholesterol) + 1,
+                "gluc": cohort.LEVELS.index(gluc) + 1,
+                "smoke": 1 if smoke else 0,
+                "alco": 1 if alco else 0,
+                "active": 1 if active == "Yes" else 0
+            }
+            sweep_request = {
+                "patient": payload,
+                "sweep": [
+                    {"feature": "ap_hi", "start": 80, "stop": 220, "steps": 71},
+                    {"feature": "weight", "start": 40, "stop": 160, "steps": 61},
+                    # The whole range the form accepts, one point per year
+                    {"feature": "age", "start": AGE_RANGE[0], "stop": AGE_RANGE[1],
+                     "steps": AGE_RANGE[1] - AGE_RANGE[0] + 1},
+                    {"feature": "cholesterol"}
+                ],
+                "grid": ["ap_hi", "weight"]
+            }
+            status_placeholder = st.empty()
+
+            # Only linear models can explain a prediction (/predict answers
+            # 501 for contributions otherwise); their coefficients are served
+            explain = {"contributions": 1, "top_k": 3} if fetch_coefficients() else {}
+
+            try:
+                # Prediction, uncertainty, similar patients and what-if curves
+                # are independent, so they go out in parallel over the pool
+                with st.spinner("Analyzing cardiovascular markers..."):
+                    response, mc_response, similar_response, sweep_response = get_client().gather(
+                        ("POST", "/predict", {"params": explain, "json": payload}),
+                        ("POST", "/predict/uncertainty", {"json": {"patient": payload, "samples": 100000}}),
+                        ("POST", "/similar", {"json": {"patients": [payload], "k": 10}}),
+                        ("POST", "/predict/sweep", {"json": sweep_request})
+                    )
+                profiler.mark("backend")
+                if isinstance(response, Exception):
+                    raise response
+                result = response.json()
+
+                if response.status_code == 200:
+                    is_risk = result['prediction'] == 1
+                    
+                    # Dynamic Styles for Result
+                    accent_color = "#EF4444" if is_risk else "#10B981"
+                    bg_color = "#FEF2F2" if is_risk else "#ECFDF5"
+                    icon_header = "⚠️ Attention: Potential Health Risk" if is_risk else "✅ Great News: Low Health Risk"
+                    
+                    html_content = f"""
+<div class="animate__animated animate__zoomIn" style="background-color: {bg_color}; border: 2px solid {accent_color}; border-radius: 12px; padding: 20px; text-align: center; box-shadow: 0 4px 6px -1px {accent_color}40; margin-top: 10px;">
+<h2 style="color: {accent_color}; font-size: 1.8rem; margin-bottom: 5px;">{icon_header}</h2>
+<p style="font-size: 1.1rem; color: #1E293B; margin-bottom: 25px; line-height: 1.5;">{result['message']}</p>
+<div style="display: inline-block; padding: 8px 16px; background: white; border-radius: 50px; border: 1px solid {accent_color}; box-shadow: 0 1px 2px rgba(0,0,0,0.05); margin-bottom: 10px;">
+<span style="color: #64748B; font-weight: 500; font-size: 0.9rem;">Model Confidence:</span>
+<span style="color: {accent_color}; font-weight: 700; font-size: 1.2rem; margin-left: 5px;">{result['probability']*100:.1f}%</span>
+</div>
+<p style="font-size: 0.85rem; color: #64748B; margin: 0; max-width: 400px; margin-left: auto; margin-right: auto;">
+    This score represents the probability of the predicted outcome based on the statistical pattern in your vitals.
+</p>
+</div>
+"""
+                    st.markdown(html_content, unsafe_allow_html=True)
+
+                    # Where this risk falls among the patients the model was built on
+                    population = result.get('population')
+                    if population and population.get('age_percentile') is not None:
+                        st.markdown(f"""
+                        <p style="text-align: center; color: #475569; font-size: 1rem; margin-top: 12px;">
+                            Your estimated risk is higher than <b>{population['age_percentile']:.0f}%</b> of patients
+                            aged {population['age_band']} ({population['percentile']:.0f}% of all patients).
+                        </p>
+                        """, unsafe_allow_html=True)
+
+                    # How much the estimate moves if the vitals were measured again
+                    mc = json_or_none(mc_response)
+                    if mc:
+                        st.markdown(f"""
+                        <div style="background-color: white; border-radius: 12px; padding: 15px 25px; border: 1px solid #E2E8F0; margin-top: 20px;">
+                            <h4 style="margin-top:0; color: #334155; margin-bottom: 8px;">🎯 Measurement Uncertainty</h4>
+                            <p style="color: #475569; margin: 0; font-size: 1rem; line-height: 1.6;">
+                                Estimated probability of disease: <b>{mc['risk']*100:.1f}%</b>
+                                (likely range {mc['interval']['low']*100:.0f}–{mc['interval']['high']*100:.0f}% given typical
+                                blood pressure, weight and height measurement error).<br>
+                                A repeat measurement would change the result in about <b>{mc['p_label_change']*100:.0f}%</b> of cases.
+                            </p>
+                        </div>
+                        """, unsafe_allow_html=True)
+
+                    # What drove this result: the model's own per-feature contributions
+                    drivers = result.get('top_drivers') or []
+                    if drivers:
+                        driver_items = "".join(
+                            f"<li style='margin-bottom:6px;'><b>{FEATURE_LABELS.get(d['feature'], d['feature'])}</b> "
+                            f"{'raised' if d['contribution'] > 0 else 'lowered'} the estimated risk "
+                            f"<span style='color:#64748B;'>({d['contribution']:+.2f} log-odds)</span></li>"
+                            for d in drivers
+                        )
+                        st.markdown(f"""
+                        <div style="background-color: white; border-radius: 12px; padding: 20px 25px; border: 1px solid #E2E8F0; margin-top: 20px;">
+                            <h4 style="margin-top:0; color: #334155; margin-bottom: 10px;">🔎 What Drove This Result</h4>
+                            <ul style="color: #475569; padding-left: 20px; margin-bottom: 0; font-size: 1rem; line-height: 1.6;">
+                                {driver_items}
+                            </ul>
+                        </div>
+                        """, unsafe_allow_html=True)
+                    
+                    profiler.mark("result")
+
+                    # ----------------------------------------------------------------------
+                    # Detailed Health Analysis Report
+                    # ----------------------------------------------------------------------
+                    # The backend's rule engine returns insight codes, worded here
+                    insight_values = {
+                        "bmi": bmi, "ap_hi": ap_hi, "ap_lo": ap_lo, "cholesterol": cholesterol, "gluc": gluc
+                    }
+                    insights = [
+                        f"<li style='margin-bottom:8px;'>{INSIGHT_TEXT[code].format(**insight_values)}</li>"
+                        for code in result.get('insights', []) if code in INSIGHT_TEXT
+                    ]
+                    
+                    # Positive Reinforcement if no major issues
+                    if not insights:
+                        insights.append("<li style='margin-bottom:8px;'><b>Great Status:</b> Your reported vitals are within healthy ranges! rigorous screening is still recommended periodically.</li>")
+
+                    insights_html = "".join(insights)
+                    
+                    st.markdown(f"""
+                    <div style="background-color: white; border-radius: 12px; padding: 25px; border: 1px solid #E2E8F0; margin-top: 20px; box-shadow: 0 4px 6px -1px rgba(0, 0, 0, 0.05);">
+                        <h4 style="margin-top:0; color: #334155; margin-bottom: 15px; border-bottom: 2px solid #F1F5F9; padding-bottom: 10px;">📋 Clinical Insights</h4>
+                        <ul style="color: #475569; padding-left: 20px; margin-bottom: 0; font-size: 1.05rem; line-height: 1.6;">
+                            {insights_html}
+                        </ul>
+                    </div>
+                    """, unsafe_allow_html=True)
+                    profiler.mark("report")
+
+                    # Similar historical patients and how they fared
+                    similar = json_or_none(similar_response)
+                    similar = similar["results"][0] if similar else None
+                    if similar and similar.get("status") == "success":
+                        with st.expander(f"👥 10 most similar patients: {similar['outcome_rate']*100:.0f}% had cardiovascular disease"):
+                            similar_df = pd.DataFrame([
+                                {**{FEATURE_LABELS.get(k, k): v for k, v in n["features"].items()},
+                                 "Disease": "Yes" if n["outcome"] else "No", "Distance": round(n["distance"], 2)}
+                                for n in similar["neighbors"]
+                            ])
+                            st.dataframe(similar_df.round(1), use_container_width=True, hide_index=True)
+                    profiler.mark("similar")
+
+                    # ----------------------------------------------------------------------
+                    # What-if curves: risk as one vital moves, all points scored in one call
+                    # ----------------------------------------------------------------------
+                    sweep_result = json_or_none(sweep_response)
+
+                    if sweep_result:
+                        st.markdown("#### 📈 What If?")
+                        st.markdown("How the estimated probability of disease changes as one vital moves, everything else unchanged.")
+                        curves = sweep_result["curves"]
+                        tabs = st.tabs([FEATURE_LABELS.get(c["feature"], c["feature"]) for c in curves] + ["BP × Weight"])
+                        for tab, curve in zip(tabs, curves):
+                            with tab:
+                                fig_sweep = px.line(
+                                    x=curve["values"],
+                                    y=curve["risk"],
+                                    markers=len(curve["values"]) <= 5,
+                                    line_shape='spline',
+                                    labels={'x': FEATURE_LABELS.get(curve["feature"], curve["feature"]), 'y': 'Probability of Disease'}
+                                )
+                                fig_sweep.update_traces(line_color='#EF4444', line_width=4)
+                                fig_sweep.add_vline(x=payload[curve["feature"]], line_dash="dash", line_color="#64748B",
+                                                    annotation_text="You")
+                                fig_sweep.add_hline(y=0.5, line_dash="dot", line_color="#94A3B8")
+                                fig_sweep.update_layout(
+                                    height=300,
+                                    margin=dict(l=0, r=0, t=10, b=0),
+                                    plot_bgcolor="rgba(0,0,0,0)",
+                                    yaxis_range=[0, 1]
+                                )
+                                st.plotly_chart(fig_sweep, use_container_width=True)
+                        with tabs[-1]:
+                            grid = sweep_result["grid"]
+                            fig_grid = go.Figure(go.Heatmap(
+                                x=grid["x"], y=grid["y"], z=grid["risk"], zmin=0, zmax=1,
+                                colorscale="RdBu_r", colorbar=dict(title="Risk")
+                            ))
+                            fig_grid.add_trace(go.Scatter(x=[ap_hi], y=[weight], mode="markers", name="You",
+                                                          marker=dict(color="#1E293B", size=12, symbol="x")))
+                            fig_grid.update_layout(
+                                height=350,
+                                margin=dict(l=0, r=0, t=10, b=0),
+                                plot_bgcolor="rgba(0,0,0,0)",
+                                xaxis_title="Systolic BP (mmHg)",
+                                yaxis_title="Weight (kg)"
+                            )
+                            st.plotly_chart(fig_grid, use_container_width=True)
+                    profiler.mark("what_if")
+
+                    st.caption(f"Assessed in {(time.perf_counter() - clicked_at) * 1000:.0f} ms")
+                
+                else:
+                    status_placeholder.error("Prediction service unavailable.")
+            except Exception as e:
+                status_placeholder.error(f"Connection Error: {e}")
+
+        # AI Disclaimer
+        st.markdown("<br>", unsafe_allow_html=True)
+        st.markdown("""
+        <div style="background-color: #FFF7ED; border-left: 4px solid #F97316; padding: 15px; border-radius: 4px; margin-top: 20px;">
+            <p style="color: #9A3412; font-weight: bold; margin-bottom: 5px; font-size: 0.95rem;">⚠️ Medical Disclaimer</p>
+            <p style="color: #C2410C; font-size: 0.85rem; margin: 0; line-height: 1.5;">
+                <b>This tool is accurate up to 73.2% based on historical population data.</b><br>
+                This application uses Artificial Intelligence to estimate risk and <b>is NOT a substitute for professional medical advice, diagnosis, or treatment</b>. 
+                Always seek the advice of your physician or other qualified health provider with any questions you may have regarding a medical condition. 
+                Do not disregard professional medical advice or delay in seeking it because of something you have read on this application.
+            </p>
+        </div>
+        """, unsafe_allow_html=True)
+    
+    st.markdown("</div>", unsafe_allow_html=True)
+    profiler.mark("disclaimer")